@@ -1,33 +1,108 @@
+import asyncio
+import logging
 import os
 import re
+import time
 from datetime import datetime, timezone
 from pathlib import Path
 from tempfile import NamedTemporaryFile
 
+import numpy as np
 import pandas as pd
 import requests
-from flask import Flask, jsonify, request
+from flask import Blueprint, Flask, current_app, g, jsonify, request
 from flask_cors import CORS
 from werkzeug.utils import secure_filename
 
-from image_processing import EmotionDetectionError, NoFaceDetectedError, analyze_image
-
-app = Flask(__name__)
+from async_previews import AsyncPreviewResolver, PreviewProvider
+from catalog import is_prepared, mood_mask, prepare_catalog
+from catalog_store import CatalogReader
+from image_processing import (
+    EmotionDetectionError,
+    NoFaceDetectedError,
+    analyze_image,
+    configure_threads,
+    warm_up,
+)
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE
+from metrics import (
+    PREVIEW_CACHE_REQUESTS,
+    PREVIEW_LOOKUPS,
+    PREVIEW_LOOKUPS_COALESCED,
+    REGISTRY,
+    REQUEST_LATENCY,
+    STAGE_LATENCY,
+    UPSTREAM_LATENCY,
+    SharedMetrics,
+)
+from preview_revalidation import PreviewRevalidator, check_preview_url
+from profiling import init_app as init_profiling
+from resilience import CircuitBreaker, TokenBucket, UpstreamGuard
+from served_tracks import ServedTracks
+from singleflight import SingleFlight
+
+api = Blueprint("api", __name__)
+LOGGER = logging.getLogger(__name__)
 BASE_DIR = Path(__file__).resolve().parent
-DATAFRAME = pd.read_csv(BASE_DIR / "data_moods.csv")
+CATALOG_PATH = BASE_DIR / "data_moods.csv"
+CATALOG_REFRESH_INTERVAL = float(os.getenv("CATALOG_REFRESH_INTERVAL", "5"))
+CATALOG_READER = CatalogReader(CATALOG_PATH, refresh_interval=CATALOG_REFRESH_INTERVAL)
+DATAFRAME = prepare_catalog(CATALOG_READER.load())
 UPLOAD_DIR = BASE_DIR / "pics"
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 ALLOWED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp"}
-app.config["MAX_CONTENT_LENGTH"] = 5 * 1024 * 1024  # 5 MB
+MAX_UPLOAD_BYTES = 5 * 1024 * 1024  # 5 MB
 PREVIEW_CACHE = {}
 PREVIEW_CACHE_MAX_SIZE = 4000
+# Rows already sent to each ``session_id`` on /api/songs, forgotten after this idle time.
+SESSION_TTL_SECONDS = float(os.getenv("SESSION_TTL_SECONDS", "1800"))
+MAX_SESSION_ID_LENGTH = 128
 PREVIEW_LOOKUP_TIMEOUT = 6
 MAX_PREVIEW_LOOKUPS_PER_REQUEST = 12
+PREVIEW_RATE_LIMIT_PER_SECOND = float(os.getenv("PREVIEW_RATE_LIMIT_PER_SECOND", "10"))
+PREVIEW_RATE_LIMIT_BURST = int(os.getenv("PREVIEW_RATE_LIMIT_BURST", "20"))
+PREVIEW_BREAKER_FAILURES = 5
+PREVIEW_BREAKER_COOLDOWN = 30
+PREVIEW_ASYNC = os.getenv("PREVIEW_ASYNC", "").lower() in {"1", "true", "yes"}
+# Seconds between background passes that re-check stored preview URLs (0 disables).
+PREVIEW_REVALIDATE_INTERVAL = float(os.getenv("PREVIEW_REVALIDATE_INTERVAL", "0"))
+PREVIEW_REVALIDATE_RATE_PER_SECOND = float(os.getenv("PREVIEW_REVALIDATE_RATE_PER_SECOND", "5"))
+PREVIEW_REVALIDATE_BATCH = int(os.getenv("PREVIEW_REVALIDATE_BATCH", "200"))
+PREVIEW_REVALIDATE_MAX_AGE = 6 * 3600
+PREVIEW_CHECK_TIMEOUT = 5
+# "catalog" workers serve only the song endpoints and never import OpenCV or
+# TensorFlow; camera requests to them get a 503 so a router can send them elsewhere.
+WORKER_ROLE = os.getenv("WORKER_ROLE", "all").strip().lower()
+VISION_WARMUP = os.getenv("VISION_WARMUP", "").lower() in {"1", "true", "yes"}
+# Set by serve.py for gunicorn workers: each writes its metrics there so /metrics
+# can report every worker, whichever one answers the scrape.
+METRICS_MULTIPROC_DIR = os.getenv("METRICS_MULTIPROC_DIR", "")
+METRICS_WRITE_INTERVAL = float(os.getenv("METRICS_WRITE_INTERVAL", "5"))
+ITUNES_SEARCH_URL = os.getenv("ITUNES_SEARCH_URL", "https://itunes.apple.com/search")
+DEEZER_SEARCH_URL = os.getenv("DEEZER_SEARCH_URL", "https://api.deezer.com/search")
+
+PREVIEW_FLIGHTS = SingleFlight()
+SERVED_TRACKS = ServedTracks(ttl=SESSION_TTL_SECONDS)
+
+
+def _build_shared_metrics():
+    if not METRICS_MULTIPROC_DIR:
+        return None
+    return SharedMetrics(METRICS_MULTIPROC_DIR, interval=METRICS_WRITE_INTERVAL)
+
+
+SHARED_METRICS = _build_shared_metrics()
+
+
+def _build_http_session():
+    session = requests.Session()
+    session.headers.update({"User-Agent": "Mood-Music/1.0"})
+    return session
 
-HTTP = requests.Session()
-HTTP.headers.update({"User-Agent": "Mood-Music/1.0"})
 
-allowed_origins = [
+HTTP = _build_http_session()
+
+ALLOWED_ORIGINS = [
     origin.strip()
     for origin in os.getenv(
         "ALLOWED_ORIGINS",
@@ -35,7 +110,6 @@ allowed_origins = [
     ).split(",")
     if origin.strip()
 ]
-CORS(app, resources={r"/*": {"origins": allowed_origins}})
 
 
 def choose_genre(pred_class):
@@ -68,6 +142,11 @@ def _parse_bool(value, default=False):
     return default
 
 
+# track id -> (dead preview url, url served instead), filled by the revalidator.
+PREVIEW_OVERRIDES = {}
+_SWEEP_POSITION = 0
+
+
 def _cache_preview(cache_key, preview_url):
     if len(PREVIEW_CACHE) >= PREVIEW_CACHE_MAX_SIZE:
         PREVIEW_CACHE.pop(next(iter(PREVIEW_CACHE)))
@@ -94,15 +173,12 @@ def _preview_score(track_name, artist_name, candidate_track, candidate_artist):
     return score
 
 
-def _lookup_itunes_preview(track_name, artist_name):
-    response = HTTP.get(
-        "https://itunes.apple.com/search",
-        params={"term": f"{track_name} {artist_name}", "entity": "song", "limit": 8},
-        timeout=PREVIEW_LOOKUP_TIMEOUT,
-    )
-    response.raise_for_status()
+def _itunes_search_params(track_name, artist_name):
+    return {"term": f"{track_name} {artist_name}", "entity": "song", "limit": 8}
+
 
-    results = response.json().get("results", [])
+def _best_itunes_preview(payload, track_name, artist_name):
+    results = payload.get("results", [])
     best_url = None
     best_score = -1
 
@@ -123,15 +199,22 @@ def _lookup_itunes_preview(track_name, artist_name):
     return best_url
 
 
-def _lookup_deezer_preview(track_name, artist_name):
+def _lookup_itunes_preview(track_name, artist_name):
     response = HTTP.get(
-        "https://api.deezer.com/search",
-        params={"q": f'track:"{track_name}" artist:"{artist_name}"', "limit": 8},
+        ITUNES_SEARCH_URL,
+        params=_itunes_search_params(track_name, artist_name),
         timeout=PREVIEW_LOOKUP_TIMEOUT,
     )
     response.raise_for_status()
+    return _best_itunes_preview(response.json(), track_name, artist_name)
+
 
-    results = response.json().get("data", [])
+def _deezer_search_params(track_name, artist_name):
+    return {"q": f'track:"{track_name}" artist:"{artist_name}"', "limit": 8}
+
+
+def _best_deezer_preview(payload, track_name, artist_name):
+    results = payload.get("data", [])
     best_url = None
     best_score = -1
 
@@ -152,29 +235,239 @@ def _lookup_deezer_preview(track_name, artist_name):
     return best_url
 
 
+def _lookup_deezer_preview(track_name, artist_name):
+    response = HTTP.get(
+        DEEZER_SEARCH_URL,
+        params=_deezer_search_params(track_name, artist_name),
+        timeout=PREVIEW_LOOKUP_TIMEOUT,
+    )
+    response.raise_for_status()
+    return _best_deezer_preview(response.json(), track_name, artist_name)
+
+
+PREVIEW_PROVIDERS = (
+    PreviewProvider("itunes", ITUNES_SEARCH_URL, _itunes_search_params, _best_itunes_preview),
+    PreviewProvider("deezer", DEEZER_SEARCH_URL, _deezer_search_params, _best_deezer_preview),
+)
+PREVIEW_GUARDS = {
+    provider.name: UpstreamGuard(
+        provider.name,
+        TokenBucket(PREVIEW_RATE_LIMIT_PER_SECOND, PREVIEW_RATE_LIMIT_BURST),
+        CircuitBreaker(PREVIEW_BREAKER_FAILURES, PREVIEW_BREAKER_COOLDOWN),
+    )
+    for provider in PREVIEW_PROVIDERS
+}
+
+
+def _build_preview_resolver():
+    return AsyncPreviewResolver(
+        PREVIEW_PROVIDERS, timeout=PREVIEW_LOOKUP_TIMEOUT, guards=PREVIEW_GUARDS
+    )
+
+
+PREVIEW_RESOLVER = _build_preview_resolver() if PREVIEW_ASYNC else None
+
+
+def _fetch_preview_url(track_name, artist_name):
+    """Try each provider in turn and return ``(preview_url, complete)``.
+
+    ``complete`` is False when a provider was skipped or failed, so a miss is
+    not cached and the track is retried once the provider recovers.
+    """
+    PREVIEW_LOOKUPS.inc(path="sync")
+    complete = True
+    for provider_name, lookup in (
+        ("itunes", _lookup_itunes_preview),
+        ("deezer", _lookup_deezer_preview),
+    ):
+        guard = PREVIEW_GUARDS[provider_name]
+        if not guard.acquire():
+            complete = False
+            continue
+        started = time.perf_counter()
+        try:
+            preview_url = lookup(track_name, artist_name)
+        except Exception as exc:
+            # Every outcome must settle the breaker, or a half-open trial never ends.
+            UPSTREAM_LATENCY.observe(
+                time.perf_counter() - started, provider=provider_name, outcome="error"
+            )
+            guard.record_failure()
+            if not isinstance(exc, requests.RequestException):
+                LOGGER.exception("Unexpected error looking up a %s preview", provider_name)
+            complete = False
+            continue
+        UPSTREAM_LATENCY.observe(
+            time.perf_counter() - started, provider=provider_name, outcome="ok"
+        )
+        guard.record_success()
+        if preview_url:
+            return preview_url, True
+    return None, complete
+
+
 def lookup_preview_url(track_id, track_name, artist_name):
     cache_key = str(track_id or "").strip()
     if cache_key and cache_key in PREVIEW_CACHE:
+        PREVIEW_CACHE_REQUESTS.inc(result="hit")
         return PREVIEW_CACHE[cache_key]
+    PREVIEW_CACHE_REQUESTS.inc(result="miss")
 
     if not track_name:
         if cache_key:
             _cache_preview(cache_key, None)
         return None
 
-    preview_url = None
-    try:
-        preview_url = _lookup_itunes_preview(track_name, artist_name)
-        if not preview_url:
-            preview_url = _lookup_deezer_preview(track_name, artist_name)
-    except requests.RequestException:
-        preview_url = None
+    if not cache_key:
+        return _fetch_preview_url(track_name, artist_name)[0]
+
+    def resolve():
+        # A previous leader may have finished between our cache check and now.
+        if cache_key in PREVIEW_CACHE:
+            return PREVIEW_CACHE[cache_key]
+        preview_url, complete = _fetch_preview_url(track_name, artist_name)
+        if complete:
+            _cache_preview(cache_key, preview_url)
+        return preview_url
+
+    preview_url, shared = PREVIEW_FLIGHTS.do(cache_key, resolve)
+    if shared:
+        PREVIEW_LOOKUPS_COALESCED.inc(path="sync")
+    return preview_url
+
+
+def _split_cached_previews(tracks):
+    """Answer ``tracks`` from the preview cache: ``(results, pending lookups)``."""
+    results = [None] * len(tracks)
+    pending = []
+    for index, (track_id, track_name, artist_name) in enumerate(tracks):
+        cache_key = str(track_id or "").strip()
+        if cache_key and cache_key in PREVIEW_CACHE:
+            PREVIEW_CACHE_REQUESTS.inc(result="hit")
+            results[index] = PREVIEW_CACHE[cache_key]
+            continue
+        PREVIEW_CACHE_REQUESTS.inc(result="miss")
+        if not track_name:
+            if cache_key:
+                _cache_preview(cache_key, None)
+        else:
+            pending.append((index, cache_key, track_name, artist_name))
+    return results, pending
+
+
+def _store_resolved_previews(results, pending, resolved):
+    for (index, cache_key, _, _), (preview_url, complete) in zip(pending, resolved):
+        results[index] = preview_url
+        if cache_key and complete:
+            _cache_preview(cache_key, preview_url)
+    return results
+
+
+def lookup_preview_urls(tracks):
+    """Resolve ``(track_id, track_name, artist_name)`` tuples concurrently.
+
+    Uses the async resolver, so every lookup of a request shares one round-trip
+    window instead of waiting on each upstream call in turn.
+    """
+    results, pending = _split_cached_previews(tracks)
+    if pending:
+        resolved = PREVIEW_RESOLVER.resolve_many([lookup[1:] for lookup in pending])
+        _store_resolved_previews(results, pending, resolved)
+    return results
+
+
+async def lookup_preview_urls_async(tracks):
+    """``lookup_preview_urls`` for callers on an event loop; awaits instead of blocking."""
+    results, pending = _split_cached_previews(tracks)
+    if pending:
+        resolved = await PREVIEW_RESOLVER.resolve_many_async(
+            [lookup[1:] for lookup in pending]
+        )
+        _store_resolved_previews(results, pending, resolved)
+    return results
+
 
-    if cache_key:
-        _cache_preview(cache_key, preview_url)
+def _current_preview_url(track_id, preview_url):
+    override = PREVIEW_OVERRIDES.get(track_id)
+    if override is not None and override[0] == preview_url:
+        return override[1]
     return preview_url
 
 
+def _replace_preview(track_id, dead_url, preview_url):
+    """Serve ``preview_url`` wherever ``dead_url`` was stored for ``track_id``."""
+    override = PREVIEW_OVERRIDES.get(track_id)
+    if override is not None and override[1] == dead_url:
+        dead_url = override[0]  # A replacement died too; keep keying on the stored URL.
+    PREVIEW_OVERRIDES[track_id] = (dead_url, preview_url)
+
+
+def _catalog_preview_sweep(limit):
+    """Yield the next ``limit`` catalog rows' stored previews, wrapping around the catalog."""
+    global _SWEEP_POSITION
+    frame = DATAFRAME
+    if "preview_url" not in frame.columns or frame.empty:
+        return
+    start = _SWEEP_POSITION % len(frame)
+    window = frame.iloc[start : start + limit]
+    _SWEEP_POSITION = start + len(window)
+    for track_id, name, artist, stored in zip(
+        window["id"], window["name"], window["artist"], window["preview_url"]
+    ):
+        if not isinstance(stored, str) or not stored.strip():
+            continue
+        cache_key = str(track_id).strip()
+        preview_url = _current_preview_url(cache_key, stored)
+        if preview_url:
+            yield cache_key, name, artist, preview_url
+
+
+def _build_preview_revalidator():
+    return PreviewRevalidator(
+        check=lambda url: check_preview_url(HTTP, url, timeout=PREVIEW_CHECK_TIMEOUT),
+        resolve=_fetch_preview_url,
+        replace=_replace_preview,
+        limiter=TokenBucket(PREVIEW_REVALIDATE_RATE_PER_SECOND, PREVIEW_REVALIDATE_RATE_PER_SECOND),
+        batch_size=PREVIEW_REVALIDATE_BATCH,
+        max_age=PREVIEW_REVALIDATE_MAX_AGE,
+    )
+
+
+PREVIEW_REVALIDATOR = _build_preview_revalidator() if PREVIEW_REVALIDATE_INTERVAL > 0 else None
+
+
+def _record_served_previews(payload):
+    """Swap in revalidated URLs and count serves for the revalidator's priorities."""
+    PREVIEW_REVALIDATOR.ensure_started(
+        PREVIEW_REVALIDATE_INTERVAL, _catalog_preview_sweep, current_app.logger
+    )
+    for item in payload:
+        if not item["preview_url"]:
+            continue
+        track_id = str(item["id"] or "").strip()
+        if not track_id:
+            continue
+        item["preview_url"] = _current_preview_url(track_id, item["preview_url"])
+        if item["preview_url"]:
+            PREVIEW_REVALIDATOR.record_served(
+                track_id, item["name"], item["artist"], item["preview_url"]
+            )
+
+
+def _refresh_catalog():
+    """Pick up rows the importer appended to the catalog delta log."""
+    global DATAFRAME
+    try:
+        refreshed = CATALOG_READER.refresh(DATAFRAME)
+    except (OSError, ValueError):
+        current_app.logger.exception("Failed to refresh song catalog; serving the loaded copy")
+        return
+    if refreshed is not None:
+        DATAFRAME = prepare_catalog(refreshed)
+        # Served-row bitsets index the old mood partitions.
+        SERVED_TRACKS.clear()
+
+
 def _allowed_file_extension(filename):
     return Path(filename).suffix.lower() in ALLOWED_EXTENSIONS
 
@@ -199,6 +492,10 @@ def _validate_snapshot_file(snapshot_file):
     return None
 
 
+def _camera_disabled_response():
+    return jsonify({"error": "Camera analysis is not served by this worker."}), 503
+
+
 def _analyze_snapshot_file(snapshot_file):
     snapshot_name = secure_filename(snapshot_file.filename)
     suffix = Path(snapshot_name).suffix.lower() or ".jpg"
@@ -208,7 +505,7 @@ def _analyze_snapshot_file(snapshot_file):
     temp_path = Path(temp_file.name)
 
     try:
-        with temp_file:
+        with STAGE_LATENCY.time(stage="upload_save"), temp_file:
             snapshot_file.save(temp_file.name)
 
         analysis = analyze_image(temp_path)
@@ -223,18 +520,65 @@ def _analyze_snapshot_file(snapshot_file):
             pass
 
 
-@app.errorhandler(413)
+def _select_tracks(catalog, genre, limit, shuffle, session_id=None):
+    """Return up to ``limit`` catalog rows for ``genre``, playlist imports first.
+
+    With a ``session_id``, rows already sent to that session come last until
+    every row of the mood has been sent once.
+    """
+    if not is_prepared(catalog):
+        catalog = prepare_catalog(catalog)
+    partition = np.flatnonzero(mood_mask(catalog, genre))
+
+    if shuffle:
+        order = np.random.permutation(len(partition))
+    else:
+        popularity = pd.to_numeric(catalog["popularity"].iloc[partition], errors="coerce")
+        order = np.argsort(-popularity.to_numpy(dtype=float), kind="stable")
+    rank = (~catalog["is_playlist"].to_numpy()[partition]).astype(np.int8)
+    if session_id:
+        rank += 2 * SERVED_TRACKS.seen(session_id, genre, len(partition))
+    order = order[np.argsort(rank[order], kind="stable")][:limit]
+    if session_id:
+        SERVED_TRACKS.mark(session_id, genre, order, len(partition))
+
+    sorted_df = catalog.iloc[partition[order]].reset_index(drop=True)
+    if "preview_url" not in sorted_df.columns:
+        sorted_df["preview_url"] = None
+    return sorted_df
+
+
+@api.before_app_request
+def _start_request_timer():
+    g.request_started = time.perf_counter()
+
+
+@api.after_app_request
+def _record_request_latency(response):
+    started = g.pop("request_started", None)
+    if started is not None:
+        REQUEST_LATENCY.observe(
+            time.perf_counter() - started,
+            endpoint=request.url_rule.rule if request.url_rule else "<unmatched>",
+            method=request.method,
+            status=response.status_code,
+        )
+    return response
+
+
+@api.app_errorhandler(413)
 def payload_too_large(_error):
     return jsonify({"error": "Uploaded file is too large (max 5 MB)."}), 413
 
 
-@app.get("/")
+@api.get("/")
 def index():
     return (
         jsonify(
             {
                 "service": "Mood Music Backend",
                 "status": "ok",
+                "role": current_app.config["WORKER_ROLE"],
                 "endpoints": ["/api/songs", "/api/camera", "/api/camera/analyze"],
             }
         ),
@@ -242,54 +586,50 @@ def index():
     )
 
 
-@app.get("/favicon.ico")
+@api.get("/favicon.ico")
 def favicon():
     return ("", 204)
 
 
-@app.get("/api/songs")
-@app.get("/songs")
-def data_sort():
-    user_mood = request.args.get("arg1", type=str)
+@api.get("/metrics")
+def metrics_endpoint():
+    metrics = SHARED_METRICS if SHARED_METRICS is not None else REGISTRY
+    return metrics.render(), 200, {"Content-Type": METRICS_CONTENT_TYPE}
+
+
+def _select_songs(args):
+    """Validate /api/songs ``args`` and pick the rows: ``(error, payload, pending_lookups)``.
+
+    ``pending_lookups`` holds ``(payload position, (track_id, name, artist))``
+    for the rows without a stored preview that should be looked up.
+    """
+    user_mood = args.get("arg1", type=str)
     if not user_mood:
-        return jsonify({"error": "Missing required query parameter: arg1"}), 400
-    limit = request.args.get("limit", default=24, type=int)
+        return "Missing required query parameter: arg1", None, None
+    limit = args.get("limit", default=24, type=int)
     if limit is None:
         limit = 24
     limit = min(max(limit, 1), 80)
-    shuffle = _parse_bool(request.args.get("shuffle"), default=True)
+    shuffle = _parse_bool(args.get("shuffle"), default=True)
+    session_id = (args.get("session_id", type=str) or "").strip()
+    if len(session_id) > MAX_SESSION_ID_LENGTH:
+        return "session_id is too long", None, None
 
+    _refresh_catalog()
     genre = choose_genre(user_mood)
-    sorted_df = DATAFRAME[DATAFRAME["mood"].str.lower() == genre].copy()
-    sorted_df = sorted_df.sort_values(by="popularity", ascending=False).copy()
-
-    if "source" in sorted_df.columns:
-        source_series = sorted_df["source"].fillna("").astype(str).str.lower()
-        playlist_rows = sorted_df[source_series.str.startswith("playlist:")].copy()
-        non_playlist_rows = sorted_df[~source_series.str.startswith("playlist:")].copy()
-        if shuffle:
-            if not playlist_rows.empty:
-                playlist_rows = playlist_rows.sample(frac=1).copy()
-            if not non_playlist_rows.empty:
-                non_playlist_rows = non_playlist_rows.sample(frac=1).copy()
-        sorted_df = pd.concat([playlist_rows, non_playlist_rows], ignore_index=True)
-    elif shuffle and not sorted_df.empty:
-        sorted_df = sorted_df.sample(frac=1).copy()
-
-    sorted_df = sorted_df.head(limit).copy()
-    if "preview_url" not in sorted_df.columns:
-        sorted_df["preview_url"] = None
+    with STAGE_LATENCY.time(stage="songs_select"):
+        sorted_df = _select_tracks(DATAFRAME, genre, limit, shuffle, session_id or None)
 
     payload = []
-    preview_lookups = 0
+    pending_lookups = []
     for _, row in sorted_df.iterrows():
         preview_url = row.get("preview_url")
         if not isinstance(preview_url, str) or not preview_url.strip():
-            if preview_lookups < MAX_PREVIEW_LOOKUPS_PER_REQUEST:
-                preview_url = lookup_preview_url(row.get("id"), row.get("name"), row.get("artist"))
-                preview_lookups += 1
-            else:
-                preview_url = None
+            preview_url = None
+            if len(pending_lookups) < MAX_PREVIEW_LOOKUPS_PER_REQUEST:
+                pending_lookups.append(
+                    (len(payload), (row.get("id"), row.get("name"), row.get("artist")))
+                )
 
         payload.append(
             {
@@ -301,13 +641,57 @@ def data_sort():
                 "preview_url": preview_url,
             }
         )
+    return None, payload, pending_lookups
+
 
+def _songs_response(payload, pending_lookups, resolved):
+    for (position, _), preview_url in zip(pending_lookups, resolved):
+        payload[position]["preview_url"] = preview_url
+    if PREVIEW_REVALIDATOR is not None:
+        _record_served_previews(payload)
     return jsonify(payload), 200
 
 
-@app.post("/api/camera")
-@app.post("/camera")
+@api.get("/api/songs")
+@api.get("/songs")
+def data_sort():
+    error, payload, pending_lookups = _select_songs(request.args)
+    if error:
+        return jsonify({"error": error}), 400
+
+    resolved = []
+    if pending_lookups:
+        tracks = [track for _, track in pending_lookups]
+        with STAGE_LATENCY.time(stage="songs_preview_lookup"):
+            if PREVIEW_RESOLVER is not None:
+                resolved = lookup_preview_urls(tracks)
+            else:
+                resolved = [lookup_preview_url(*track) for track in tracks]
+    return _songs_response(payload, pending_lookups, resolved)
+
+
+async def data_sort_async():
+    """``data_sort`` for the ASGI entry point: the lookups are awaited, holding no thread.
+
+    Row selection still runs on a worker thread, since it is CPU-bound pandas work.
+    """
+    error, payload, pending_lookups = await asyncio.to_thread(_select_songs, request.args)
+    if error:
+        return jsonify({"error": error}), 400
+
+    resolved = []
+    if pending_lookups:
+        tracks = [track for _, track in pending_lookups]
+        with STAGE_LATENCY.time(stage="songs_preview_lookup"):
+            resolved = await lookup_preview_urls_async(tracks)
+    return _songs_response(payload, pending_lookups, resolved)
+
+
+@api.post("/api/camera")
+@api.post("/camera")
 def process_image_endpoint():
+    if not current_app.config["CAMERA_ENABLED"]:
+        return _camera_disabled_response()
     snapshot_file = request.files.get("snapshot")
     validation_error = _validate_snapshot_file(snapshot_file)
     if validation_error:
@@ -321,13 +705,15 @@ def process_image_endpoint():
     except EmotionDetectionError as exc:
         return jsonify({"error": str(exc)}), 500
     except Exception:
-        app.logger.exception("Unexpected error in /camera")
+        current_app.logger.exception("Unexpected error in /camera")
         return jsonify({"error": "Unexpected error processing image."}), 500
 
 
-@app.post("/api/camera/analyze")
-@app.post("/camera/analyze")
+@api.post("/api/camera/analyze")
+@api.post("/camera/analyze")
 def analyze_camera_frame_endpoint():
+    if not current_app.config["CAMERA_ENABLED"]:
+        return _camera_disabled_response()
     snapshot_file = request.files.get("snapshot")
     validation_error = _validate_snapshot_file(snapshot_file)
     if validation_error:
@@ -341,10 +727,81 @@ def analyze_camera_frame_endpoint():
     except EmotionDetectionError as exc:
         return jsonify({"error": str(exc)}), 500
     except Exception:
-        app.logger.exception("Unexpected error in /camera/analyze")
+        current_app.logger.exception("Unexpected error in /camera/analyze")
         return jsonify({"error": "Unexpected error processing image."}), 500
 
 
+def warm_up_vision(flask_app):
+    try:
+        warm_up()
+    except EmotionDetectionError:
+        flask_app.logger.exception("Vision warm-up failed; camera requests will retry on demand")
+
+
+def _reset_after_fork():
+    """Replace per-process resources a forked worker must not share with its parent."""
+    global HTTP, PREVIEW_RESOLVER, PREVIEW_REVALIDATOR, SHARED_METRICS
+    HTTP = _build_http_session()
+    if SHARED_METRICS is not None:
+        # Report only this worker's own values under its own pid.
+        REGISTRY.clear()
+        SHARED_METRICS = _build_shared_metrics()
+        # Breaker state carried over from the parent must stay visible.
+        for guard in PREVIEW_GUARDS.values():
+            guard.publish_state()
+    if PREVIEW_RESOLVER is not None:
+        # The parent's event loop thread does not exist in the child.
+        PREVIEW_RESOLVER = _build_preview_resolver()
+    if PREVIEW_REVALIDATOR is not None:
+        # Serve counts are per process; the child starts its own pass loop on first use.
+        PREVIEW_REVALIDATOR = _build_preview_revalidator()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def shutdown():
+    """Release pooled connections and background workers; called on worker exit."""
+    if PREVIEW_RESOLVER is not None:
+        PREVIEW_RESOLVER.close()
+    if PREVIEW_REVALIDATOR is not None:
+        PREVIEW_REVALIDATOR.close()
+    if SHARED_METRICS is not None:
+        SHARED_METRICS.close()
+    HTTP.close()
+
+
+def create_app(config=None):
+    """Build the Flask app; ``config`` overrides the environment-derived defaults.
+
+    The catalog, preview cache and upstream guards are module state shared by
+    every app in the process, so a pre-forking server that imports this module
+    in its master shares them copy-on-write with its workers.
+    """
+    flask_app = Flask(__name__)
+    flask_app.config.update(
+        MAX_CONTENT_LENGTH=MAX_UPLOAD_BYTES,
+        ALLOWED_ORIGINS=ALLOWED_ORIGINS,
+        WORKER_ROLE=WORKER_ROLE,
+        VISION_WARMUP=VISION_WARMUP,
+    )
+    flask_app.config.update(config or {})
+    flask_app.config["CAMERA_ENABLED"] = flask_app.config["WORKER_ROLE"] != "catalog"
+    # Split the cores between worker processes before OpenCV/TensorFlow size their pools.
+    flask_app.config["THREAD_BUDGET"] = configure_threads(flask_app.config.get("THREAD_BUDGET"))
+
+    CORS(flask_app, resources={r"/*": {"origins": flask_app.config["ALLOWED_ORIGINS"]}})
+    flask_app.register_blueprint(api)
+    init_profiling(flask_app)
+    if flask_app.config["VISION_WARMUP"] and flask_app.config["CAMERA_ENABLED"]:
+        warm_up_vision(flask_app)
+    return flask_app
+
+
+app = create_app()
+
+
 if __name__ == "__main__":
     debug = os.getenv("FLASK_DEBUG", "").lower() in {"1", "true", "yes"}
     app.run(debug=debug)
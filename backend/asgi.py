@@ -0,0 +1,73 @@
+"""ASGI entry point for async serving, e.g. ``uvicorn asgi:application`` from ``backend/``.
+
+Enables the shared async resolver. ``/api/songs`` is served natively: it picks
+its rows on a worker thread and then awaits the preview lookups on the event
+loop, so a request waiting on iTunes/Deezer holds no thread and one process can
+keep hundreds of them open. It goes through Flask's request context and
+before/after-request hooks, so responses, CORS headers and metrics match the
+WSGI app. Every other route runs the WSGI app on the event loop's default
+thread pool; unlike plain ``WsgiToAsgi``, whose calls all share one thread,
+those requests run concurrently.
+"""
+
+import os
+
+os.environ.setdefault("PREVIEW_ASYNC", "1")
+
+from asgiref.sync import sync_to_async  # noqa: E402
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance  # noqa: E402
+
+import app as app_module  # noqa: E402
+
+SONGS_PATHS = {"/api/songs", "/songs"}
+
+
+class _ThreadPoolWsgiInstance(WsgiToAsgiInstance):
+    # asgiref's default (thread_sensitive=True) runs every WSGI call on one shared thread.
+    run_wsgi_app = sync_to_async(
+        WsgiToAsgiInstance.__dict__["run_wsgi_app"].func, thread_sensitive=False
+    )
+
+
+class ThreadPoolWsgiToAsgi(WsgiToAsgi):
+    """``WsgiToAsgi`` that runs concurrent requests on separate pool threads."""
+
+    async def __call__(self, scope, receive, send):
+        instance = _ThreadPoolWsgiInstance(self.wsgi_application, self.duplicate_header_limit)
+        await instance(scope, receive, send)
+
+
+async def _serve_songs(flask_app, scope, send):
+    builder = WsgiToAsgiInstance(flask_app)
+    builder.scope = scope
+    environ = builder.build_environ(scope, None)
+    with flask_app.request_context(environ):
+        try:
+            response = flask_app.preprocess_request()
+            if response is None:
+                response = await app_module.data_sort_async()
+            response = flask_app.process_response(flask_app.make_response(response))
+        except Exception as exc:
+            response = flask_app.make_response(flask_app.handle_exception(exc))
+        body = response.get_data()
+        headers = [
+            (name.lower().encode("latin-1"), value.encode("latin-1"))
+            for name, value in response.headers.items()
+        ]
+    await send({"type": "http.response.start", "status": response.status_code, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+def create_asgi_app(flask_app):
+    wsgi = ThreadPoolWsgiToAsgi(flask_app)
+
+    async def asgi_app(scope, receive, send):
+        if scope["type"] == "http" and scope["method"] == "GET" and scope["path"] in SONGS_PATHS:
+            await _serve_songs(flask_app, scope, send)
+        else:
+            await wsgi(scope, receive, send)
+
+    return asgi_app
+
+
+application = create_asgi_app(app_module.app)
@@ -0,0 +1,151 @@
+import asyncio
+import threading
+import time
+from collections import namedtuple
+
+from metrics import PREVIEW_LOOKUPS, PREVIEW_LOOKUPS_COALESCED, UPSTREAM_LATENCY
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - dependency may be absent in CI/test envs.
+    httpx = None
+
+
+PreviewProvider = namedtuple("PreviewProvider", "name url build_params pick_preview")
+
+
+class AsyncPreviewResolver:
+    """Resolve preview URLs on a background event loop with a pooled async client.
+
+    Request threads hand a batch of lookups to the loop and block only until the
+    slowest one finishes. Lookups for a key that is already in flight (from any
+    thread) await the same task instead of issuing another upstream call.
+    """
+
+    def __init__(
+        self, providers, timeout, max_connections=64, client_factory=None, guards=None
+    ):
+        self.providers = tuple(providers)
+        self.guards = guards or {}
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self._client_factory = client_factory or self._default_client
+        self._client = None
+        self._loop = None
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._inflight = {}
+
+    def _default_client(self):
+        if httpx is None:
+            raise RuntimeError(
+                "httpx is required for async preview lookups. Install requirements.txt."
+            )
+        return httpx.AsyncClient(
+            timeout=self.timeout,
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections,
+            ),
+            headers={"User-Agent": "Mood-Music/1.0"},
+        )
+
+    def _ensure_loop(self):
+        with self._start_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(
+                    target=loop.run_forever, name="preview-resolver", daemon=True
+                )
+                thread.start()
+                self._loop = loop
+                self._thread = thread
+            return self._loop
+
+    def resolve_many(self, lookups):
+        """Resolve ``(key, track_name, artist_name)`` tuples, preserving order.
+
+        Each result is ``(preview_url, complete)``; ``complete`` is False when a
+        provider was skipped or failed, so callers should not cache the miss.
+        """
+        if not lookups:
+            return []
+        loop = self._ensure_loop()
+        future = asyncio.run_coroutine_threadsafe(self._resolve_all(lookups), loop)
+        return future.result()
+
+    async def resolve_many_async(self, lookups):
+        """``resolve_many`` for callers running their own event loop, e.g. an ASGI server.
+
+        The lookups still run on the resolver's loop, so they share its client and
+        in-flight coalescing with the thread callers; the caller's loop only awaits.
+        """
+        if not lookups:
+            return []
+        loop = self._ensure_loop()
+        future = asyncio.run_coroutine_threadsafe(self._resolve_all(lookups), loop)
+        return await asyncio.wrap_future(future)
+
+    async def _resolve_all(self, lookups):
+        if self._client is None:
+            self._client = self._client_factory()
+        return await asyncio.gather(*(self._resolve(*lookup) for lookup in lookups))
+
+    async def _resolve(self, key, track_name, artist_name):
+        if not key:
+            return await self._lookup(track_name, artist_name)
+
+        task = self._inflight.get(key)
+        if task is not None:
+            PREVIEW_LOOKUPS_COALESCED.inc(path="async")
+        else:
+            task = asyncio.ensure_future(self._lookup(track_name, artist_name))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _task: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _lookup(self, track_name, artist_name):
+        PREVIEW_LOOKUPS.inc(path="async")
+        complete = True
+        for provider in self.providers:
+            guard = self.guards.get(provider.name)
+            if guard is not None and not guard.acquire():
+                complete = False
+                continue
+            started = time.perf_counter()
+            try:
+                response = await self._client.get(
+                    provider.url, params=provider.build_params(track_name, artist_name)
+                )
+                response.raise_for_status()
+                preview_url = provider.pick_preview(response.json(), track_name, artist_name)
+            except Exception:
+                # Not only HTTP errors: an unexpected payload must still settle the breaker.
+                UPSTREAM_LATENCY.observe(
+                    time.perf_counter() - started, provider=provider.name, outcome="error"
+                )
+                if guard is not None:
+                    guard.record_failure()
+                complete = False
+                continue
+            UPSTREAM_LATENCY.observe(
+                time.perf_counter() - started, provider=provider.name, outcome="ok"
+            )
+            if guard is not None:
+                guard.record_success()
+            if preview_url:
+                return preview_url, True
+        return None, complete
+
+    def close(self, timeout=5):
+        """Close the pooled client and stop the background loop."""
+        with self._start_lock:
+            loop, thread, client = self._loop, self._thread, self._client
+            self._loop = self._thread = self._client = None
+        if loop is None:
+            return
+        if client is not None:
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop).result(timeout)
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout)
+        loop.close()
@@ -0,0 +1,215 @@
+"""Drive mixed ``/api/songs`` and ``/api/camera/analyze`` traffic at a target rate.
+
+Usage::
+
+    python backend/benchmarks/loadgen.py --base-url http://127.0.0.1:5000 \\
+        --rps 50 --duration 30 --mix songs=9,camera=1
+
+Requests are sent open-loop: each one is scheduled at a fixed offset from the
+start and its latency is measured from that scheduled time, so a backend that
+falls behind shows up as growing latency instead of a silently lower request
+rate. Responses with status 5xx and connection errors count as errors.
+
+Pair it with ``stub_upstreams.py`` (see its docstring) so preview lookups hit
+local stand-ins instead of iTunes and Deezer.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import requests
+
+BENCH_DIR = Path(__file__).resolve().parent
+if str(BENCH_DIR) not in sys.path:
+    sys.path.insert(0, str(BENCH_DIR))
+
+from run_benchmarks import percentile  # noqa: E402
+
+DEFAULT_IMAGE = BENCH_DIR.parent / "pics" / "snapshot.jpg"
+ENDPOINTS = {"songs": "/api/songs", "camera": "/api/camera/analyze"}
+MOODS = ("happy", "sad", "angry", "neutral", "surprised", "scared", "disgust")
+
+_local = threading.local()
+
+
+def _session() -> requests.Session:
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = _local.session = requests.Session()
+    return session
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    """Parse ``songs=9,camera=1`` into normalized endpoint weights."""
+    weights: Dict[str, float] = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint {name!r}; expected one of {sorted(ENDPOINTS)}")
+        weights[name] = float(weight or 1)
+    total = sum(weights.values())
+    if total <= 0:
+        raise ValueError("Mix weights must add up to more than zero")
+    return {name: weight / total for name, weight in weights.items()}
+
+
+def _send(
+    base_url: str,
+    endpoint: str,
+    scheduled: float,
+    image_bytes: bytes,
+    mood: str,
+    timeout: float,
+) -> Tuple[str, str, float]:
+    url = base_url.rstrip("/") + ENDPOINTS[endpoint]
+    try:
+        if endpoint == "songs":
+            response = _session().get(url, params={"arg1": mood}, timeout=timeout)
+        else:
+            files = {"snapshot": ("snapshot.jpg", image_bytes, "image/jpeg")}
+            response = _session().post(url, files=files, timeout=timeout)
+        outcome = str(response.status_code)
+    except requests.RequestException as exc:
+        outcome = type(exc).__name__
+    return endpoint, outcome, time.perf_counter() - scheduled
+
+
+def summarize(samples: List[Tuple[str, str, float]], elapsed: float) -> Dict[str, dict]:
+    """Per-endpoint counts, error rate and latency percentiles (milliseconds)."""
+    by_endpoint: Dict[str, List[Tuple[str, float]]] = defaultdict(list)
+    for endpoint, outcome, latency in samples:
+        by_endpoint[endpoint].append((outcome, latency))
+
+    summary = {}
+    for endpoint, results in sorted(by_endpoint.items()):
+        latencies = sorted(latency * 1000 for _, latency in results)
+        outcomes = Counter(outcome for outcome, _ in results)
+        errors = sum(
+            count
+            for outcome, count in outcomes.items()
+            if not outcome.isdigit() or int(outcome) >= 500
+        )
+        summary[endpoint] = {
+            "requests": len(results),
+            "achieved_rps": round(len(results) / elapsed, 2) if elapsed else 0.0,
+            "errors": errors,
+            "error_rate": round(errors / len(results), 4),
+            "outcomes": dict(sorted(outcomes.items())),
+            "p50_ms": round(percentile(latencies, 0.50), 2),
+            "p95_ms": round(percentile(latencies, 0.95), 2),
+            "p99_ms": round(percentile(latencies, 0.99), 2),
+            "max_ms": round(latencies[-1], 2),
+        }
+    return summary
+
+
+def run_load(
+    base_url: str,
+    rps: float,
+    duration: float,
+    mix: Dict[str, float],
+    image_bytes: bytes = b"",
+    timeout: float = 10.0,
+    max_workers: int = 64,
+    seed: int | None = None,
+) -> Dict[str, object]:
+    rng = random.Random(seed)
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    total = int(rps * duration)
+
+    samples: List[Tuple[str, str, float]] = []
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = []
+        for index in range(total):
+            scheduled = started + index / rps
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            endpoint = rng.choices(names, weights)[0]
+            futures.append(
+                pool.submit(
+                    _send, base_url, endpoint, scheduled, image_bytes, rng.choice(MOODS), timeout
+                )
+            )
+        samples = [future.result() for future in futures]
+    elapsed = time.perf_counter() - started
+
+    return {
+        "base_url": base_url,
+        "target_rps": rps,
+        "duration_s": round(elapsed, 2),
+        "requests": len(samples),
+        "endpoints": summarize(samples, elapsed),
+    }
+
+
+def _print_summary(report: Dict[str, object]) -> None:
+    print(
+        f"{report['requests']} requests in {report['duration_s']}s "
+        f"(target {report['target_rps']} rps)",
+        file=sys.stderr,
+    )
+    for endpoint, stats in report["endpoints"].items():
+        print(
+            f"{endpoint:8} n={stats['requests']:<6} rps={stats['achieved_rps']:<8} "
+            f"p50={stats['p50_ms']}ms p95={stats['p95_ms']}ms p99={stats['p99_ms']}ms "
+            f"errors={stats['error_rate']:.1%}",
+            file=sys.stderr,
+        )
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://127.0.0.1:5000")
+    parser.add_argument("--rps", type=float, default=20.0, help="Target requests per second.")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds of traffic.")
+    parser.add_argument(
+        "--mix", default="songs=9,camera=1", help="Relative endpoint weights (name=weight,...)."
+    )
+    parser.add_argument("--image", type=Path, default=DEFAULT_IMAGE, help="Camera frame to send.")
+    parser.add_argument("--timeout", type=float, default=10.0)
+    parser.add_argument("--max-workers", type=int, default=64)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--output", type=Path, help="Write the JSON report here (default: stdout).")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    mix = parse_mix(args.mix)
+    image_bytes = args.image.read_bytes() if "camera" in mix else b""
+    report = run_load(
+        args.base_url,
+        args.rps,
+        args.duration,
+        mix,
+        image_bytes=image_bytes,
+        timeout=args.timeout,
+        max_workers=args.max_workers,
+        seed=args.seed,
+    )
+
+    rendered = json.dumps(report, indent=2) + "\n"
+    if args.output:
+        args.output.write_text(rendered, encoding="utf-8")
+    else:
+        sys.stdout.write(rendered)
+    _print_summary(report)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
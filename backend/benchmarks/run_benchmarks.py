@@ -0,0 +1,455 @@
+"""Offline benchmarks for the catalog, preview, and vision hot paths.
+
+Usage::
+
+    python backend/benchmarks/run_benchmarks.py                    # compare to baseline
+    python backend/benchmarks/run_benchmarks.py --suite catalog --sizes 1000,100000
+    python backend/benchmarks/run_benchmarks.py --update-baseline  # record a new baseline
+    python backend/benchmarks/run_benchmarks.py --compare base.json  # gate: baseline required
+
+Nothing leaves the machine: ``data_sort`` runs against synthetic catalogs built
+from the ``data_moods.csv`` schema, preview lookups go to a local stub server
+with injected latency, and ``analyze_image`` runs on the images in
+``backend/pics``; the startup suite times ``import app`` (per worker role) and the
+vision warm-up in fresh interpreters. Results are written as JSON; when a baseline exists, each
+benchmark's median is compared against it and the run exits with status 1 if
+any of them slowed down by more than ``--tolerance``.
+
+Baselines are machine-specific, so record them on the machine that runs the
+comparison. CI does this for every pull request: it records a baseline from the
+base commit and runs the branch with ``--compare`` on the same runner, which
+also fails when the baseline is missing instead of passing silently.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List
+
+BENCH_DIR = Path(__file__).resolve().parent
+BACKEND_DIR = BENCH_DIR.parent
+for path in (BACKEND_DIR, BENCH_DIR):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from stub_upstreams import UpstreamStub  # noqa: E402
+
+DEFAULT_BASELINE = BENCH_DIR / "baseline.json"
+DEFAULT_SIZES = (1_000, 100_000, 1_000_000)
+SUITES = ("catalog", "preview", "vision", "startup")
+# Each probe runs in a fresh interpreter: (extra environment, statement to time).
+STARTUP_PROBES = {
+    "startup[import app]": ({}, "import app"),
+    "startup[import app,role=catalog]": ({"WORKER_ROLE": "catalog"}, "import app"),
+    "startup[import app,VISION_WARMUP=1]": ({"VISION_WARMUP": "1"}, "import app"),
+    "startup[vision warm_up]": ({}, "import image_processing; image_processing.warm_up()"),
+}
+_STARTUP_SCRIPT = """
+import json, resource, sys, time
+started = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - started
+heavy = sorted({{"cv2", "tensorflow"}} & set(sys.modules))
+rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{"seconds": elapsed, "max_rss_kb": rss_kb, "heavy_modules": heavy}}))
+"""
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".webp"}
+
+
+def synthetic_catalog(size: int, seed: int = 0, with_previews: bool = True) -> pd.DataFrame:
+    """Return ``size`` rows resampled from ``data_moods.csv`` with unique ids."""
+    base = pd.read_csv(BACKEND_DIR / "data_moods.csv")
+    rng = np.random.default_rng(seed)
+    frame = base.iloc[rng.integers(0, len(base), size)].reset_index(drop=True)
+    frame["id"] = [f"bench{index:07d}" for index in range(size)]
+    frame["popularity"] = rng.integers(0, 101, size)
+    if with_previews:
+        frame["preview_url"] = "https://stub.previews/" + frame["id"] + ".mp3"
+    else:
+        frame["preview_url"] = None
+    return frame
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    index = min(len(sorted_values) - 1, max(0, round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize_timings(timings: List[float]) -> Dict[str, float]:
+    timings = sorted(timings)
+    return {
+        "runs": len(timings),
+        "mean_ms": round(sum(timings) / len(timings), 3),
+        "p50_ms": round(percentile(timings, 0.50), 3),
+        "p95_ms": round(percentile(timings, 0.95), 3),
+        "min_ms": round(timings[0], 3),
+    }
+
+
+def measure(fn: Callable[[], object], repeat: int, warmup: int = 2) -> Dict[str, float]:
+    for _ in range(warmup):
+        fn()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return summarize_timings(timings)
+
+
+def _import_app():
+    # Lift the upstream rate limits and stop the catalog reader from swapping the
+    # synthetic frame out for the one on disk; both are read at import time.
+    os.environ.setdefault("PREVIEW_RATE_LIMIT_PER_SECOND", "1000000")
+    os.environ.setdefault("PREVIEW_RATE_LIMIT_BURST", "1000000")
+    os.environ.setdefault("CATALOG_REFRESH_INTERVAL", "1e9")
+    import app as app_module
+
+    return app_module
+
+
+def _songs_request(client, session_id: str = "") -> None:
+    response = client.get(f"/api/songs?arg1=happy&limit=24&session_id={session_id}")
+    if response.status_code != 200:
+        raise RuntimeError(f"/api/songs returned {response.status_code}")
+
+
+def bench_catalog(sizes: Iterable[int], repeat: int, seed: int) -> Dict[str, dict]:
+    app_module = _import_app()
+    client = app_module.app.test_client()
+    original = app_module.DATAFRAME
+    results = {}
+    try:
+        for size in sizes:
+            app_module.DATAFRAME = app_module.prepare_catalog(synthetic_catalog(size, seed=seed))
+            results[f"data_sort[rows={size}]"] = measure(lambda: _songs_request(client), repeat)
+            results[f"data_sort[rows={size},session]"] = measure(
+                lambda: _songs_request(client, "bench"), repeat
+            )
+    finally:
+        app_module.DATAFRAME = original
+    return results
+
+
+def bench_preview(repeat: int, latency: float, seed: int) -> Dict[str, dict]:
+    app_module = _import_app()
+    client = app_module.app.test_client()
+    original = (app_module.DATAFRAME, app_module.ITUNES_SEARCH_URL, app_module.DEEZER_SEARCH_URL)
+    results = {}
+    with UpstreamStub(latency=latency) as stub:
+        app_module.ITUNES_SEARCH_URL = stub.itunes_url
+        app_module.DEEZER_SEARCH_URL = stub.deezer_url
+        counter = iter(range(10**9))
+        try:
+            def cold_lookup():
+                app_module.lookup_preview_url(f"cold{next(counter)}", "Track", "Artist")
+
+            def warm_lookup():
+                app_module.lookup_preview_url("warm", "Track", "Artist")
+
+            def songs_with_misses():
+                app_module.PREVIEW_CACHE.clear()
+                _songs_request(client)
+
+            results[f"lookup_preview_url[cold,latency={latency}s]"] = measure(cold_lookup, repeat)
+            results["lookup_preview_url[warm]"] = measure(warm_lookup, repeat)
+            app_module.DATAFRAME = app_module.prepare_catalog(
+                synthetic_catalog(1_000, seed=seed, with_previews=False)
+            )
+            results[f"data_sort[preview_misses,latency={latency}s]"] = measure(
+                songs_with_misses, repeat
+            )
+        finally:
+            app_module.DATAFRAME, app_module.ITUNES_SEARCH_URL, app_module.DEEZER_SEARCH_URL = (
+                original
+            )
+            app_module.PREVIEW_CACHE.clear()
+    return results
+
+
+def traced_allocation_kb(fn: Callable[[], object], frames: int = 50) -> float:
+    """Average peak bytes (in KiB) allocated by one call of ``fn``, via tracemalloc."""
+    fn()  # Let buffered implementations allocate their scratch space first.
+    tracemalloc.start()
+    try:
+        total = 0
+        for _ in range(frames):
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            fn()
+            total += tracemalloc.get_traced_memory()[1] - before
+    finally:
+        tracemalloc.stop()
+    return round(total / frames / 1024, 1)
+
+
+def _legacy_preprocess(image_processing, frame, box):
+    # analyze_image's preprocessing before the buffered fast path. Keras'
+    # img_to_array copied into a new float32 array, as the np.array call does here.
+    cv2 = image_processing.cv2
+    x, y, w, h = box
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    roi = cv2.resize(gray[y : y + h, x : x + w], (64, 64))
+    roi = roi.astype("float32") / 255.0
+    roi = np.array(roi[..., np.newaxis], dtype="float32")
+    return np.expand_dims(roi, axis=0)
+
+
+def _buffered_preprocess(image_processing, frame, box):
+    x, y, w, h = box
+    gray = image_processing.to_grayscale(frame)
+    return image_processing.preprocess_face(gray[y : y + h, x : x + w])
+
+
+def bench_preprocess(repeat: int, seed: int) -> Dict[str, dict]:
+    """Compare per-frame latency and allocations of the old and buffered preprocessing."""
+    import image_processing
+
+    image_processing._import_vision_stack()
+    variants = {"legacy": _legacy_preprocess, "buffered": _buffered_preprocess}
+    if image_processing.cv2 is None:
+        return {f"preprocess[{name}]": {"skipped": "OpenCV is not installed"} for name in variants}
+
+    frame = np.random.default_rng(seed).integers(0, 256, (480, 640, 3), dtype=np.uint8)
+    box = (200, 120, 240, 240)
+    expected = _legacy_preprocess(image_processing, frame, box)
+    results = {}
+    for name, preprocess in variants.items():
+        def run(preprocess=preprocess):
+            return preprocess(image_processing, frame, box)
+
+        np.testing.assert_array_equal(run(), expected)
+        results[f"preprocess[{name}]"] = measure(run, max(repeat, 200))
+        results[f"preprocess[{name}]"]["alloc_kb_per_frame"] = traced_allocation_kb(run)
+    return results
+
+
+def bench_vision(repeat: int, images_dir: Path = BACKEND_DIR / "pics") -> Dict[str, dict]:
+    import image_processing
+
+    results = {}
+    images = sorted(
+        path for path in images_dir.iterdir() if path.suffix.lower() in IMAGE_SUFFIXES
+    )
+    for image in images:
+        name = f"analyze_image[{image.name}]"
+        try:
+            image_processing.analyze_image(image)
+            no_face = False
+        except image_processing.NoFaceDetectedError:
+            no_face = True
+        except image_processing.EmotionDetectionError as exc:
+            results[name] = {"skipped": str(exc)}
+            continue
+
+        def analyze(path=image):
+            try:
+                image_processing.analyze_image(path)
+            except image_processing.NoFaceDetectedError:
+                pass
+
+        results[name] = measure(analyze, repeat)
+        results[name]["no_face"] = no_face
+    return results
+
+
+def bench_startup(repeat: int) -> Dict[str, dict]:
+    """Time module imports and vision warm-up in fresh interpreters (Linux/macOS only)."""
+    results = {}
+    for name, (extra_env, statement) in STARTUP_PROBES.items():
+        env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1", **extra_env)
+        timings, rss_kb, heavy = [], 0, []
+        for _ in range(repeat):
+            completed = subprocess.run(
+                [sys.executable, "-c", _STARTUP_SCRIPT.format(statement=statement)],
+                cwd=BACKEND_DIR,
+                env=env,
+                capture_output=True,
+                text=True,
+            )
+            if completed.returncode != 0:
+                error_lines = completed.stderr.strip().splitlines() or ["failed"]
+                results[name] = {"skipped": error_lines[-1]}
+                break
+            probe = json.loads(completed.stdout.strip().splitlines()[-1])
+            timings.append(probe["seconds"] * 1000)
+            rss_kb = max(rss_kb, probe["max_rss_kb"])
+            heavy = probe["heavy_modules"]
+        else:
+            results[name] = summarize_timings(timings)
+            results[name]["max_rss_mb"] = round(rss_kb / 1024, 1)
+            results[name]["heavy_modules"] = heavy
+    return results
+
+
+def compare_results(
+    results: Dict[str, dict],
+    baseline: Dict[str, dict],
+    tolerance: float,
+    min_delta_ms: float = 0.0,
+) -> Dict[str, dict]:
+    """Compare medians against ``baseline``; status is ok, regressed, improved or new.
+
+    A slowdown under ``min_delta_ms`` never counts as a regression, so timer
+    resolution on sub-microsecond benchmarks cannot fail a run.
+    """
+    comparison = {}
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if "p50_ms" not in current:
+            continue
+        if not previous or not previous.get("p50_ms"):
+            comparison[name] = {"status": "new"}
+            continue
+        ratio = current["p50_ms"] / previous["p50_ms"]
+        if ratio > 1 + tolerance and current["p50_ms"] - previous["p50_ms"] >= min_delta_ms:
+            status = "regressed"
+        elif ratio < 1 - tolerance:
+            status = "improved"
+        else:
+            status = "ok"
+        comparison[name] = {
+            "status": status,
+            "baseline_p50_ms": previous["p50_ms"],
+            "ratio": round(ratio, 3),
+        }
+    return comparison
+
+
+def _metadata() -> Dict[str, object]:
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+    }
+
+
+def _print_summary(results: Dict[str, dict], comparison: Dict[str, dict]) -> None:
+    for name, result in results.items():
+        if "skipped" in result:
+            print(f"{name:55} skipped: {result['skipped']}", file=sys.stderr)
+            continue
+        line = f"{name:55} p50 {result['p50_ms']:10.3f} ms  p95 {result['p95_ms']:10.3f} ms"
+        compared = comparison.get(name)
+        if compared and "ratio" in compared:
+            line += f"  x{compared['ratio']:.2f} vs baseline ({compared['status']})"
+        print(line, file=sys.stderr)
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--suite",
+        action="append",
+        choices=SUITES,
+        help="Suite to run (repeatable). Defaults to all suites.",
+    )
+    parser.add_argument(
+        "--sizes",
+        default=",".join(str(size) for size in DEFAULT_SIZES),
+        help="Comma-separated synthetic catalog sizes for the catalog suite.",
+    )
+    parser.add_argument("--repeat", type=int, default=20, help="Timed runs per benchmark.")
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.05,
+        help="Seconds of latency the stub upstreams add to each response.",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="Write results JSON here (default: stdout).")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="Store this run's results as the new baseline instead of comparing.",
+    )
+    parser.add_argument(
+        "--compare",
+        type=Path,
+        metavar="BASELINE",
+        help="Compare against this baseline and fail (status 2) if it does not exist.",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="Allowed relative slowdown of the median before a benchmark counts as regressed.",
+    )
+    parser.add_argument(
+        "--min-delta-ms",
+        type=float,
+        default=0.1,
+        help="Slowdowns of the median smaller than this never count as regressions.",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if args.compare is not None:
+        if not args.compare.exists():
+            print(f"Baseline not found: {args.compare}", file=sys.stderr)
+            return 2
+        args.baseline = args.compare
+    suites = args.suite or list(SUITES)
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+
+    results: Dict[str, dict] = {}
+    if "catalog" in suites:
+        results.update(bench_catalog(sizes, args.repeat, args.seed))
+    if "preview" in suites:
+        results.update(bench_preview(args.repeat, args.latency, args.seed))
+    if "vision" in suites:
+        results.update(bench_preprocess(args.repeat, args.seed))
+        results.update(bench_vision(args.repeat))
+    if "startup" in suites:
+        # Each run is a fresh interpreter, so a handful of runs is plenty.
+        results.update(bench_startup(min(args.repeat, 5)))
+
+    report = {"metadata": _metadata(), "results": results}
+    comparison: Dict[str, dict] = {}
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    elif args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        comparison = compare_results(
+            results, baseline.get("results", {}), args.tolerance, args.min_delta_ms
+        )
+        report["baseline"] = {"path": str(args.baseline), **baseline.get("metadata", {})}
+        report["comparison"] = comparison
+    else:
+        print(f"No baseline at {args.baseline}; nothing compared.", file=sys.stderr)
+
+    rendered = json.dumps(report, indent=2) + "\n"
+    if args.output:
+        args.output.write_text(rendered, encoding="utf-8")
+    else:
+        sys.stdout.write(rendered)
+    _print_summary(results, comparison)
+
+    regressed = [name for name, item in comparison.items() if item["status"] == "regressed"]
+    if regressed:
+        print(f"Regressed: {', '.join(regressed)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,169 @@
+"""Local stand-ins for the iTunes and Deezer search APIs.
+
+Responses mimic the fields ``lookup_preview_url`` reads, with optional injected
+latency and error rate so benchmarks and load tests can exercise slow or flaky
+upstreams without the network. Run standalone and point the backend at it::
+
+    python backend/benchmarks/stub_upstreams.py --port 8099 --latency 0.08 --error-rate 0.05
+    ITUNES_SEARCH_URL=http://127.0.0.1:8099/itunes/search \
+    DEEZER_SEARCH_URL=http://127.0.0.1:8099/deezer/search python backend/app.py
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def _itunes_payload(term: str) -> dict:
+    return {
+        "resultCount": 1,
+        "results": [
+            {
+                "trackName": term,
+                "artistName": "",
+                "previewUrl": f"https://stub.previews/itunes/{abs(hash(term))}.m4a",
+            }
+        ],
+    }
+
+
+def _deezer_payload(query: str) -> dict:
+    return {
+        "data": [
+            {
+                "title": query,
+                "artist": {"name": ""},
+                "preview": f"https://stub.previews/deezer/{abs(hash(query))}.mp3",
+            }
+        ]
+    }
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without this, Nagle's algorithm
+    # plus delayed ACKs add ~40 ms to every keep-alive response.
+    disable_nagle_algorithm = True
+
+    def log_message(self, *_args):
+        pass
+
+    def _send_json(self, payload: dict, status: int = 200) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        stub: UpstreamStub = self.server.stub
+        parsed = urlparse(self.path)
+        query = parse_qs(parsed.query)
+        stub.record(parsed.path)
+        if stub.latency:
+            time.sleep(stub.latency)
+
+        if stub.should_fail():
+            self._send_json({"error": "injected failure"}, status=503)
+        elif parsed.path == "/itunes/search":
+            self._send_json(_itunes_payload(query.get("term", [""])[0]))
+        elif parsed.path == "/deezer/search":
+            self._send_json(_deezer_payload(query.get("q", [""])[0]))
+        else:
+            self._send_json({"error": "not found"}, status=404)
+
+
+class UpstreamStub:
+    """Serve the stub APIs on a background thread; usable as a context manager."""
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        seed: int | None = None,
+    ):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.requests: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+        self._server = ThreadingHTTPServer((host, port), _StubHandler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def itunes_url(self) -> str:
+        return f"{self.base_url}/itunes/search"
+
+    @property
+    def deezer_url(self) -> str:
+        return f"{self.base_url}/deezer/search"
+
+    def record(self, path: str) -> None:
+        with self._lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+
+    def should_fail(self) -> bool:
+        if not self.error_rate:
+            return False
+        with self._lock:
+            return self._random.random() < self.error_rate
+
+    def start(self) -> "UpstreamStub":
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        """Serve on the calling thread until interrupted."""
+        try:
+            self._server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._server.server_close()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "UpstreamStub":
+        return self.start()
+
+    def __exit__(self, *_exc) -> None:
+        self.stop()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Serve iTunes/Deezer search stand-ins.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added per response.")
+    parser.add_argument(
+        "--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503."
+    )
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args(argv)
+
+    stub = UpstreamStub(args.latency, args.error_rate, args.host, args.port, args.seed)
+    print(f"iTunes stub: {stub.itunes_url}")
+    print(f"Deezer stub: {stub.deezer_url}")
+    stub.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
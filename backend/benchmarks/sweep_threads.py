@@ -0,0 +1,234 @@
+"""Find the CPU thread settings that give the best camera throughput on this machine.
+
+Usage::
+
+    python backend/benchmarks/sweep_threads.py                  # full analyze_image
+    python backend/benchmarks/sweep_threads.py --stage detect   # face detection only
+    python backend/benchmarks/sweep_threads.py --workers 1,2,4 --opencv-threads 1,2,4 \\
+        --tf-threads 1,auto --request-threads 1,4 --duration 10
+
+Each configuration starts ``workers`` processes at once, as a pre-forking server
+would, with ``OPENCV_NUM_THREADS``/``TF_INTRA_OP_THREADS`` set, and every process
+runs ``request-threads`` threads that analyze the images in ``backend/pics`` in a
+loop for ``--duration`` seconds. ``auto`` is what ``thread_budget`` derives for
+that worker count. The table is sorted by throughput; the configuration the
+server would pick by default is marked so it can be compared with the best one,
+whose settings can then be pinned through the environment.
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, List, Set, Tuple
+
+BENCH_DIR = Path(__file__).resolve().parent
+BACKEND_DIR = BENCH_DIR.parent
+for path in (BACKEND_DIR, BENCH_DIR):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+from run_benchmarks import IMAGE_SUFFIXES, percentile  # noqa: E402
+from thread_budget import available_cpus, thread_budget  # noqa: E402
+
+Config = Tuple[int, int, int, int]  # workers, opencv, tf_intra_op, request threads
+
+# One worker process: warm up, report ready, wait for "go" on stdin, then run
+# ``threads`` analysis loops until the deadline and print the latencies.
+_WORKER_SCRIPT = """
+import json, sys, threading, time
+sys.path.insert(0, {backend!r})
+import image_processing
+image_processing.configure_threads()
+images = {images!r}
+if {stage!r} == "detect":
+    cascade = image_processing._get_face_cascade()
+    cv2 = image_processing.cv2
+    frames = [cv2.imread(path) for path in images]
+    def analyze(index):
+        gray = cv2.cvtColor(frames[index % len(frames)], cv2.COLOR_BGR2GRAY)
+        cascade.detectMultiScale(gray, scaleFactor=1.3, minNeighbors=5, minSize=(30, 30))
+else:
+    image_processing.warm_up()
+    def analyze(index):
+        try:
+            image_processing.analyze_image(images[index % len(images)])
+        except image_processing.NoFaceDetectedError:
+            pass
+analyze(0)
+print("ready", flush=True)
+sys.stdin.readline()
+deadline = time.perf_counter() + {duration!r}
+latencies = []
+def loop(offset):
+    index = offset
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        analyze(index)
+        latencies.append((time.perf_counter() - started) * 1000)
+        index += {threads!r}
+workers = [threading.Thread(target=loop, args=(offset,)) for offset in range({threads!r})]
+for worker in workers:
+    worker.start()
+for worker in workers:
+    worker.join()
+print(json.dumps(latencies))
+"""
+
+
+def parse_counts(value: str) -> List[str]:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def expand(value: str, auto: int) -> List[int]:
+    return sorted({auto if item == "auto" else int(item) for item in parse_counts(value)})
+
+
+def configurations(
+    workers: str, opencv: str, tf_threads: str, request_threads: str, cores: int
+) -> List[Config]:
+    configs = []
+    for worker_count in expand(workers, cores):
+        budget = thread_budget(worker_count, cpu_count=cores, env={})
+        configs.extend(
+            itertools.product(
+                [worker_count],
+                expand(opencv, budget.opencv),
+                expand(tf_threads, budget.tf_intra_op),
+                expand(request_threads, budget.request_threads),
+            )
+        )
+    return configs
+
+
+def default_config(workers: int, cores: int, stage: str = "full") -> Config:
+    """The settings ``thread_budget`` picks for ``workers`` workers with no overrides."""
+    budget = thread_budget(workers, cpu_count=cores, env={})
+    tf_intra_op = budget.tf_intra_op if stage == "full" else 1
+    return workers, budget.opencv, tf_intra_op, budget.request_threads
+
+
+def run_config(config: Config, images: List[str], stage: str, duration: float) -> Dict[str, float]:
+    workers, opencv, tf_intra_op, threads = config
+    env = dict(
+        os.environ,
+        WEB_CONCURRENCY=str(workers),
+        OPENCV_NUM_THREADS=str(opencv),
+        TF_INTRA_OP_THREADS=str(tf_intra_op),
+        OMP_NUM_THREADS=str(tf_intra_op),
+        WEB_THREADS=str(threads),
+    )
+    script = _WORKER_SCRIPT.format(
+        backend=str(BACKEND_DIR), images=images, stage=stage, duration=duration, threads=threads
+    )
+    processes = [
+        subprocess.Popen(
+            [sys.executable, "-c", script],
+            cwd=BACKEND_DIR,
+            env=env,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+        for _ in range(workers)
+    ]
+    try:
+        for process in processes:
+            if process.stdout.readline().strip() != "ready":
+                raise RuntimeError(process.communicate()[1].strip().splitlines()[-1])
+        for process in processes:
+            process.stdin.write("go\n")
+            process.stdin.flush()
+        latencies: List[float] = []
+        for process in processes:
+            stdout, stderr = process.communicate(timeout=duration + 60)
+            if process.returncode != 0:
+                raise RuntimeError(stderr.strip().splitlines()[-1])
+            latencies.extend(json.loads(stdout.strip().splitlines()[-1]))
+    finally:
+        for process in processes:
+            if process.poll() is None:
+                process.kill()
+
+    latencies.sort()
+    return {
+        "frames_per_sec": round(len(latencies) / duration, 2),
+        "p50_ms": round(percentile(latencies, 0.50), 2) if latencies else None,
+        "p95_ms": round(percentile(latencies, 0.95), 2) if latencies else None,
+    }
+
+
+def render(rows: Iterable[Dict[str, object]], defaults: Set[Config]) -> str:
+    header = f"{'workers':>7} {'opencv':>6} {'tf':>4} {'threads':>7} {'frames/s':>9} "
+    header += f"{'p50 ms':>8} {'p95 ms':>8}"
+    lines = [header]
+    for row in rows:
+        config = tuple(row["config"])
+        marker = "  <- default" if config in defaults else ""
+        lines.append(
+            f"{config[0]:>7} {config[1]:>6} {config[2]:>4} {config[3]:>7} "
+            f"{row['frames_per_sec']:>9} {row['p50_ms']:>8} {row['p95_ms']:>8}{marker}"
+        )
+    return "\n".join(lines)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Sweep OpenCV/TensorFlow/request thread counts.")
+    parser.add_argument("--stage", choices=("full", "detect"), default="full")
+    parser.add_argument("--workers", default="1,auto", help="Worker counts (auto = CPU count).")
+    parser.add_argument("--opencv-threads", default="1,auto")
+    parser.add_argument("--tf-threads", default="1,auto", help="TensorFlow intra-op threads.")
+    parser.add_argument("--request-threads", default="1,auto")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds per configuration.")
+    parser.add_argument("--output", help="Also write the results as JSON here.")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    cores = available_cpus()
+    images = sorted(
+        str(path) for path in (BACKEND_DIR / "pics").iterdir() if path.suffix in IMAGE_SUFFIXES
+    )
+    if not images:
+        print("No images in backend/pics to analyze", file=sys.stderr)
+        return 1
+
+    configs = configurations(
+        args.workers, args.opencv_threads, args.tf_threads, args.request_threads, cores
+    )
+    if args.stage == "detect":
+        # TensorFlow is not used, so its thread count cannot matter.
+        configs = sorted({(w, cv, 1, t) for w, cv, _, t in configs})
+    rows = []
+    for config in configs:
+        workers, opencv, tf_intra_op, threads = config
+        print(
+            f"workers={workers} opencv={opencv} tf={tf_intra_op} threads={threads}",
+            file=sys.stderr,
+        )
+        result = run_config(config, images, args.stage, args.duration)
+        rows.append({"config": list(config), **result})
+    rows.sort(key=lambda row: row["frames_per_sec"], reverse=True)
+
+    defaults = {default_config(config[0], cores, args.stage) for config in configs}
+    print(render(rows, defaults))
+    if args.output:
+        report = {
+            "cores": cores,
+            "stage": args.stage,
+            "defaults": sorted(list(config) for config in defaults),
+            "results": rows,
+        }
+        Path(args.output).write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
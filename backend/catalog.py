@@ -0,0 +1,60 @@
+"""In-memory layout of the song catalog served by ``/api/songs``.
+
+``prepare_catalog`` normalizes a frame once at load so requests only compare
+integers: ``mood_key`` is the lower-cased mood as a categorical (filtering is a
+comparison of its int8 codes) and ``is_playlist`` flags rows imported from a
+playlist. Low-cardinality text (mood, source, artist, album) is stored as
+categoricals, so each distinct string is held once instead of once per row.
+"""
+
+import numpy as np
+import pandas as pd
+
+CATEGORICAL_COLUMNS = ("mood", "source", "artist", "album")
+PLAYLIST_SOURCE_PREFIX = "playlist:"
+
+
+def _as_category(series):
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series
+    return series.astype("category")
+
+
+def prepare_catalog(frame):
+    """Return a copy of ``frame`` with compact dtypes and the derived filter columns.
+
+    Safe to call on an already prepared frame; the derived columns are rebuilt
+    from ``mood`` and ``source``.
+    """
+    frame = frame.copy()
+    if "mood" not in frame.columns:
+        frame["mood"] = None
+    if "source" not in frame.columns:
+        frame["source"] = None
+
+    moods = frame["mood"].astype(object).where(frame["mood"].notna(), "")
+    frame["mood_key"] = moods.astype(str).str.strip().str.lower().astype("category")
+
+    sources = frame["source"].astype(object).where(frame["source"].notna(), "")
+    frame["is_playlist"] = (
+        sources.astype(str).str.lower().str.startswith(PLAYLIST_SOURCE_PREFIX).to_numpy(bool)
+    )
+
+    for column in CATEGORICAL_COLUMNS:
+        if column in frame.columns:
+            frame[column] = _as_category(frame[column])
+    return frame
+
+
+def is_prepared(frame):
+    return "mood_key" in frame.columns and "is_playlist" in frame.columns
+
+
+def mood_mask(frame, mood_key):
+    """Boolean array selecting rows whose normalized mood equals ``mood_key``."""
+    moods = frame["mood_key"]
+    try:
+        code = moods.cat.categories.get_loc(mood_key)
+    except KeyError:
+        return np.zeros(len(frame), dtype=bool)
+    return moods.cat.codes.to_numpy() == code
@@ -0,0 +1,341 @@
+"""Incremental storage for the song catalog.
+
+The catalog is a base CSV (``data_moods.csv``) plus an append-only delta log
+(``data_moods.delta.jsonl``) of upserted rows, one JSON object per line. Imports
+only append the rows that actually changed; compaction folds the log back into
+the CSV with an atomic replace. Readers load base + log once and then apply only
+the log lines appended since their last read.
+
+The writer also keeps ``data_moods.index.json``, a digest of every row's values
+keyed by id, so an import can tell unchanged and new rows apart without reading
+the catalog. The index is rebuilt from base + log whenever either changed
+behind its back.
+
+There is a single writer (the importer); readers never write.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+
+import pandas as pd
+
+COMPACT_THRESHOLD_ROWS = 5000
+
+
+def delta_path_for(csv_path):
+    csv_path = Path(csv_path)
+    return csv_path.with_name(f"{csv_path.stem}.delta.jsonl")
+
+
+def _json_value(value):
+    try:
+        if pd.isna(value):
+            return None
+    except (TypeError, ValueError):
+        pass
+    if hasattr(value, "item"):
+        return value.item()
+    return value
+
+
+def index_path_for(csv_path):
+    csv_path = Path(csv_path)
+    return csv_path.with_name(f"{csv_path.stem}.index.json")
+
+
+def _comparable(value):
+    value = _json_value(value)
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, (int, float)):
+        return float(value)
+    return str(value)
+
+
+def read_delta(delta_path, offset=0):
+    """Return ``(rows, new_offset)`` for complete lines written after ``offset``."""
+    try:
+        with open(delta_path, "rb") as handle:
+            handle.seek(offset)
+            data = handle.read()
+    except FileNotFoundError:
+        return [], 0
+
+    end = data.rfind(b"\n") + 1
+    rows = []
+    for line in data[:end].splitlines():
+        if not line.strip():
+            continue
+        try:
+            rows.append(json.loads(line))
+        except ValueError:
+            continue  # A line torn by a crash mid-write; append_delta terminated it.
+    return rows, offset + end
+
+
+def apply_rows(frame, rows):
+    """Upsert ``rows`` into ``frame`` by ``id`` and return the resulting frame.
+
+    Existing rows keep their position; only non-null incoming values overwrite
+    stored ones. Unknown ids are appended in order.
+    """
+    if not rows:
+        return frame
+
+    incoming = pd.DataFrame(rows)
+    incoming["id"] = incoming["id"].astype(str)
+    incoming = incoming.drop_duplicates("id", keep="last")
+    frame = frame.copy()
+    for column in incoming.columns:
+        if column not in frame.columns:
+            frame[column] = pd.Series([None] * len(frame), dtype=object, index=frame.index)
+
+    id_index = pd.Index(frame["id"].astype(str))
+    positions = id_index.get_indexer(incoming["id"])
+    existing = positions >= 0
+
+    if existing.any():
+        updates = incoming[existing]
+        update_positions = positions[existing]
+        for column in updates.columns:
+            if column == "id":
+                continue
+            values = updates[column]
+            present = values.notna().to_numpy()
+            if not present.any():
+                continue
+            if values.dtype != frame[column].dtype:
+                frame[column] = frame[column].astype(object)
+            frame.iloc[update_positions[present], frame.columns.get_loc(column)] = (
+                values[present].to_numpy()
+            )
+
+    new_rows = incoming[~existing]
+    if not new_rows.empty:
+        frame = pd.concat([frame, new_rows], ignore_index=True)
+    return frame
+
+
+def load_catalog(csv_path):
+    """Return ``(frame, delta_offset)`` for the base CSV with the delta log applied."""
+    frame = pd.read_csv(csv_path)
+    rows, offset = read_delta(delta_path_for(csv_path))
+    return apply_rows(frame, rows), offset
+
+
+def _row_digest(row):
+    """Digest of a row's non-null values; equal digests mean upserting it changes nothing."""
+    values = sorted(
+        (str(column), _comparable(value))
+        for column, value in row.items()
+        if _json_value(value) is not None
+    )
+    return hashlib.sha1(json.dumps(values).encode("utf-8")).hexdigest()
+
+
+def _files_signature(csv_path):
+    stat = Path(csv_path).stat()
+    try:
+        delta_size = delta_path_for(csv_path).stat().st_size
+    except FileNotFoundError:
+        delta_size = 0
+    return [stat.st_mtime_ns, stat.st_size, delta_size]
+
+
+def _save_index(csv_path, digests):
+    index_path = index_path_for(csv_path)
+    handle = NamedTemporaryFile(
+        "w", delete=False, dir=index_path.parent, prefix=f".{index_path.name}.", suffix=".tmp"
+    )
+    temp_path = Path(handle.name)
+    try:
+        with handle:
+            json.dump({"signature": _files_signature(csv_path), "digests": digests}, handle)
+        os.replace(temp_path, index_path)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+
+
+def _frame_digests(frame):
+    return {
+        str(record["id"]): _row_digest(record) for record in frame.to_dict(orient="records")
+    }
+
+
+def _load_index(csv_path):
+    """Return ``(digests, frame)``; ``frame`` is None unless the index had to be rebuilt."""
+    try:
+        index = json.loads(index_path_for(csv_path).read_text(encoding="utf-8"))
+        if index["signature"] == _files_signature(csv_path):
+            return index["digests"], None
+    except (FileNotFoundError, ValueError, KeyError, TypeError):
+        pass
+    frame, _ = load_catalog(csv_path)
+    return _frame_digests(frame), frame
+
+
+def _changed_rows(frame, rows):
+    by_id = {str(record["id"]): record for record in frame.to_dict(orient="records")}
+    changed = []
+    for row in rows:
+        current = by_id.get(str(row.get("id")))
+        if current is None:
+            changed.append(row)
+            continue
+        for column, value in row.items():
+            if _json_value(value) is None:
+                continue
+            if _comparable(value) != _comparable(current.get(column)):
+                changed.append(row)
+                break
+    return changed
+
+
+def append_delta(csv_path, rows):
+    if not rows:
+        return
+    lines = "".join(
+        json.dumps({key: _json_value(value) for key, value in row.items()}) + "\n"
+        for row in rows
+    )
+    with open(delta_path_for(csv_path), "a+b") as handle:
+        if handle.tell():
+            handle.seek(-1, os.SEEK_END)
+            if handle.read(1) != b"\n":
+                lines = "\n" + lines  # End a line torn by an interrupted write.
+        handle.write(lines.encode("utf-8"))
+        handle.flush()
+        os.fsync(handle.fileno())
+
+
+def write_csv_atomic(frame, csv_path):
+    """Write ``frame`` next to ``csv_path`` and rename it over the original."""
+    csv_path = Path(csv_path)
+    handle = NamedTemporaryFile(
+        "w", delete=False, dir=csv_path.parent, prefix=f".{csv_path.name}.", suffix=".tmp"
+    )
+    temp_path = Path(handle.name)
+    try:
+        with handle:
+            frame.to_csv(handle, index=False)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temp_path, csv_path)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+
+
+def compact(csv_path):
+    """Fold the delta log into the base CSV atomically and remove the log."""
+    frame, _ = load_catalog(csv_path)
+    write_csv_atomic(frame, csv_path)
+    delta_path_for(csv_path).unlink(missing_ok=True)
+    _save_index(csv_path, _frame_digests(frame))
+    return len(frame)
+
+
+def delta_row_count(csv_path):
+    try:
+        with open(delta_path_for(csv_path), "rb") as handle:
+            return sum(1 for line in handle if line.strip())
+    except FileNotFoundError:
+        return 0
+
+
+def upsert_rows(csv_path, rows, compact_threshold=COMPACT_THRESHOLD_ROWS):
+    """Append new or changed ``rows`` to the delta log; compact when it grows large.
+
+    Rows whose digest matches the index are unchanged and new ids need no
+    comparison, so the catalog is only read when an existing row may differ.
+    """
+    digests, frame = _load_index(csv_path)
+    existing_ids = set(digests)
+    incoming_ids = {str(row.get("id")) for row in rows}
+    candidates = [row for row in rows if digests.get(str(row.get("id"))) != _row_digest(row)]
+    stored = pd.DataFrame({"id": pd.Series([], dtype=object)})
+    if any(str(row.get("id")) in existing_ids for row in candidates):
+        if frame is None:
+            frame, _ = load_catalog(csv_path)
+        changed = _changed_rows(frame, candidates)
+        stored = frame[frame["id"].astype(str).isin({str(row["id"]) for row in changed})]
+    else:
+        changed = candidates
+    changed_ids = {str(row.get("id")) for row in changed}
+
+    append_delta(csv_path, changed)
+    compacted = False
+    if changed and delta_row_count(csv_path) >= compact_threshold:
+        compact(csv_path)
+        compacted = True
+    else:
+        digests.update(_frame_digests(apply_rows(stored, changed)))
+        _save_index(csv_path, digests)
+
+    return {
+        "incoming": len(rows),
+        "new": len(changed_ids - existing_ids),
+        "updated": len(changed_ids & existing_ids),
+        "unchanged": len((incoming_ids & existing_ids) - changed_ids),
+        "total": len(existing_ids | incoming_ids),
+        "compacted": compacted,
+    }
+
+
+class CatalogReader:
+    """Keep an in-memory catalog in sync with the base CSV and its delta log.
+
+    ``refresh`` costs two ``stat`` calls when nothing changed, reads only the
+    appended tail of the log when rows were upserted, and reloads everything
+    when the base CSV was replaced by a compaction.
+    """
+
+    def __init__(self, csv_path, refresh_interval=5.0, clock=time.monotonic):
+        self.csv_path = Path(csv_path)
+        self.delta_path = delta_path_for(self.csv_path)
+        self.refresh_interval = refresh_interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._base_signature = None
+        self._offset = 0
+        self._checked_at = 0.0
+
+    def _signature(self):
+        stat = self.csv_path.stat()
+        return stat.st_mtime_ns, stat.st_size
+
+    def load(self):
+        self._base_signature = self._signature()
+        frame, self._offset = load_catalog(self.csv_path)
+        self._checked_at = self._clock()
+        return frame
+
+    def refresh(self, frame):
+        """Return an updated frame, or None when ``frame`` is still current."""
+        now = self._clock()
+        if now - self._checked_at < self.refresh_interval:
+            return None
+        if not self._lock.acquire(blocking=False):
+            return None
+        try:
+            self._checked_at = now
+            base_signature = self._signature()
+            try:
+                delta_size = self.delta_path.stat().st_size
+            except FileNotFoundError:
+                delta_size = 0
+
+            if base_signature != self._base_signature or delta_size < self._offset:
+                return self.load()
+            if delta_size == self._offset:
+                return None
+            rows, self._offset = read_delta(self.delta_path, self._offset)
+            return apply_rows(frame, rows)
+        finally:
+            self._lock.release()
@@ -1,21 +1,91 @@
+import os
+import threading
 from pathlib import Path
 
-try:
-    import cv2
-except ImportError:  # pragma: no cover - dependency may be absent in CI/test envs.
-    cv2 = None
+from metrics import INFERENCE_BATCH_SIZE, STAGE_LATENCY
+from thread_budget import thread_budget
 
 try:
     import numpy as np
 except ImportError:  # pragma: no cover - dependency may be absent in CI/test envs.
     np = None
 
-try:
-    from tensorflow.keras.models import load_model
-    from tensorflow.keras.preprocessing.image import img_to_array
-except ImportError:  # pragma: no cover - dependency may be absent in CI/test envs.
-    load_model = None
-    img_to_array = None
+# OpenCV and TensorFlow take seconds and hundreds of MB to import, so they are
+# loaded when a camera endpoint first needs them (or on warm_up()). Workers that
+# only serve the catalog never import them, and TensorFlow Lite models never
+# import Keras.
+cv2 = None
+load_model = None
+_vision_lock = threading.Lock()
+_vision_imported = False
+THREAD_BUDGET = None
+
+
+def configure_threads(budget=None):
+    """Set this process's OpenCV/TensorFlow thread counts (default: ``thread_budget()``).
+
+    Call it before the first camera request; TensorFlow only honours its
+    settings if they are applied before it starts running ops.
+    """
+    global THREAD_BUDGET
+    THREAD_BUDGET = budget or thread_budget()
+    if cv2 is not None:
+        cv2.setNumThreads(THREAD_BUDGET.opencv)
+    return THREAD_BUDGET
+
+
+def _thread_budget():
+    return THREAD_BUDGET or configure_threads()
+
+
+def _import_vision_stack():
+    global cv2, _vision_imported
+
+    if _vision_imported:
+        return
+    with _vision_lock:
+        if _vision_imported:
+            return
+        if cv2 is None:
+            try:
+                import cv2 as cv2_module
+            except ImportError:  # pragma: no cover - dependency may be absent in CI/test envs.
+                cv2_module = None
+            cv2 = cv2_module
+            if cv2 is not None:
+                cv2.setNumThreads(_thread_budget().opencv)
+        _vision_imported = True
+
+
+def _import_keras():
+    global load_model
+
+    if load_model is None:
+        budget = _thread_budget()
+        # oneDNN kernels size their OpenMP pool from this when TensorFlow loads.
+        os.environ.setdefault("OMP_NUM_THREADS", str(budget.tf_intra_op))
+        try:
+            import tensorflow as tf
+            from tensorflow.keras.models import load_model as keras_load_model
+        except ImportError:  # pragma: no cover - dependency may be absent in CI/test envs.
+            return
+        try:
+            tf.config.threading.set_intra_op_parallelism_threads(budget.tf_intra_op)
+            tf.config.threading.set_inter_op_parallelism_threads(budget.tf_inter_op)
+        except RuntimeError:
+            pass  # TensorFlow was already initialized elsewhere in this process.
+        load_model = keras_load_model
+
+
+def _tflite_interpreter_class():
+    try:
+        from tflite_runtime.interpreter import Interpreter
+    except ImportError:
+        try:
+            from tensorflow.lite import Interpreter
+        except ImportError:  # pragma: no cover - dependency may be absent in CI/test envs.
+            return None
+    return Interpreter
 
 
 class EmotionDetectionError(Exception):
@@ -28,8 +98,25 @@ class NoFaceDetectedError(EmotionDetectionError):
 
 BASE_DIR = Path(__file__).resolve().parent
 FACE_CASCADE_PATH = BASE_DIR / "haarcascade_files" / "haarcascade_frontalface_default.xml"
-MODEL_PATH = BASE_DIR / "models" / "_mini_XCEPTION.102-0.66.hdf5"
+MODELS_DIR = BASE_DIR / "models"
+DEFAULT_MODEL_PATH = MODELS_DIR / "_mini_XCEPTION.102-0.66.hdf5"
 EMOTIONS = ["angry", "disgust", "scared", "happy", "sad", "surprised", "neutral"]
+MODEL_INPUT_SIZE = 64
+
+
+def resolve_model_path(value=None):
+    """Return the emotion model path; ``value`` may be a path or a file in ``models/``."""
+    if not value:
+        return DEFAULT_MODEL_PATH
+    path = Path(value)
+    if not path.is_absolute() and not path.exists():
+        path = MODELS_DIR / path
+    return path
+
+
+# EMOTION_MODEL selects another model file, e.g. a quantized ``.tflite`` variant
+# produced by scripts/quantize_emotion_model.py.
+MODEL_PATH = resolve_model_path(os.getenv("EMOTION_MODEL"))
 
 face_cascade = None
 emotion_model = None
@@ -38,6 +125,7 @@ emotion_model = None
 def _get_face_cascade():
     global face_cascade
 
+    _import_vision_stack()
     if cv2 is None or np is None:
         raise EmotionDetectionError(
             "OpenCV and NumPy are required for camera analysis. Install requirements.txt."
@@ -53,51 +141,196 @@ def _get_face_cascade():
     return face_cascade
 
 
-def _get_emotion_model():
-    global emotion_model
+def _quantize(values, detail):
+    dtype = detail["dtype"]
+    if np.issubdtype(dtype, np.floating):
+        return values.astype(dtype, copy=False)
+    scale, zero_point = detail["quantization"]
+    limits = np.iinfo(dtype)
+    quantized = np.round(values / scale + zero_point)
+    return np.clip(quantized, limits.min, limits.max).astype(dtype)
 
-    if load_model is None or img_to_array is None:
-        raise EmotionDetectionError(
-            "TensorFlow is not installed. Install dependencies from requirements.txt."
-        )
 
-    if emotion_model is None:
+def _dequantize(values, detail):
+    if np.issubdtype(values.dtype, np.floating):
+        return values
+    scale, zero_point = detail["quantization"]
+    return (values.astype(np.float32) - zero_point) * scale
+
+
+class TFLiteEmotionModel:
+    """Run a TensorFlow Lite emotion model behind the Keras ``predict`` interface.
+
+    Interpreters are not thread-safe, so each thread gets its own. Integer
+    input/output tensors are quantized and dequantized here, so callers always
+    pass and receive float32 arrays.
+    """
+
+    def __init__(self, path, interpreter_class=None):
+        self.path = str(path)
+        self._interpreter_class = interpreter_class or _tflite_interpreter_class()
+        if self._interpreter_class is None:
+            raise EmotionDetectionError(
+                "TensorFlow Lite is not installed. Install tflite-runtime or tensorflow."
+            )
+        self._local = threading.local()
+        self._interpreter()
+
+    def _interpreter(self):
+        state = getattr(self._local, "state", None)
+        if state is None:
+            interpreter = self._interpreter_class(
+                model_path=self.path, num_threads=_thread_budget().tf_intra_op
+            )
+            interpreter.allocate_tensors()
+            state = self._local.state = {"interpreter": interpreter, "batch_size": None}
+        return state
+
+    def predict(self, batch, verbose=0):
+        state = self._interpreter()
+        interpreter = state["interpreter"]
+        input_detail = interpreter.get_input_details()[0]
+        if state["batch_size"] != len(batch):
+            interpreter.resize_tensor_input(input_detail["index"], list(batch.shape))
+            interpreter.allocate_tensors()
+            state["batch_size"] = len(batch)
+            input_detail = interpreter.get_input_details()[0]
+        output_detail = interpreter.get_output_details()[0]
+
+        interpreter.set_tensor(input_detail["index"], _quantize(batch, input_detail))
+        interpreter.invoke()
+        return _dequantize(interpreter.get_tensor(output_detail["index"]), output_detail)
+
+
+def load_emotion_model(path):
+    """Load a Keras (``.hdf5``/``.keras``) or TensorFlow Lite (``.tflite``) emotion model."""
+    path = Path(path)
+    if path.suffix == ".tflite":
         try:
-            # This model is used only for inference; avoid compiling legacy optimizer config.
-            emotion_model = load_model(str(MODEL_PATH), compile=False)
+            return TFLiteEmotionModel(path)
+        except EmotionDetectionError:
+            raise
         except Exception as exc:
             raise EmotionDetectionError(f"Failed to load emotion model: {exc}") from exc
 
+    _import_keras()
+    if load_model is None:
+        raise EmotionDetectionError(
+            "TensorFlow is not installed. Install dependencies from requirements.txt."
+        )
+    try:
+        # This model is used only for inference; avoid compiling legacy optimizer config.
+        return load_model(str(path), compile=False)
+    except Exception as exc:
+        raise EmotionDetectionError(f"Failed to load emotion model: {exc}") from exc
+
+
+def _get_emotion_model():
+    global emotion_model
+
+    if emotion_model is None:
+        emotion_model = load_emotion_model(MODEL_PATH)
     return emotion_model
 
 
+_buffers = threading.local()
+
+
+def _thread_buffers():
+    """Per-thread scratch arrays reused across frames instead of reallocated."""
+    buffers = getattr(_buffers, "value", None)
+    if buffers is None:
+        size = MODEL_INPUT_SIZE
+        buffers = _buffers.value = {
+            "gray": None,
+            "resized": np.empty((size, size), dtype=np.uint8),
+            "batch": np.empty((1, size, size, 1), dtype=np.float32),
+        }
+    return buffers
+
+
+def to_grayscale(image):
+    """Convert a BGR frame into this thread's grayscale buffer, reusing it when shapes match."""
+    buffers = _thread_buffers()
+    gray = buffers["gray"]
+    if gray is None or gray.shape != image.shape[:2]:
+        gray = buffers["gray"] = np.empty(image.shape[:2], dtype=np.uint8)
+    cv2.cvtColor(image, cv2.COLOR_BGR2GRAY, dst=gray)
+    return gray
+
+
+def preprocess_face(roi):
+    """Scale a grayscale face crop into this thread's ``(1, 64, 64, 1)`` model input.
+
+    The crop is resized into a reused uint8 buffer and normalized straight into the
+    float32 batch buffer, so no per-frame arrays are allocated. The returned batch is
+    overwritten by the next call on the same thread.
+    """
+    buffers = _thread_buffers()
+    resized, batch = buffers["resized"], buffers["batch"]
+    cv2.resize(roi, (MODEL_INPUT_SIZE, MODEL_INPUT_SIZE), dst=resized)
+    np.divide(resized, np.float32(255.0), out=batch[0, :, :, 0])
+    return batch
+
+
+def largest_face(faces):
+    """Pick the face box with the largest area (w * h)."""
+    return max(faces, key=lambda face: face[2] * face[3])
+
+
+def face_input(image_path, detect=True):
+    """Return ``(batch, box)`` for the largest face in an image file, or ``(None, None)``.
+
+    With ``detect=False`` the whole image is used as the face crop (for datasets of
+    pre-cropped faces). The batch is a copy, so it stays valid across calls. Raises
+    ``EmotionDetectionError`` when the file cannot be decoded.
+    """
+    cascade = _get_face_cascade()
+    image = cv2.imread(str(image_path))
+    if image is None:
+        raise EmotionDetectionError(f"Unable to load image: {image_path}")
+    gray = to_grayscale(image)
+    if detect:
+        faces = cascade.detectMultiScale(gray, scaleFactor=1.3, minNeighbors=5, minSize=(30, 30))
+        if len(faces) == 0:
+            return None, None
+        box = tuple(int(value) for value in largest_face(faces))
+    else:
+        box = (0, 0, gray.shape[1], gray.shape[0])
+    x, y, w, h = box
+    return preprocess_face(gray[y : y + h, x : x + w]).copy(), box
+
+
 def analyze_image(snapshot_path):
     """Return detailed emotion analysis for the most prominent detected face."""
     cascade = _get_face_cascade()
     model = _get_emotion_model()
 
-    image = cv2.imread(str(snapshot_path))
+    with STAGE_LATENCY.time(stage="image_read"):
+        image = cv2.imread(str(snapshot_path))
     if image is None:
         raise EmotionDetectionError("Unable to load the uploaded image.")
 
-    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-    faces = cascade.detectMultiScale(gray, scaleFactor=1.3, minNeighbors=5, minSize=(30, 30))
+    with STAGE_LATENCY.time(stage="face_detect"):
+        gray = to_grayscale(image)
+        faces = cascade.detectMultiScale(
+            gray, scaleFactor=1.3, minNeighbors=5, minSize=(30, 30)
+        )
 
     if len(faces) == 0:
         raise NoFaceDetectedError("No face detected in the uploaded image.")
 
-    # Choose the largest face by area (w * h).
-    fX, fY, fW, fH = max(faces, key=lambda face: face[2] * face[3])
+    fX, fY, fW, fH = largest_face(faces)
     roi = gray[fY : fY + fH, fX : fX + fW]
     if roi.size == 0:
         raise EmotionDetectionError("Detected face region is empty.")
 
-    roi = cv2.resize(roi, (64, 64))
-    roi = roi.astype("float32") / 255.0
-    roi = img_to_array(roi)
-    roi = np.expand_dims(roi, axis=0)
+    with STAGE_LATENCY.time(stage="preprocess"):
+        batch = preprocess_face(roi)
 
-    preds = model.predict(roi, verbose=0)[0]
+    INFERENCE_BATCH_SIZE.observe(len(batch))
+    with STAGE_LATENCY.time(stage="predict"):
+        preds = model.predict(batch, verbose=0)[0]
     emotion_index = int(np.argmax(preds))
     label = EMOTIONS[emotion_index]
     confidence = float(preds[emotion_index])
@@ -113,6 +346,18 @@ def analyze_image(snapshot_path):
     }
 
 
+def warm_up():
+    """Import the vision stack, load the cascade and model, and run one prediction.
+
+    Moves the first camera request's multi-second setup to startup. Raises
+    ``EmotionDetectionError`` when the dependencies or model files are missing.
+    """
+    _get_face_cascade()
+    model = _get_emotion_model()
+    with STAGE_LATENCY.time(stage="warm_up"):
+        model.predict(np.zeros((1, MODEL_INPUT_SIZE, MODEL_INPUT_SIZE, 1), "float32"), verbose=0)
+
+
 def process_image(snapshot_path):
     """Backward-compatible helper that returns only the predicted emotion label."""
     return analyze_image(snapshot_path)["label"]
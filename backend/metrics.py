@@ -0,0 +1,375 @@
+"""In-process metrics rendered in the Prometheus text exposition format.
+
+Under a pre-forking server every worker has its own values; ``SharedMetrics``
+merges them through snapshot files in a directory the workers share.
+"""
+
+import bisect
+import copy
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape_label_value(value):
+    return str(value).replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+def _format_labels(labelnames, labelvalues):
+    if not labelnames:
+        return ""
+    pairs = ",".join(
+        f'{name}="{_escape_label_value(value)}"' for name, value in zip(labelnames, labelvalues)
+    )
+    return "{" + pairs + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}"
+            )
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def snapshot(self):
+        """JSON-serializable copy of the values: ``[[labelvalues, value], ...]``."""
+        with self._lock:
+            return [[list(key), copy.deepcopy(value)] for key, value in self._values.items()]
+
+    def combine(self, current, value):
+        """Add one process's ``value`` for a label set to the merged ``current``."""
+        return value if current is None else current + value
+
+    def _with_values(self, values, labelnames=None):
+        metric = copy.copy(self)
+        metric._lock = threading.Lock()
+        metric._values = values
+        if labelnames is not None:
+            metric.labelnames = tuple(labelnames)
+        return metric
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for labelvalues, value in items:
+            yield self.name, self.labelnames, labelvalues, value
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        for name, labelnames, labelvalues, value in self.samples():
+            labels = _format_labels(labelnames, labelvalues)
+            lines.append(f"{name}{labels} {_format_value(value)}")
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+DEFAULT_LATENCY_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket (non-cumulative) counts, then sum and count.
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def value(self, **labels):
+        state = self._values.get(self._key(labels))
+        return state[2] if state else 0
+
+    def combine(self, current, value):
+        if current is None:
+            return copy.deepcopy(value)
+        counts = [mine + theirs for mine, theirs in zip(current[0], value[0])]
+        return [counts, current[1] + value[1], current[2] + value[2]]
+
+    def samples(self):
+        with self._lock:
+            items = [
+                (key, list(counts), total, count)
+                for key, (counts, total, count) in self._values.items()
+            ]
+        bucket_labelnames = self.labelnames + ("le",)
+        for labelvalues, counts, total, count in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                bucket_labels = labelvalues + (_format_value(bound),)
+                yield f"{self.name}_bucket", bucket_labelnames, bucket_labels, cumulative
+            yield f"{self.name}_sum", self.labelnames, labelvalues, total
+            yield f"{self.name}_count", self.labelnames, labelvalues, count
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric already registered: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_LATENCY_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def metrics(self):
+        with self._lock:
+            return list(self._metrics.values())
+
+    def clear(self):
+        """Drop every recorded value, e.g. the ones a forked worker inherited."""
+        for metric in self.metrics():
+            with metric._lock:
+                metric._values.clear()
+
+    def render(self):
+        return "\n".join(metric.render() for metric in self.metrics()) + "\n"
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class SharedMetrics:
+    """The metrics of every worker process, merged when scraped.
+
+    Each process writes a snapshot of ``registry`` to ``<directory>/<pid>.json``
+    every ``interval`` seconds once started, and a last one on ``close``.
+    ``render`` adds the other processes' latest snapshots to this process's
+    live values, so other workers' numbers lag by up to ``interval``. Counters
+    and histograms are summed and keep the counts of exited workers; gauges get
+    a ``pid`` label and are only reported for workers still running.
+    """
+
+    def __init__(self, directory, registry=None, interval=5.0, pid=None):
+        self.directory = Path(directory)
+        self.registry = REGISTRY if registry is None else registry
+        self.interval = interval
+        self.pid = pid or os.getpid()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _snapshot(self, include_gauges=True):
+        return {
+            metric.name: metric.snapshot()
+            for metric in self.registry.metrics()
+            if include_gauges or not isinstance(metric, Gauge)
+        }
+
+    def write(self, alive=True):
+        payload = {"pid": self.pid, "alive": alive, "metrics": self._snapshot(alive)}
+        temp_path = self.directory / f".{self.pid}.json.tmp"
+        temp_path.write_text(json.dumps(payload), encoding="utf-8")
+        os.replace(temp_path, self.directory / f"{self.pid}.json")
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.write()
+            except OSError:
+                pass  # The directory is gone while the server shuts down.
+
+    def close(self):
+        """Stop writing and leave a final snapshot without this process's gauges."""
+        self._stop.set()
+        try:
+            self.write(alive=False)
+        except OSError:
+            pass
+
+    def _sources(self):
+        yield self.pid, True, self._snapshot()
+        for path in sorted(self.directory.glob("*.json")):
+            try:
+                snapshot = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                continue  # Removed between glob and read.
+            if snapshot["pid"] != self.pid:
+                alive = snapshot["alive"] and _pid_alive(snapshot["pid"])
+                yield snapshot["pid"], alive, snapshot["metrics"]
+
+    def render(self):
+        sources = list(self._sources())
+        parts = []
+        for metric in self.registry.metrics():
+            is_gauge = isinstance(metric, Gauge)
+            merged = {}
+            for pid, alive, snapshot in sources:
+                for labelvalues, value in snapshot.get(metric.name, ()):
+                    if not is_gauge:
+                        key = tuple(labelvalues)
+                        merged[key] = metric.combine(merged.get(key), value)
+                    elif alive:
+                        merged[tuple(labelvalues) + (str(pid),)] = value
+            labelnames = metric.labelnames + ("pid",) if is_gauge else None
+            parts.append(metric._with_values(merged, labelnames).render())
+        return "\n".join(parts) + "\n"
+
+
+REGISTRY = Registry()
+
+PREVIEW_LOOKUPS = REGISTRY.counter(
+    "mood_music_preview_lookups_total",
+    "Preview lookups that went to the upstream providers.",
+    ["path"],
+)
+PREVIEW_LOOKUPS_COALESCED = REGISTRY.counter(
+    "mood_music_preview_lookups_coalesced_total",
+    "Preview lookups that waited on an identical in-flight lookup instead of calling upstream.",
+    ["path"],
+)
+UPSTREAM_CIRCUIT_STATE = REGISTRY.gauge(
+    "mood_music_upstream_circuit_state",
+    "Circuit breaker state per upstream provider (0=closed, 1=open, 2=half-open).",
+    ["provider"],
+)
+UPSTREAM_REJECTED = REGISTRY.counter(
+    "mood_music_upstream_rejected_total",
+    "Upstream calls skipped locally, by reason (rate_limited or circuit_open).",
+    ["provider", "reason"],
+)
+UPSTREAM_FAILURES = REGISTRY.counter(
+    "mood_music_upstream_failures_total",
+    "Upstream calls that failed with an error or timeout.",
+    ["provider"],
+)
+UPSTREAM_RATE_LIMIT_TOKENS = REGISTRY.gauge(
+    "mood_music_upstream_rate_limit_tokens",
+    "Tokens left in the per-provider rate limiter after the last acquire.",
+    ["provider"],
+)
+REQUEST_LATENCY = REGISTRY.histogram(
+    "mood_music_request_duration_seconds",
+    "HTTP request latency by endpoint.",
+    ["endpoint", "method", "status"],
+)
+STAGE_LATENCY = REGISTRY.histogram(
+    "mood_music_stage_duration_seconds",
+    "Latency of individual request-processing stages.",
+    ["stage"],
+)
+PREVIEW_CACHE_REQUESTS = REGISTRY.counter(
+    "mood_music_preview_cache_requests_total",
+    "Preview cache lookups by result (hit or miss).",
+    ["result"],
+)
+UPSTREAM_LATENCY = REGISTRY.histogram(
+    "mood_music_upstream_request_duration_seconds",
+    "Latency of upstream preview provider calls, by provider and outcome.",
+    ["provider", "outcome"],
+)
+PREVIEW_REVALIDATIONS = REGISTRY.counter(
+    "mood_music_preview_revalidations_total",
+    "Background checks of stored preview URLs, by result (alive, dead, unknown, replaced).",
+    ["result"],
+)
+INFERENCE_BATCH_SIZE = REGISTRY.histogram(
+    "mood_music_inference_batch_size",
+    "Number of faces passed to each emotion model call.",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128),
+)
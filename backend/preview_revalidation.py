@@ -0,0 +1,226 @@
+"""Background revalidation of stored preview URLs.
+
+Preview URLs from iTunes and Deezer are signed and expire, but once one is in
+the preview cache or the catalog it would be served forever. The revalidator
+counts how often each track's preview is served, periodically checks the most
+served ones (and a rolling slice of the rest of the catalog) with lightweight
+HEAD/range requests, and re-resolves dead ones, so request threads never have
+to discover a dead link themselves.
+"""
+
+import heapq
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from metrics import PREVIEW_REVALIDATIONS
+
+ALIVE = "alive"
+DEAD = "dead"
+UNKNOWN = "unknown"
+
+# Signed CDN URLs answer 403 once the signature expires; 404/410 once removed.
+DEAD_STATUS_CODES = {401, 403, 404, 410}
+
+
+def check_preview_url(session, url, timeout=5):
+    """Return ALIVE, DEAD or UNKNOWN for ``url`` without downloading the audio."""
+    try:
+        response = session.head(url, timeout=timeout, allow_redirects=True)
+        if response.status_code in (405, 501):
+            # HEAD not supported: ask for the first byte instead.
+            response = session.get(
+                url,
+                headers={"Range": "bytes=0-0"},
+                timeout=timeout,
+                allow_redirects=True,
+                stream=True,
+            )
+            response.close()
+    except requests.RequestException:
+        return UNKNOWN
+    if response.status_code < 400:
+        return ALIVE
+    if response.status_code in DEAD_STATUS_CODES:
+        return DEAD
+    return UNKNOWN
+
+
+class _TrackState:
+    __slots__ = ("name", "artist", "url", "served", "checked_at", "dead")
+
+    def __init__(self, name, artist, url):
+        self.name = name
+        self.artist = artist
+        self.url = url
+        self.served = 0
+        self.checked_at = None
+        self.dead = False
+
+
+class PreviewRevalidator:
+    """Check served preview URLs in priority order and replace the dead ones.
+
+    ``check(url)`` returns ALIVE, DEAD or UNKNOWN. ``resolve(name, artist)``
+    returns ``(preview_url, complete)`` like the request-path lookup.
+    ``replace(track_id, dead_url, preview_url)`` makes the app serve
+    ``preview_url`` (possibly None) instead of ``dead_url``. Each check first
+    takes a token from ``limiter``, waiting for one if the bucket is empty.
+
+    A pass checks up to ``batch_size`` URLs: served tracks whose last check is
+    older than ``max_age``, most served first, then whatever ``sweep(limit)``
+    yields as ``(track_id, name, artist, url)`` to cover unserved tracks.
+    """
+
+    def __init__(
+        self,
+        check,
+        resolve,
+        replace,
+        limiter,
+        batch_size=200,
+        max_age=6 * 3600,
+        concurrency=8,
+        max_tracked=20000,
+        clock=time.monotonic,
+    ):
+        self.check = check
+        self.resolve = resolve
+        self.replace = replace
+        self.limiter = limiter
+        self.batch_size = batch_size
+        self.max_age = max_age
+        self.concurrency = concurrency
+        self.max_tracked = max_tracked
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._tracks = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def record_served(self, track_id, name, artist, url):
+        """Count one serve of ``url`` for ``track_id``; cheap enough for the request path."""
+        with self._lock:
+            state = self._tracks.get(track_id)
+            if state is None:
+                if len(self._tracks) >= self.max_tracked:
+                    self._prune()
+                state = self._tracks[track_id] = _TrackState(name, artist, url)
+            elif state.url != url:
+                state.url, state.checked_at, state.dead = url, None, False
+            state.served += 1
+
+    def _prune(self):
+        # Keep the most served three quarters and halve their counts, so tracks that
+        # stopped being served age out and new ones can take their place.
+        keep = heapq.nlargest(
+            self.max_tracked * 3 // 4, self._tracks.items(), key=lambda item: item[1].served
+        )
+        for _, state in keep:
+            state.served //= 2
+        self._tracks = dict(keep)
+
+    def served_count(self, track_id):
+        state = self._tracks.get(track_id)
+        return state.served if state is not None else 0
+
+    def due(self, limit=None):
+        """Served tracks due for a check, most served first: ``[(track_id, state)]``."""
+        limit = self.batch_size if limit is None else limit
+        now = self._clock()
+        with self._lock:
+            candidates = [
+                (track_id, state)
+                for track_id, state in self._tracks.items()
+                if state.dead
+                or state.checked_at is None
+                or now - state.checked_at >= self.max_age
+            ]
+        return heapq.nlargest(limit, candidates, key=lambda item: item[1].served)
+
+    def _take_token(self):
+        while not self.limiter.try_acquire():
+            if self._stop.wait(1 / max(self.limiter.rate, 0.001)):
+                return False
+        return True
+
+    def _revalidate(self, track_id, name, artist, url, known_dead=False):
+        """Return ``(check result, url to serve now)``; the url is None if there is none."""
+        if not known_dead:
+            if not self._take_token():
+                return UNKNOWN, url
+            result = self.check(url)
+            PREVIEW_REVALIDATIONS.inc(result=result)
+            if result != DEAD:
+                return result, url
+
+        preview_url, complete = self.resolve(name, artist) if name else (None, True)
+        self.replace(track_id, url, preview_url)
+        if preview_url:
+            PREVIEW_REVALIDATIONS.inc(result="replaced")
+        # An incomplete lookup (provider skipped or failing) is retried next pass.
+        return DEAD, preview_url if (complete or preview_url) else url
+
+    def run_once(self, sweep=None):
+        """Run one revalidation pass and return counts per outcome."""
+        served = self.due()
+        seen = {track_id for track_id, _ in served}
+        jobs = [
+            (track_id, state.name, state.artist, state.url, state.dead)
+            for track_id, state in served
+        ]
+        if sweep is not None and len(jobs) < self.batch_size:
+            for track_id, name, artist, url in sweep(self.batch_size - len(jobs)):
+                if track_id not in seen and track_id not in self._tracks:
+                    jobs.append((track_id, name, artist, url, False))
+
+        summary = {ALIVE: 0, DEAD: 0, UNKNOWN: 0, "replaced": 0}
+        if not jobs:
+            return summary
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            outcomes = list(pool.map(lambda job: self._revalidate(*job), jobs))
+
+        now = self._clock()
+        with self._lock:
+            for (track_id, _, _, old_url, _), (result, url) in zip(jobs, outcomes):
+                summary[result] += 1
+                state = self._tracks.get(track_id)
+                if url is not None and url != old_url:
+                    summary["replaced"] += 1
+                if state is None or state.url != old_url:
+                    continue
+                if url is None:
+                    # Nothing to serve any more; stop checking until it is served again.
+                    del self._tracks[track_id]
+                elif url != old_url:
+                    state.url, state.checked_at, state.dead = url, now, False
+                else:
+                    state.dead = result == DEAD
+                    if result != UNKNOWN:
+                        state.checked_at = now
+        return summary
+
+    def ensure_started(self, interval, sweep=None, logger=None):
+        """Start the background pass loop once per process."""
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(
+                target=self._run, args=(interval, sweep, logger), daemon=True
+            )
+            self._thread.start()
+
+    def _run(self, interval, sweep, logger):
+        while not self._stop.wait(interval):
+            try:
+                self.run_once(sweep)
+            except Exception:
+                if logger is not None:
+                    logger.exception("Preview revalidation pass failed")
+
+    def close(self):
+        self._stop.set()
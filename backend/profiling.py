@@ -0,0 +1,136 @@
+"""Opt-in sampling profiler for individual requests.
+
+Set ``PROFILE_TOKEN`` to enable it. A request to a profiled endpoint that sends
+``X-Profile-Token: <token>`` is sampled while it runs; the stacks are written as
+collapsed-stack text (``frame;frame;frame count`` lines, readable by
+speedscope and flamegraph.pl) to ``PROFILE_DIR`` and the hottest frames are
+returned in ``X-Profile-*`` response headers. Requests without the header pay
+only a dictionary lookup.
+
+Samples include line numbers, so time spent in native code (pandas, OpenCV,
+TensorFlow) is attributed to the Python line that called into it.
+"""
+
+import hmac
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+
+from flask import g, request
+
+PROFILE_HEADER = "X-Profile-Token"
+DEFAULT_INTERVAL = 0.001
+DEFAULT_ENDPOINTS = frozenset(
+    {"api.data_sort", "api.analyze_camera_frame_endpoint", "api.process_image_endpoint"}
+)
+TOP_FRAME_COUNT = 5
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({Path(code.co_filename).name}:{frame.f_lineno})"
+
+
+def collapse_stack(frame):
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class StackSampler:
+    """Sample one thread's Python stack from a background thread."""
+
+    def __init__(self, thread_id, interval=DEFAULT_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.samples[collapse_stack(frame)] += 1
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self.samples
+
+
+def top_frames(samples, count=TOP_FRAME_COUNT):
+    """Return ``(frame, share)`` for the leaf frames holding the most samples."""
+    total = sum(samples.values())
+    if not total:
+        return []
+    leaves = Counter()
+    for stack, hits in samples.items():
+        leaves[stack.rsplit(";", 1)[-1]] += hits
+    return [(frame, hits / total) for frame, hits in leaves.most_common(count)]
+
+
+def write_collapsed(samples, path):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    lines = [f"{stack} {hits}\n" for stack, hits in samples.most_common()]
+    path.write_text("".join(lines), encoding="utf-8")
+    return path
+
+
+def init_app(app, token=None, output_dir=None, endpoints=DEFAULT_ENDPOINTS, interval=None):
+    """Register the profiling hooks on ``app`` when a token is configured."""
+    token = token if token is not None else os.getenv("PROFILE_TOKEN", "")
+    if not token:
+        return False
+    output_dir = Path(
+        output_dir or os.getenv("PROFILE_DIR") or Path(app.root_path) / "profiles"
+    )
+    interval = interval or float(os.getenv("PROFILE_INTERVAL", DEFAULT_INTERVAL))
+
+    @app.before_request
+    def _start_profiler():
+        supplied = request.headers.get(PROFILE_HEADER)
+        if not supplied or request.endpoint not in endpoints:
+            return
+        if not hmac.compare_digest(supplied.encode(), token.encode()):
+            return
+        g.profile_started = time.perf_counter()
+        g.profiler = StackSampler(threading.get_ident(), interval).start()
+
+    @app.after_request
+    def _finish_profiler(response):
+        profiler = g.pop("profiler", None)
+        if profiler is None:
+            return response
+        samples = profiler.stop()
+        elapsed = time.perf_counter() - g.pop("profile_started")
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+        path = write_collapsed(samples, output_dir / f"{request.endpoint}-{stamp}.collapsed")
+
+        response.headers["X-Profile-File"] = path.name
+        response.headers["X-Profile-Samples"] = str(sum(samples.values()))
+        response.headers["X-Profile-Duration-Ms"] = f"{elapsed * 1000:.1f}"
+        response.headers["X-Profile-Top"] = "; ".join(
+            f"{frame}={share:.0%}" for frame, share in top_frames(samples)
+        ).encode("ascii", "replace").decode("ascii")
+        return response
+
+    @app.teardown_request
+    def _discard_profiler(_error=None):
+        # after_request does not run when the response could not be built.
+        profiler = g.pop("profiler", None)
+        if profiler is not None:
+            profiler.stop()
+
+    return True
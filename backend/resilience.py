@@ -0,0 +1,132 @@
+"""Client-side protection for upstream providers: rate limiting and circuit breaking."""
+
+import threading
+import time
+
+from metrics import (
+    UPSTREAM_CIRCUIT_STATE,
+    UPSTREAM_FAILURES,
+    UPSTREAM_RATE_LIMIT_TOKENS,
+    UPSTREAM_REJECTED,
+)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+_STATE_CODES = {CLOSED: 0, OPEN: 1, HALF_OPEN: 2}
+
+
+class TokenBucket:
+    """Non-blocking token bucket: ``rate`` tokens per second, holding at most ``burst``."""
+
+    def __init__(self, rate, burst, clock=time.monotonic):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self._clock = clock
+        self._tokens = self.burst
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def try_acquire(self):
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+    @property
+    def tokens(self):
+        return self._tokens
+
+
+class CircuitBreaker:
+    """Open after ``failure_threshold`` consecutive failures, probe again after ``cooldown``.
+
+    While open, calls are rejected without touching the network. Once the
+    cooldown has elapsed a single trial call is let through (half-open); its
+    outcome closes the breaker or re-opens it for another cooldown.
+    """
+
+    def __init__(self, failure_threshold, cooldown, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._clock = clock
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        return self._state
+
+    def allow(self):
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN and self._clock() - self._opened_at >= self.cooldown:
+                self._state = HALF_OPEN
+                self._trial_in_flight = False
+            if self._state == HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def release_trial(self):
+        """Give back a half-open trial slot that was granted but not used."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = OPEN
+                self._opened_at = self._clock()
+
+
+class UpstreamGuard:
+    """Rate limiter and circuit breaker for one provider, reporting into metrics."""
+
+    def __init__(self, name, limiter, breaker):
+        self.name = name
+        self.limiter = limiter
+        self.breaker = breaker
+        self.publish_state()
+
+    def publish_state(self):
+        """Export the breaker state; also used to restore the gauge after a metrics reset."""
+        UPSTREAM_CIRCUIT_STATE.set(_STATE_CODES[self.breaker.state], provider=self.name)
+
+    def acquire(self):
+        """Return True if a call may go out now; False means skip this provider."""
+        if not self.breaker.allow():
+            UPSTREAM_REJECTED.inc(provider=self.name, reason="circuit_open")
+            return False
+        self.publish_state()
+        if not self.limiter.try_acquire():
+            self.breaker.release_trial()
+            UPSTREAM_REJECTED.inc(provider=self.name, reason="rate_limited")
+            return False
+        UPSTREAM_RATE_LIMIT_TOKENS.set(self.limiter.tokens, provider=self.name)
+        return True
+
+    def record_success(self):
+        self.breaker.record_success()
+        self.publish_state()
+
+    def record_failure(self):
+        UPSTREAM_FAILURES.inc(provider=self.name)
+        self.breaker.record_failure()
+        self.publish_state()
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""Run emotion analysis over an archive of captured frames and stream results as JSONL.
+
+Usage:
+    python backend/scripts/analyze_images.py frames/ more-frames/ --output results.jsonl
+    find frames -name '*.jpg' | python backend/scripts/analyze_images.py --file-list - \
+      --output results.jsonl --workers 8 --chunk-size 32
+
+Each output line is one image: ``path``, ``label``, ``confidence``,
+``probabilities`` and the face ``box`` ([x, y, w, h]), or ``path`` and ``error``
+(``no_face`` or a load failure). Images are fanned out in chunks to a process
+pool; every worker loads the face cascade and emotion model once, and the faces
+of a chunk go through the model in a single batched call. Only a bounded number
+of chunks is in flight, and results are appended as chunks finish, so memory
+stays flat on large archives.
+
+Re-running with the same ``--output`` skips images that already have a line, so
+an interrupted run picks up where it stopped.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Set, TextIO
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+if str(ROOT_DIR / "backend") not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR / "backend"))
+
+import image_processing  # noqa: E402
+from quantize_emotion_model import IMAGE_SUFFIXES  # noqa: E402
+from thread_budget import thread_budget  # noqa: E402
+
+DEFAULT_CHUNK_SIZE = 16
+PROGRESS_INTERVAL = 10.0
+
+_worker_model = None
+_worker_detect = True
+
+
+def iter_input_paths(sources: Iterable[str], file_list: TextIO | None = None) -> Iterator[str]:
+    """Yield absolute image paths from directories (walked in sorted order), files and a list."""
+    for source in sources:
+        path = Path(source)
+        if path.is_dir():
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    if Path(name).suffix.lower() in IMAGE_SUFFIXES:
+                        yield str(Path(root, name).resolve())
+        else:
+            yield str(path.resolve())
+    if file_list is not None:
+        for line in file_list:
+            line = line.strip()
+            if line:
+                yield str(Path(line).resolve())
+
+
+def completed_paths(output_path: Path) -> Set[str]:
+    """Paths already recorded in ``output_path``; a torn last line is ignored."""
+    done: Set[str] = set()
+    try:
+        with open(output_path, encoding="utf-8") as handle:
+            for line in handle:
+                try:
+                    done.add(json.loads(line)["path"])
+                except (ValueError, KeyError):
+                    continue
+    except FileNotFoundError:
+        pass
+    return done
+
+
+def _open_for_append(output_path: Path) -> TextIO:
+    handle = open(output_path, "a+", encoding="utf-8")
+    if handle.tell():
+        handle.seek(handle.tell() - 1)
+        if handle.read(1) != "\n":
+            handle.write("\n")  # Terminate a line torn by an interrupted run.
+    return handle
+
+
+def init_worker(model_path: str, detect: bool, workers: int = 1) -> None:
+    """Load the cascade and model once per worker process.
+
+    OpenCV and TensorFlow get this process's share of the cores, so ``workers``
+    processes do not each start a thread per core.
+    """
+    global _worker_model, _worker_detect
+    image_processing.configure_threads(thread_budget(max(workers, 1)))
+    image_processing._get_face_cascade()
+    _worker_model = image_processing.load_emotion_model(model_path)
+    _worker_detect = detect
+
+
+def analyze_chunk(paths: List[str]) -> List[Dict[str, object]]:
+    """Analyze ``paths`` with one model call for all faces found in them."""
+    results: List[Dict[str, object]] = []
+    faces = []
+    for path in paths:
+        try:
+            batch, box = image_processing.face_input(path, detect=_worker_detect)
+        except image_processing.EmotionDetectionError as exc:
+            results.append({"path": path, "error": str(exc)})
+            continue
+        if batch is None:
+            results.append({"path": path, "error": "no_face"})
+            continue
+        faces.append((path, batch, box))
+
+    if faces:
+        batch = np.concatenate([face_batch for _, face_batch, _ in faces])
+        image_processing.INFERENCE_BATCH_SIZE.observe(len(batch))
+        predictions = _worker_model.predict(batch, verbose=0)
+        for (path, _, box), preds in zip(faces, predictions):
+            index = int(np.argmax(preds))
+            results.append(
+                {
+                    "path": path,
+                    "label": image_processing.EMOTIONS[index],
+                    "confidence": round(float(preds[index]), 6),
+                    "probabilities": {
+                        emotion: round(float(probability), 6)
+                        for emotion, probability in zip(image_processing.EMOTIONS, preds)
+                    },
+                    "box": list(box),
+                }
+            )
+    return results
+
+
+def _chunks(paths: Iterable[str], size: int) -> Iterator[List[str]]:
+    chunk: List[str] = []
+    for path in paths:
+        chunk.append(path)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class _Progress:
+    def __init__(self, interval: float, stream: TextIO = sys.stderr):
+        self.interval = interval
+        self.stream = stream
+        self.started = time.perf_counter()
+        self._last_report = self.started
+        self.counts = {"analyzed": 0, "faces": 0, "no_face": 0, "errors": 0}
+
+    def record(self, results: List[Dict[str, object]]) -> None:
+        for result in results:
+            self.counts["analyzed"] += 1
+            if "label" in result:
+                self.counts["faces"] += 1
+            elif result["error"] == "no_face":
+                self.counts["no_face"] += 1
+            else:
+                self.counts["errors"] += 1
+        now = time.perf_counter()
+        if now - self._last_report >= self.interval:
+            self._last_report = now
+            print(
+                f"{self.counts['analyzed']} images, {self.rate():.1f} images/sec",
+                file=self.stream,
+            )
+
+    def rate(self) -> float:
+        elapsed = time.perf_counter() - self.started
+        return self.counts["analyzed"] / elapsed if elapsed else 0.0
+
+    def summary(self, skipped: int) -> Dict[str, object]:
+        return {
+            **self.counts,
+            "skipped_existing": skipped,
+            "elapsed_s": round(time.perf_counter() - self.started, 2),
+            "images_per_sec": round(self.rate(), 2),
+        }
+
+
+def run(
+    paths: Iterable[str],
+    output_path: Path,
+    model_path: str,
+    workers: int,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    detect: bool = True,
+    progress_interval: float = PROGRESS_INTERVAL,
+) -> Dict[str, object]:
+    """Analyze every path not already in ``output_path``; ``workers=0`` runs in-process."""
+    done = completed_paths(output_path)
+    skipped = 0
+
+    def pending() -> Iterator[str]:
+        nonlocal skipped
+        seen: Set[str] = set()
+        for path in paths:
+            if path in done or path in seen:
+                skipped += path in done
+                continue
+            seen.add(path)
+            yield path
+
+    progress = _Progress(progress_interval)
+    with _open_for_append(output_path) as output:
+
+        def write(results: List[Dict[str, object]]) -> None:
+            output.write("".join(json.dumps(result) + "\n" for result in results))
+            output.flush()
+            progress.record(results)
+
+        chunks = _chunks(pending(), chunk_size)
+        if workers == 0:
+            init_worker(model_path, detect)
+            for chunk in chunks:
+                write(analyze_chunk(chunk))
+        else:
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=init_worker,
+                initargs=(model_path, detect, workers),
+            ) as pool:
+                in_flight = set()
+                for chunk in chunks:
+                    in_flight.add(pool.submit(analyze_chunk, chunk))
+                    if len(in_flight) >= workers * 2:
+                        finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                        for future in finished:
+                            write(future.result())
+                for future in wait(in_flight).done:
+                    write(future.result())
+
+    return progress.summary(skipped)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Bulk emotion analysis of image archives.")
+    parser.add_argument("sources", nargs="*", help="Image files or directories to walk.")
+    parser.add_argument(
+        "--file-list",
+        type=argparse.FileType("r"),
+        help="File with one image path per line ('-' for stdin).",
+    )
+    parser.add_argument("--output", required=True, help="JSONL file to append results to.")
+    parser.add_argument(
+        "--model",
+        default=os.getenv("EMOTION_MODEL"),
+        help="Model path or file name in backend/models (default: EMOTION_MODEL or float).",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Worker processes (0 analyzes in this process).",
+    )
+    parser.add_argument(
+        "--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Images per model call."
+    )
+    parser.add_argument(
+        "--no-detect", action="store_true", help="Treat each image as an already-cropped face."
+    )
+    parser.add_argument("--progress-interval", type=float, default=PROGRESS_INTERVAL)
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    if not args.sources and args.file_list is None:
+        print("Pass image files/directories or --file-list", file=sys.stderr)
+        return 1
+
+    summary = run(
+        iter_input_paths(args.sources, args.file_list),
+        Path(args.output),
+        str(image_processing.resolve_model_path(args.model)),
+        args.workers,
+        chunk_size=args.chunk_size,
+        detect=not args.no_detect,
+        progress_interval=args.progress_interval,
+    )
+    print(json.dumps(summary), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,188 @@
+"""Content-addressed album cover storage with pre-resized variants.
+
+Layout under the covers directory (``public/album_covers``)::
+
+    _store/<sha256>.jpg           one full-size blob per distinct image
+    _store/<sha256>_<size>.jpg    resized variants (300 px for the song cards)
+    _store/index.json             image URL -> sha256, so known URLs are not refetched
+    <track_id>.jpg                per-track link to the full-size blob
+    <size>/<track_id>.jpg         per-track links to the variants
+
+Per-track files are hard links (copies where links are unsupported), so the
+frontend keeps addressing covers by track id while identical album art is
+downloaded and stored once.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import os
+import shutil
+import sys
+import threading
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from typing import Callable, Dict, Iterable
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from singleflight import SingleFlight  # noqa: E402
+
+try:
+    from PIL import Image
+except ImportError:  # pragma: no cover - dependency may be absent in CI/test envs.
+    Image = None
+
+VARIANT_SIZES = (300,)
+STORE_DIRNAME = "_store"
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    handle = NamedTemporaryFile(delete=False, dir=path.parent, prefix=f".{path.name}.")
+    temp_path = Path(handle.name)
+    try:
+        with handle:
+            handle.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+
+
+def _link(source: Path, target: Path) -> None:
+    if target.exists():
+        return
+    target.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        os.link(source, target)
+    except FileExistsError:
+        pass
+    except OSError:
+        shutil.copyfile(source, target)
+
+
+def _replace_with_link(source: Path, target: Path) -> None:
+    """Swap ``target`` for a link to ``source`` without a window where it is missing."""
+    temp_target = target.with_name(f".{target.name}.link")
+    temp_target.unlink(missing_ok=True)
+    try:
+        os.link(source, temp_target)
+    except OSError:
+        return  # Keep the existing file; it only costs the duplicate bytes.
+    os.replace(temp_target, target)
+
+
+def resize_cover(data: bytes, size: int) -> bytes:
+    with Image.open(io.BytesIO(data)) as image:
+        image = image.convert("RGB")
+        image.thumbnail((size, size), Image.LANCZOS)
+        output = io.BytesIO()
+        image.save(output, format="JPEG", quality=85, optimize=True)
+        return output.getvalue()
+
+
+class CoverStore:
+    def __init__(self, covers_dir: Path, variant_sizes: Iterable[int] = VARIANT_SIZES):
+        self.covers_dir = Path(covers_dir)
+        self.store_dir = self.covers_dir / STORE_DIRNAME
+        self.index_path = self.store_dir / "index.json"
+        # Variants need Pillow; without it only full-size covers are stored.
+        self.variant_sizes = tuple(variant_sizes) if Image is not None else ()
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._flights = SingleFlight()
+        try:
+            self._url_index: Dict[str, str] = json.loads(self.index_path.read_text())
+        except (FileNotFoundError, ValueError):
+            self._url_index = {}
+
+    def _blob_path(self, digest: str, size: int | None = None) -> Path:
+        suffix = f"_{size}" if size else ""
+        return self.store_dir / f"{digest}{suffix}.jpg"
+
+    def _track_paths(self, track_id: str) -> Dict[int | None, Path]:
+        paths: Dict[int | None, Path] = {None: self.covers_dir / f"{track_id}.jpg"}
+        for size in self.variant_sizes:
+            paths[size] = self.covers_dir / str(size) / f"{track_id}.jpg"
+        return paths
+
+    def _store_blob(self, data: bytes) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        blob_path = self._blob_path(digest)
+        if not blob_path.exists():
+            _write_atomic(blob_path, data)
+        for size in self.variant_sizes:
+            variant_path = self._blob_path(digest, size)
+            if variant_path.exists():
+                continue
+            try:
+                _write_atomic(variant_path, resize_cover(data, size))
+            except OSError:
+                # Not a decodable image; serve the original only.
+                break
+        return digest
+
+    def _link_track(self, track_id: str, digest: str) -> None:
+        for size, target in self._track_paths(track_id).items():
+            source = self._blob_path(digest, size)
+            if source.exists():
+                _link(source, target)
+
+    def _digest_for_url(
+        self, image_url: str, fetch: Callable[[str], bytes | None]
+    ) -> tuple[str | None, bool]:
+        """Return ``(digest, reused)``; ``reused`` is True when nothing was downloaded."""
+        with self._lock:
+            digest = self._url_index.get(image_url)
+        if digest and self._blob_path(digest).exists():
+            return digest, True
+
+        def download() -> str | None:
+            data = fetch(image_url)
+            if not data:
+                return None
+            stored = self._store_blob(data)
+            with self._lock:
+                self._url_index[image_url] = stored
+            return stored
+
+        digest, shared = self._flights.do(image_url, download)
+        return digest, shared
+
+    def ensure(
+        self, track_id: str, image_url: str | None, fetch: Callable[[str], bytes | None]
+    ) -> str:
+        """Make sure every cover file for ``track_id`` exists; returns the outcome.
+
+        Outcomes: ``skipped_existing`` (nothing to do), ``backfilled`` (variants
+        made from an existing full-size file), ``deduplicated`` (linked to a blob
+        that was already stored), ``downloaded`` or ``missing_art``.
+        """
+        paths = self._track_paths(track_id)
+        if all(path.exists() for path in paths.values()):
+            return "skipped_existing"
+
+        full_path = paths[None]
+        if full_path.exists():
+            digest = self._store_blob(full_path.read_bytes())
+            _replace_with_link(self._blob_path(digest), full_path)
+            self._link_track(track_id, digest)
+            return "backfilled"
+
+        if not image_url:
+            return "missing_art"
+
+        digest, reused = self._digest_for_url(image_url, fetch)
+        if digest is None:
+            return "missing_art"
+        self._link_track(track_id, digest)
+        return "deduplicated" if reused else "downloaded"
+
+    def save_index(self) -> None:
+        with self._lock:
+            payload = json.dumps(self._url_index, indent=0, sort_keys=True)
+        _write_atomic(self.index_path, payload.encode("utf-8"))
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""Compare a candidate emotion model (e.g. a quantized .tflite) against the float model.
+
+Usage:
+    python backend/scripts/evaluate_emotion_model.py \
+      --candidate backend/models/_mini_XCEPTION.102-0.66.int8.tflite \
+      --images path/to/frames [--no-detect] [--output report.json]
+
+Both models see the same preprocessed face crops. The report gives label
+agreement (overall, per reference label, and a confusion table), probability
+drift (mean and max absolute difference, mean KL divergence), per-frame latency,
+and memory: model file size plus peak RSS of a fresh process that loads the
+model and runs one prediction. Use images that were not used for int8
+calibration.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+BACKEND_DIR = ROOT_DIR / "backend"
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+import image_processing  # noqa: E402
+from quantize_emotion_model import face_batches  # noqa: E402
+
+EMOTIONS = image_processing.EMOTIONS
+WARMUP_FRAMES = 3
+
+_MEMORY_PROBE = """
+import resource, sys
+sys.path.insert(0, {backend!r})
+import numpy as np
+import image_processing
+model = image_processing.load_emotion_model({path!r})
+model.predict(np.zeros((1, 64, 64, 1), "float32"), verbose=0)
+print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+
+def compare_predictions(reference: np.ndarray, candidate: np.ndarray) -> Dict[str, object]:
+    """Agreement and drift between two ``(frames, emotions)`` probability arrays."""
+    reference_labels = reference.argmax(axis=1)
+    candidate_labels = candidate.argmax(axis=1)
+    agree = reference_labels == candidate_labels
+    drift = np.abs(reference - candidate)
+    # How much the candidate moves the probability of the reference's chosen label.
+    top_drift = np.abs(
+        reference.max(axis=1) - candidate[np.arange(len(candidate)), reference_labels]
+    )
+    eps = 1e-7
+    kl = np.sum(reference * (np.log(reference + eps) - np.log(candidate + eps)), axis=1)
+
+    per_label = {}
+    confusion: Dict[str, Dict[str, int]] = {}
+    for index, emotion in enumerate(EMOTIONS):
+        rows = reference_labels == index
+        if rows.any():
+            per_label[emotion] = round(float(agree[rows].mean()), 4)
+            counts = np.bincount(candidate_labels[rows], minlength=len(EMOTIONS))
+            confusion[emotion] = {
+                EMOTIONS[other]: int(count) for other, count in enumerate(counts) if count
+            }
+
+    return {
+        "frames": int(len(reference)),
+        "label_agreement": round(float(agree.mean()), 4),
+        "label_agreement_by_reference_label": per_label,
+        "confusion": confusion,
+        "probability_drift_mean_abs": round(float(drift.mean()), 5),
+        "probability_drift_max_abs": round(float(drift.max()), 5),
+        "top_probability_drift_mean_abs": round(float(top_drift.mean()), 5),
+        "kl_divergence_mean": round(float(kl.mean()), 5),
+    }
+
+
+def run_model(path: Path, batches: List[np.ndarray]) -> tuple[np.ndarray, Dict[str, float]]:
+    """Predict every batch one frame at a time; returns probabilities and latency stats."""
+    model = image_processing.load_emotion_model(path)
+    for batch in batches[:WARMUP_FRAMES]:
+        model.predict(batch, verbose=0)
+
+    predictions, timings = [], []
+    for batch in batches:
+        started = time.perf_counter()
+        predictions.append(np.asarray(model.predict(batch, verbose=0))[0])
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    latency = {
+        "p50_ms": round(timings[len(timings) // 2], 3),
+        "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 3),
+        "mean_ms": round(sum(timings) / len(timings), 3),
+    }
+    return np.stack(predictions), latency
+
+
+def model_memory(path: Path) -> Dict[str, float]:
+    """File size and peak RSS of a fresh interpreter that loads ``path`` (Linux/macOS)."""
+    completed = subprocess.run(
+        [sys.executable, "-c", _MEMORY_PROBE.format(backend=str(BACKEND_DIR), path=str(path))],
+        capture_output=True,
+        text=True,
+    )
+    memory = {"file_kib": round(path.stat().st_size / 1024, 1)}
+    if completed.returncode == 0:
+        peak = int(completed.stdout.strip().splitlines()[-1])
+        # ru_maxrss is KiB on Linux and bytes on macOS.
+        unit = 1024 * 1024 if sys.platform == "darwin" else 1024
+        memory["peak_rss_mib"] = round(peak / unit, 1)
+    else:
+        memory["peak_rss_error"] = (completed.stderr.strip().splitlines() or ["failed"])[-1]
+    return memory
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Evaluate a candidate emotion model.")
+    parser.add_argument("--candidate", required=True, help="Model file to evaluate.")
+    parser.add_argument("--reference", default=str(image_processing.DEFAULT_MODEL_PATH))
+    parser.add_argument("--images", required=True, help="Directory of evaluation images.")
+    parser.add_argument(
+        "--no-detect", action="store_true", help="Treat each image as an already-cropped face."
+    )
+    parser.add_argument("--max-faces", type=int, default=2000)
+    parser.add_argument("--output", help="Write the JSON report here as well as to stdout.")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    reference_path = image_processing.resolve_model_path(args.reference)
+    candidate_path = image_processing.resolve_model_path(args.candidate)
+
+    batches = face_batches(Path(args.images), not args.no_detect, args.max_faces)
+    if not batches:
+        print("No faces found in the evaluation images", file=sys.stderr)
+        return 1
+
+    reference, reference_latency = run_model(reference_path, batches)
+    candidate, candidate_latency = run_model(candidate_path, batches)
+    report = {
+        "reference": {
+            "path": str(reference_path),
+            "latency": reference_latency,
+            "memory": model_memory(reference_path),
+        },
+        "candidate": {
+            "path": str(candidate_path),
+            "latency": candidate_latency,
+            "memory": model_memory(candidate_path),
+        },
+        "comparison": compare_predictions(reference, candidate),
+    }
+
+    rendered = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(rendered + "\n", encoding="utf-8")
+    print(rendered)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,9 +1,13 @@
 #!/usr/bin/env python3
-"""Import tracks from a Spotify playlist into backend/data_moods.csv and fetch album covers.
+"""Import tracks from Spotify playlists into backend/data_moods.csv and fetch album covers.
 
 Usage:
     python backend/scripts/import_spotify_playlist.py \
-      --playlist-url "https://open.spotify.com/playlist/<id>?si=..."
+      --playlist-url "https://open.spotify.com/playlist/<id>?si=..." \
+      [--playlist-url "https://open.spotify.com/playlist/<other-id>"]
+
+    # Re-label imported tracks after changing the mood thresholds:
+    python backend/scripts/import_spotify_playlist.py --reclassify
 """
 
 from __future__ import annotations
@@ -12,15 +16,29 @@ import argparse
 import json
 import re
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Iterable, List
+from typing import Dict, Iterable, Iterator, List, Tuple
 
+import numpy as np
 import pandas as pd
 import requests
 
 ROOT_DIR = Path(__file__).resolve().parents[2]
+if str(ROOT_DIR / "backend") not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR / "backend"))
+
+from catalog_store import compact, load_catalog, upsert_rows  # noqa: E402
+from cover_store import CoverStore  # noqa: E402
+
 DATA_PATH = ROOT_DIR / "backend" / "data_moods.csv"
 COVERS_DIR = ROOT_DIR / "public" / "album_covers"
+SPOTIFY_API_URL = "https://api.spotify.com/v1"
+RETRY_STATUSES = {429, 502, 503, 504}
+MAX_RETRIES = 5
+MAX_RETRY_DELAY = 60.0
+DEFAULT_COVER_WORKERS = 8
 
 CSV_COLUMNS = [
     "name",
@@ -51,8 +69,12 @@ def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Import Spotify playlist songs into CSV")
     parser.add_argument(
         "--playlist-url",
-        required=True,
-        help="Spotify playlist URL (e.g. https://open.spotify.com/playlist/<id>)",
+        action="append",
+        default=[],
+        help=(
+            "Spotify playlist URL (e.g. https://open.spotify.com/playlist/<id>); "
+            "repeat to import several playlists in one run"
+        ),
     )
     parser.add_argument(
         "--data-path",
@@ -69,7 +91,42 @@ def parse_args() -> argparse.Namespace:
         default="",
         help='Optional source label to stamp imported rows (default: "playlist:<id>")',
     )
-    return parser.parse_args()
+    parser.add_argument(
+        "--reclassify",
+        action="store_true",
+        help="Re-run mood classification over imported (playlist:*) rows, "
+        "e.g. after threshold changes",
+    )
+    parser.add_argument(
+        "--reclassify-all",
+        action="store_true",
+        help="Like --reclassify, but also re-label the hand-curated rows",
+    )
+    parser.add_argument(
+        "--backfill-covers",
+        action="store_true",
+        help="Create thumbnail variants for every cover already in --covers-dir",
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="Fold the catalog delta log into data_moods.csv after importing",
+    )
+    parser.add_argument(
+        "--cover-workers",
+        type=int,
+        default=DEFAULT_COVER_WORKERS,
+        help=f"Concurrent album cover downloads (default: {DEFAULT_COVER_WORKERS})",
+    )
+    args = parser.parse_args()
+    if not (
+        args.playlist_url or args.reclassify or args.reclassify_all or args.backfill_covers
+    ):
+        parser.error(
+            "at least one --playlist-url (or --reclassify / --reclassify-all / "
+            "--backfill-covers) is required"
+        )
+    return args
 
 
 def extract_playlist_id(url: str) -> str:
@@ -79,8 +136,42 @@ def extract_playlist_id(url: str) -> str:
     return match.group(1)
 
 
+def _retry_delay(response: requests.Response, attempt: int) -> float:
+    retry_after = response.headers.get("Retry-After")
+    if retry_after:
+        try:
+            return min(max(float(retry_after), 0.0), MAX_RETRY_DELAY)
+        except ValueError:
+            pass
+    return min(0.5 * (2**attempt), MAX_RETRY_DELAY)
+
+
+def get_with_retry(
+    session: requests.Session, url: str, max_retries: int = MAX_RETRIES, **kwargs
+) -> requests.Response:
+    """GET ``url``, backing off on 429/5xx and honoring the Retry-After header."""
+    kwargs.setdefault("timeout", 30)
+    for attempt in range(max_retries + 1):
+        response = session.get(url, **kwargs)
+        if response.status_code not in RETRY_STATUSES or attempt == max_retries:
+            return response
+        time.sleep(_retry_delay(response, attempt))
+    return response
+
+
+def build_session(pool_size: int = DEFAULT_COVER_WORKERS) -> requests.Session:
+    session = requests.Session()
+    session.headers.update({"User-Agent": "Mozilla/5.0"})
+    adapter = requests.adapters.HTTPAdapter(
+        pool_connections=pool_size, pool_maxsize=pool_size
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
 def request_text(url: str, session: requests.Session, **kwargs) -> str:
-    response = session.get(url, timeout=30, **kwargs)
+    response = get_with_retry(session, url, **kwargs)
     response.raise_for_status()
     return response.text
 
@@ -120,29 +211,50 @@ def get_web_access_token(seed_track_id: str, session: requests.Session) -> str:
     return token
 
 
-def paginated_playlist_tracks(
-    playlist_id: str, token: str, session: requests.Session
-) -> List[dict]:
-    url = f"https://api.spotify.com/v1/playlists/{playlist_id}/tracks"
+def iter_playlist_pages(
+    playlist_id: str,
+    token: str,
+    session: requests.Session,
+    api_url: str = SPOTIFY_API_URL,
+) -> Iterator[List[dict]]:
+    url = f"{api_url}/playlists/{playlist_id}/tracks"
     params = {"limit": 100, "offset": 0}
     headers = {"Authorization": f"Bearer {token}"}
-    items: List[dict] = []
 
     while True:
-        response = session.get(url, params=params, headers=headers, timeout=30)
+        response = get_with_retry(session, url, params=dict(params), headers=headers)
         response.raise_for_status()
         payload = response.json()
         page_items = payload.get("items", [])
-        items.extend(page_items)
+        yield page_items
 
-        if payload.get("next"):
-            params["offset"] += params["limit"]
+        if payload.get("next") and page_items:
+            # Advance by what the server returned; it may cap the page size.
+            params["offset"] += len(page_items)
         else:
             break
 
+
+def paginated_playlist_tracks(
+    playlist_id: str,
+    token: str,
+    session: requests.Session,
+    api_url: str = SPOTIFY_API_URL,
+) -> List[dict]:
+    items: List[dict] = []
+    for page_items in iter_playlist_pages(playlist_id, token, session, api_url):
+        items.extend(page_items)
     return items
 
 
+def _track_ids(playlist_items: Iterable[dict]) -> List[str]:
+    return [
+        (item.get("track") or {}).get("id")
+        for item in playlist_items
+        if (item.get("track") or {}).get("id")
+    ]
+
+
 def batched(iterable: Iterable[str], n: int) -> Iterable[List[str]]:
     batch: List[str] = []
     for item in iterable:
@@ -155,17 +267,20 @@ def batched(iterable: Iterable[str], n: int) -> Iterable[List[str]]:
 
 
 def fetch_audio_features(
-    track_ids: List[str], token: str, session: requests.Session
+    track_ids: List[str],
+    token: str,
+    session: requests.Session,
+    api_url: str = SPOTIFY_API_URL,
 ) -> Dict[str, dict]:
     headers = {"Authorization": f"Bearer {token}"}
     features_by_id: Dict[str, dict] = {}
 
     for chunk in batched(track_ids, 100):
-        response = session.get(
-            "https://api.spotify.com/v1/audio-features",
+        response = get_with_retry(
+            session,
+            f"{api_url}/audio-features",
             params={"ids": ",".join(chunk)},
             headers=headers,
-            timeout=30,
         )
         if response.status_code == 403:
             # Some public web-player tokens can read playlist metadata
@@ -184,57 +299,105 @@ def fetch_audio_features(
     return features_by_id
 
 
+SAD_TERMS = (
+    "sad",
+    "cry",
+    "tears",
+    "lonely",
+    "alone",
+    "broken",
+    "hurt",
+    "pain",
+    "miss",
+    "goodbye",
+    "dark",
+    "lost",
+)
+ENERGETIC_TERMS = (
+    "dance",
+    "party",
+    "run",
+    "fast",
+    "wild",
+    "fire",
+    "rage",
+    "rock",
+    "go",
+    "up",
+    "night",
+    "move",
+)
+HAPPY_TERMS = (
+    "happy",
+    "love",
+    "sun",
+    "smile",
+    "joy",
+    "fun",
+    "shine",
+    "good",
+    "best",
+    "beautiful",
+)
+
+HAPPY_MIN_VALENCE = 0.62
+HAPPY_MIN_ENERGY = 0.52
+SAD_MAX_VALENCE = 0.40
+SAD_MAX_ENERGY = 0.56
+ENERGETIC_MIN_ENERGY = 0.70
+ENERGETIC_MIN_TEMPO = 135
+POPULAR_FALLBACK_MIN = 75
+
+AUDIO_FEATURE_COLUMNS = [
+    "danceability",
+    "acousticness",
+    "energy",
+    "instrumentalness",
+    "liveness",
+    "valence",
+    "loudness",
+    "speechiness",
+    "tempo",
+    "key",
+    "time_signature",
+]
+
+# Keyword groups in priority order. The lookahead makes the scan report a match
+# at every position, and at each position the first group that matches wins, so
+# one pass sees the highest-priority keyword anywhere in the name (substring
+# semantics, like ``term in text``).
+_KEYWORD_MOODS = ("sad", "energetic", "happy")
+_KEYWORD_PATTERN = re.compile(
+    "(?=(?:"
+    + "|".join(
+        f"(?P<{mood}>{'|'.join(re.escape(term) for term in terms)})"
+        for mood, terms in zip(_KEYWORD_MOODS, (SAD_TERMS, ENERGETIC_TERMS, HAPPY_TERMS))
+    )
+    + "))"
+)
+
+
+def _keyword_mood(text: str) -> str | None:
+    best = len(_KEYWORD_MOODS)
+    for match in _KEYWORD_PATTERN.finditer(text):
+        rank = _KEYWORD_MOODS.index(match.lastgroup)
+        if rank == 0:
+            return _KEYWORD_MOODS[0]
+        best = min(best, rank)
+    return _KEYWORD_MOODS[best] if best < len(_KEYWORD_MOODS) else None
+
+
 def classify_mood(feature: dict, name: str, popularity: int | None) -> str:
     if not feature:
         text = (name or "").lower()
-        sad_terms = {
-            "sad",
-            "cry",
-            "tears",
-            "lonely",
-            "alone",
-            "broken",
-            "hurt",
-            "pain",
-            "miss",
-            "goodbye",
-            "dark",
-            "lost",
-        }
-        energetic_terms = {
-            "dance",
-            "party",
-            "run",
-            "fast",
-            "wild",
-            "fire",
-            "rage",
-            "rock",
-            "go",
-            "up",
-            "night",
-            "move",
-        }
-        happy_terms = {
-            "happy",
-            "love",
-            "sun",
-            "smile",
-            "joy",
-            "fun",
-            "shine",
-            "good",
-            "best",
-            "beautiful",
-        }
 
-        if any(term in text for term in sad_terms):
+        if any(term in text for term in SAD_TERMS):
             return "sad"
-        if any(term in text for term in energetic_terms):
+        if any(term in text for term in ENERGETIC_TERMS):
             return "energetic"
-        if any(term in text for term in happy_terms):
+        if any(term in text for term in HAPPY_TERMS):
             return "happy"
-        if popularity is not None and popularity >= 75:
+        if popularity is not None and popularity >= POPULAR_FALLBACK_MIN:
             return "happy"
         return "calm"
 
@@ -242,19 +405,99 @@ def classify_mood(feature: dict, name: str, popularity: int | None) -> str:
     energy = float(feature.get("energy", 0.0) or 0.0)
     tempo = float(feature.get("tempo", 0.0) or 0.0)
 
-    if valence >= 0.62 and energy >= 0.52:
+    if valence >= HAPPY_MIN_VALENCE and energy >= HAPPY_MIN_ENERGY:
         return "happy"
-    if valence <= 0.40 and energy <= 0.56:
+    if valence <= SAD_MAX_VALENCE and energy <= SAD_MAX_ENERGY:
         return "sad"
-    if energy >= 0.70 or tempo >= 135:
+    if energy >= ENERGETIC_MIN_ENERGY or tempo >= ENERGETIC_MIN_TEMPO:
         return "energetic"
     return "calm"
 
 
+def _numeric_column(frame: pd.DataFrame, column: str) -> np.ndarray:
+    if column not in frame.columns:
+        return np.full(len(frame), np.nan)
+    return pd.to_numeric(frame[column], errors="coerce").to_numpy(dtype=float)
+
+
+def classify_moods(frame: pd.DataFrame, has_features=None) -> pd.Series:
+    """Vectorized ``classify_mood`` over a frame of catalog rows.
+
+    ``has_features`` marks rows whose audio features are known; by default a
+    row has features when any audio-feature column is non-null. Returns the same
+    labels ``classify_mood`` would for each row.
+    """
+    if has_features is None:
+        has_features = frame.reindex(columns=AUDIO_FEATURE_COLUMNS).notna().any(axis=1)
+    has_features = np.asarray(has_features, dtype=bool)
+
+    # ``float(value or 0.0)``: missing features count as 0.
+    valence = np.nan_to_num(_numeric_column(frame, "valence"), nan=0.0)
+    energy = np.nan_to_num(_numeric_column(frame, "energy"), nan=0.0)
+    tempo = np.nan_to_num(_numeric_column(frame, "tempo"), nan=0.0)
+    feature_moods = np.select(
+        [
+            (valence >= HAPPY_MIN_VALENCE) & (energy >= HAPPY_MIN_ENERGY),
+            (valence <= SAD_MAX_VALENCE) & (energy <= SAD_MAX_ENERGY),
+            (energy >= ENERGETIC_MIN_ENERGY) | (tempo >= ENERGETIC_MIN_TEMPO),
+        ],
+        ["happy", "sad", "energetic"],
+        default="calm",
+    )
+
+    names = frame["name"] if "name" in frame.columns else pd.Series("", index=frame.index)
+    lowered = [
+        text.lower() if isinstance(text, str) else ""
+        for text in names.where(names.notna(), "")
+    ]
+    keyword_by_name = {text: _keyword_mood(text) for text in set(lowered)}
+    keyword_moods = np.array([keyword_by_name[text] or "" for text in lowered], dtype=object)
+    popular = _numeric_column(frame, "popularity") >= POPULAR_FALLBACK_MIN
+    name_moods = np.where(
+        keyword_moods != "", keyword_moods, np.where(popular, "happy", "calm")
+    )
+
+    return pd.Series(
+        np.where(has_features, feature_moods, name_moods).astype(object),
+        index=frame.index,
+        name="mood",
+    )
+
+
+def reclassify_catalog(
+    data_path: Path, include_curated: bool = False, dry_run: bool = False
+) -> Dict[str, int]:
+    """Re-run mood classification and upsert the moods that changed.
+
+    Only rows imported from a playlist (``source`` starting with ``playlist:``)
+    are touched unless ``include_curated`` is set; ``curated`` counts the
+    hand-curated rows whose mood would change. ``dry_run`` only counts.
+    """
+    frame, _ = load_catalog(data_path)
+    moods = classify_moods(frame)
+    current = frame["mood"].fillna("").astype(str).str.lower()
+    source = frame.get("source", pd.Series("", index=frame.index))
+    imported = source.fillna("").astype(str).str.startswith("playlist:").to_numpy()
+    differs = (current != moods).to_numpy()
+    mask = differs if include_curated else differs & imported
+    changed = [
+        {"id": track_id, "mood": mood}
+        for track_id, mood in zip(frame["id"][mask], moods[mask])
+    ]
+    if not dry_run:
+        upsert_rows(data_path, changed)
+    return {
+        "total": len(frame),
+        "changed": len(changed),
+        "curated": int((differs & ~imported).sum()),
+    }
+
+
 def build_rows(
     playlist_items: List[dict], features_by_id: Dict[str, dict], source_label: str
 ) -> List[dict]:
     rows: List[dict] = []
+    has_features: List[bool] = []
 
     for item in playlist_items:
         track = item.get("track") or {}
@@ -284,142 +527,189 @@ def build_rows(
             "tempo": feature.get("tempo"),
             "key": feature.get("key"),
             "time_signature": feature.get("time_signature"),
-            "mood": classify_mood(feature, track.get("name"), track.get("popularity")),
+            "mood": None,
             "preview_url": track.get("preview_url"),
             "source": source_label,
         }
         rows.append(row)
+        has_features.append(bool(feature))
 
+    if rows:
+        moods = classify_moods(pd.DataFrame(rows), has_features=has_features)
+        for row, mood in zip(rows, moods):
+            row["mood"] = mood
     return rows
 
 
 def merge_into_csv(data_path: Path, rows: List[dict]) -> Dict[str, int]:
-    existing = pd.read_csv(data_path)
-    for column in CSV_COLUMNS:
-        if column not in existing.columns:
-            existing[column] = pd.NA
-    existing = existing[CSV_COLUMNS]
-    existing_ids = set(existing["id"].astype(str))
-
-    incoming_df = pd.DataFrame(rows)
-    if incoming_df.empty:
-        return {"incoming": 0, "new": 0, "updated": 0, "total": len(existing)}
-
-    for column in CSV_COLUMNS:
-        if column not in incoming_df.columns:
-            incoming_df[column] = pd.NA
-    incoming_df = incoming_df[CSV_COLUMNS]
-
-    new_rows = incoming_df[~incoming_df["id"].astype(str).isin(existing_ids)].copy()
-    updated_rows = incoming_df[incoming_df["id"].astype(str).isin(existing_ids)].copy()
-
-    if not updated_rows.empty:
-        # refresh metadata for overlapping tracks
-        existing = existing.set_index("id")
-        updated_rows = updated_rows.set_index("id")
-        existing.update(updated_rows)
-        existing = existing.reset_index()
-
-    if new_rows.empty:
-        merged = existing.copy()
-    else:
-        merged = pd.concat([existing, new_rows], ignore_index=True)
-    merged.to_csv(data_path, index=False)
+    """Upsert imported rows into the catalog's delta log (see catalog_store)."""
+    rows = [{column: row.get(column) for column in CSV_COLUMNS} for row in rows]
+    return upsert_rows(data_path, rows)
 
-    return {
-        "incoming": len(incoming_df),
-        "new": len(new_rows),
-        "updated": len(updated_rows),
-        "total": len(merged),
-    }
 
+def _fetch_cover(session: requests.Session, image_url: str) -> bytes | None:
+    response = get_with_retry(session, image_url)
+    if response.status_code == 200 and response.content:
+        return response.content
+    return None
 
-def download_album_covers(
-    playlist_items: List[dict], covers_dir: Path, session: requests.Session
-) -> Dict[str, int]:
-    covers_dir.mkdir(parents=True, exist_ok=True)
-    downloaded = 0
-    skipped_existing = 0
-    missing_art = 0
 
-    for item in playlist_items:
-        track = item.get("track") or {}
-        track_id = track.get("id")
-        if not track_id:
-            continue
+def _store_cover(item: dict, store: CoverStore, session: requests.Session) -> str | None:
+    track = item.get("track") or {}
+    track_id = track.get("id")
+    if not track_id:
+        return None
 
-        target_path = covers_dir / f"{track_id}.jpg"
-        if target_path.exists():
-            skipped_existing += 1
-            continue
+    images = (track.get("album") or {}).get("images") or []
+    image_url = images[0].get("url") if images else None
+    return store.ensure(track_id, image_url, lambda url: _fetch_cover(session, url))
 
-        images = (track.get("album") or {}).get("images") or []
-        if not images:
-            missing_art += 1
-            continue
 
-        image_url = images[0].get("url")
-        if not image_url:
-            missing_art += 1
-            continue
+def submit_cover_downloads(
+    executor: ThreadPoolExecutor,
+    playlist_items: List[dict],
+    store: CoverStore,
+    session: requests.Session,
+) -> list:
+    return [executor.submit(_store_cover, item, store, session) for item in playlist_items]
 
-        response = session.get(image_url, timeout=30)
-        if response.status_code == 200 and response.content:
-            target_path.write_bytes(response.content)
-            downloaded += 1
-        else:
-            missing_art += 1
 
-    return {
-        "downloaded": downloaded,
-        "skipped_existing": skipped_existing,
-        "missing_art": missing_art,
+def _cover_stats(outcomes: Iterable[str | None]) -> Dict[str, int]:
+    stats = {
+        "downloaded": 0,
+        "deduplicated": 0,
+        "backfilled": 0,
+        "skipped_existing": 0,
+        "missing_art": 0,
     }
+    for outcome in outcomes:
+        if outcome:
+            stats[outcome] += 1
+    return stats
+
+
+def backfill_cover_variants(covers_dir: Path) -> Dict[str, int]:
+    """Move existing per-track covers into the store and create missing variants."""
+    store = CoverStore(covers_dir)
+    outcomes = [
+        store.ensure(path.stem, None, lambda _url: None)
+        for path in sorted(Path(covers_dir).glob("*.jpg"))
+    ]
+    return _cover_stats(outcomes)
+
+
+def collect_playlist(
+    playlist_id: str,
+    token: str,
+    session: requests.Session,
+    covers_dir: Path,
+    cover_workers: int = DEFAULT_COVER_WORKERS,
+    api_url: str = SPOTIFY_API_URL,
+) -> Tuple[List[dict], Dict[str, dict], Dict[str, int]]:
+    """Page through a playlist, overlapping feature fetches and cover downloads.
+
+    Audio features for a page are requested as soon as that page arrives, and
+    its covers are queued on a bounded pool, so neither waits for pagination
+    to finish.
+    """
+    playlist_items: List[dict] = []
+    feature_futures = []
+    cover_futures = []
+    store = CoverStore(covers_dir)
+
+    with ThreadPoolExecutor(max_workers=2) as feature_pool, ThreadPoolExecutor(
+        max_workers=max(cover_workers, 1)
+    ) as cover_pool:
+        for page_items in iter_playlist_pages(playlist_id, token, session, api_url):
+            playlist_items.extend(page_items)
+            page_ids = _track_ids(page_items)
+            if page_ids:
+                feature_futures.append(
+                    feature_pool.submit(fetch_audio_features, page_ids, token, session, api_url)
+                )
+            cover_futures.extend(
+                submit_cover_downloads(cover_pool, page_items, store, session)
+            )
 
+        features_by_id: Dict[str, dict] = {}
+        for future in feature_futures:
+            features_by_id.update(future.result())
+        cover_stats = _cover_stats(future.result() for future in cover_futures)
 
-def main() -> int:
-    args = parse_args()
-    playlist_id = extract_playlist_id(args.playlist_url)
-    data_path = Path(args.data_path).resolve()
-    covers_dir = Path(args.covers_dir).resolve()
-
-    if not data_path.exists():
-        print(f"CSV file not found: {data_path}", file=sys.stderr)
-        return 1
+    store.save_index()
+    return playlist_items, features_by_id, cover_stats
 
-    session = requests.Session()
-    session.headers.update({"User-Agent": "Mozilla/5.0"})
 
+def import_playlist(
+    playlist_url: str,
+    args: argparse.Namespace,
+    data_path: Path,
+    covers_dir: Path,
+    session: requests.Session,
+) -> None:
+    playlist_id = extract_playlist_id(playlist_url)
     playlist_page = request_text(
         f"https://open.spotify.com/playlist/{playlist_id}",
         session,
     )
     seed_track_id = extract_first_track_id_from_playlist_page(playlist_page)
     token = get_web_access_token(seed_track_id, session)
-
-    playlist_items = paginated_playlist_tracks(playlist_id, token, session)
-    track_ids = [
-        item.get("track", {}).get("id")
-        for item in playlist_items
-        if item.get("track", {}).get("id")
-    ]
     source_label = args.source_label or f"playlist:{playlist_id}"
 
-    features_by_id = fetch_audio_features(track_ids, token, session)
+    playlist_items, features_by_id, cover_stats = collect_playlist(
+        playlist_id, token, session, covers_dir, cover_workers=args.cover_workers
+    )
     rows = build_rows(playlist_items, features_by_id, source_label)
     merge_stats = merge_into_csv(data_path, rows)
-    cover_stats = download_album_covers(playlist_items, covers_dir, session)
 
     print("Playlist import complete")
     print(f"- Playlist ID: {playlist_id}")
     print(f"- Incoming tracks: {merge_stats['incoming']}")
     print(f"- New tracks added: {merge_stats['new']}")
     print(f"- Existing tracks refreshed: {merge_stats['updated']}")
-    print(f"- Total rows in CSV: {merge_stats['total']}")
+    print(f"- Existing tracks unchanged: {merge_stats['unchanged']}")
+    print(f"- Total rows in catalog: {merge_stats['total']}")
     print(f"- Covers downloaded: {cover_stats['downloaded']}")
+    print(f"- Covers shared with another track: {cover_stats['deduplicated']}")
     print(f"- Covers already present: {cover_stats['skipped_existing']}")
+    print(f"- Existing covers given thumbnails: {cover_stats['backfilled']}")
     print(f"- Missing cover images: {cover_stats['missing_art']}")
 
+
+def main() -> int:
+    args = parse_args()
+    data_path = Path(args.data_path).resolve()
+    covers_dir = Path(args.covers_dir).resolve()
+
+    if not data_path.exists():
+        print(f"CSV file not found: {data_path}", file=sys.stderr)
+        return 1
+
+    for playlist_url in args.playlist_url:
+        # Validate every URL before importing anything.
+        extract_playlist_id(playlist_url)
+
+    session = build_session(pool_size=max(args.cover_workers, 1) + 2)
+    for playlist_url in args.playlist_url:
+        import_playlist(playlist_url, args, data_path, covers_dir, session)
+
+    if args.reclassify_all:
+        preview = reclassify_catalog(data_path, include_curated=True, dry_run=True)
+        print(f"--reclassify-all changes {preview['curated']} hand-curated moods")
+        stats = reclassify_catalog(data_path, include_curated=True)
+        print(f"Reclassified catalog: {stats['changed']} of {stats['total']} moods changed")
+    elif args.reclassify:
+        stats = reclassify_catalog(data_path)
+        print(f"Reclassified imported rows: {stats['changed']} of {stats['total']} moods changed")
+
+    if args.backfill_covers:
+        stats = backfill_cover_variants(covers_dir)
+        print(f"Backfilled cover variants: {stats['backfilled']} covers")
+
+    if args.compact:
+        total = compact(data_path)
+        print(f"Compacted catalog: {total} rows written to {data_path}")
+
     return 0
 
 
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""Convert the Keras emotion model into a quantized TensorFlow Lite model for CPU inference.
+
+Usage:
+    # Full-integer (int8) weights and activations, calibrated on real face crops:
+    python backend/scripts/quantize_emotion_model.py --mode int8 \
+      --calibration-dir path/to/frames
+
+    # float16 weights (no calibration data needed):
+    python backend/scripts/quantize_emotion_model.py --mode float16
+
+Serve the result with ``EMOTION_MODEL=<file>.tflite`` and compare it against the
+float model with ``evaluate_emotion_model.py`` before rolling it out.
+
+int8 calibration needs representative faces: frames like the ones the camera
+endpoint receives (faces are detected and cropped exactly as in production), or
+pre-cropped face images with ``--no-detect``. A few hundred faces is plenty.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+from typing import Iterator, List
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+if str(ROOT_DIR / "backend") not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR / "backend"))
+
+import image_processing  # noqa: E402
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".webp", ".bmp"}
+MIN_CALIBRATION_FACES = 100
+
+
+def iter_image_paths(directory: Path) -> Iterator[Path]:
+    for path in sorted(directory.rglob("*")):
+        if path.suffix.lower() in IMAGE_SUFFIXES:
+            yield path
+
+
+def face_batches(directory: Path, detect: bool, limit: int) -> List:
+    batches = []
+    for path in iter_image_paths(directory):
+        try:
+            batch, _ = image_processing.face_input(path, detect=detect)
+        except image_processing.EmotionDetectionError:
+            continue
+        if batch is not None:
+            batches.append(batch)
+        if len(batches) >= limit:
+            break
+    return batches
+
+
+def default_output_path(source: Path, mode: str) -> Path:
+    return source.with_name(f"{source.stem}.{mode}.tflite")
+
+
+def convert(source: Path, mode: str, batches: List | None = None, int8_io: bool = False) -> bytes:
+    import tensorflow as tf
+
+    model = tf.keras.models.load_model(str(source), compile=False)
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if mode == "float16":
+        converter.target_spec.supported_types = [tf.float16]
+    else:
+        converter.representative_dataset = lambda: ([batch] for batch in batches)
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        if int8_io:
+            converter.inference_input_type = tf.int8
+            converter.inference_output_type = tf.int8
+    return converter.convert()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Quantize the emotion model to TensorFlow Lite.")
+    parser.add_argument("--source", default=str(image_processing.DEFAULT_MODEL_PATH))
+    parser.add_argument("--mode", choices=("int8", "float16"), default="int8")
+    parser.add_argument("--output", help="Defaults to <source stem>.<mode>.tflite next to source.")
+    parser.add_argument("--calibration-dir", help="Images used to calibrate int8 ranges.")
+    parser.add_argument(
+        "--no-detect",
+        action="store_true",
+        help="Treat each calibration image as an already-cropped face.",
+    )
+    parser.add_argument("--max-calibration-faces", type=int, default=500)
+    parser.add_argument(
+        "--int8-io",
+        action="store_true",
+        help="Also make the input/output tensors int8 (the app quantizes/dequantizes them).",
+    )
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    source = Path(args.source).resolve()
+    output = Path(args.output) if args.output else default_output_path(source, args.mode)
+
+    batches = None
+    if args.mode == "int8":
+        if not args.calibration_dir:
+            print("--calibration-dir is required for int8 quantization", file=sys.stderr)
+            return 1
+        batches = face_batches(
+            Path(args.calibration_dir), not args.no_detect, args.max_calibration_faces
+        )
+        if not batches:
+            print("No faces found in the calibration images", file=sys.stderr)
+            return 1
+        if len(batches) < MIN_CALIBRATION_FACES:
+            print(
+                f"Warning: only {len(batches)} calibration faces; "
+                "activation ranges may be poorly estimated.",
+                file=sys.stderr,
+            )
+
+    output.write_bytes(convert(source, args.mode, batches, args.int8_io))
+    print(f"Wrote {args.mode} model to {output} ({output.stat().st_size / 1024:.0f} KiB)")
+    print(f"Serve it with EMOTION_MODEL={output.name} after checking evaluate_emotion_model.py")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
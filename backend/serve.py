@@ -0,0 +1,178 @@
+"""Production WSGI server for the backend: ``python serve.py --workers 4 --threads 8``.
+
+On Linux/macOS this runs gunicorn with pre-forked worker processes, each serving
+requests from a thread pool. The app module is imported once in the master
+(``preload_app``), so the catalog and the other read-only module state are built
+once and shared copy-on-write with every worker. TensorFlow is not fork-safe, so
+the vision warm-up (``VISION_WARMUP=1``) runs in each worker after the fork.
+
+Where gunicorn is unavailable (Windows) it falls back to waitress: one process
+with a thread pool.
+
+Unless ``--threads`` is given, the request threads per worker, like the OpenCV
+and TensorFlow thread pools, come from ``thread_budget``: the CPU cores split
+across the workers (see ``thread_budget.py`` for the environment overrides).
+
+Every gunicorn worker keeps its own metrics, so the workers write snapshots to a
+temporary directory (``METRICS_MULTIPROC_DIR``) and ``/metrics`` merges them,
+whichever worker answers the scrape.
+
+SIGTERM or SIGINT stops accepting connections, lets in-flight requests finish
+(up to ``--graceful-timeout`` seconds under gunicorn) and then closes the
+upstream connection pools.
+"""
+
+import argparse
+import os
+import shutil
+import signal
+import tempfile
+
+try:
+    from gunicorn.app.base import BaseApplication
+except ImportError:  # pragma: no cover - dependency may be absent in CI/test envs.
+    BaseApplication = None
+
+try:
+    import waitress
+except ImportError:  # pragma: no cover - dependency may be absent in CI/test envs.
+    waitress = None
+
+from thread_budget import available_cpus, thread_budget
+
+DEFAULT_TIMEOUT = 30
+DEFAULT_GRACEFUL_TIMEOUT = 30
+
+
+def default_workers():
+    return int(os.getenv("WEB_CONCURRENCY") or available_cpus())
+
+
+def _env_flag(name):
+    return os.getenv(name, "").lower() in {"1", "true", "yes"}
+
+
+def gunicorn_options(
+    host, port, workers, threads, timeout, graceful_timeout, warm_vision, metrics_dir=None
+):
+    def post_fork(_server, _worker):
+        import app as app_module
+
+        if app_module.SHARED_METRICS is not None:
+            app_module.SHARED_METRICS.start()
+        if warm_vision and app_module.app.config["CAMERA_ENABLED"]:
+            app_module.warm_up_vision(app_module.app)
+
+    def worker_exit(_server, _worker):
+        import app as app_module
+
+        app_module.shutdown()
+
+    def on_exit(_server):
+        if metrics_dir:
+            shutil.rmtree(metrics_dir, ignore_errors=True)
+
+    return {
+        "bind": f"{host}:{port}",
+        "workers": workers,
+        "threads": threads,
+        "worker_class": "gthread",
+        "preload_app": True,
+        "timeout": timeout,
+        "graceful_timeout": graceful_timeout,
+        "post_fork": post_fork,
+        "worker_exit": worker_exit,
+        "on_exit": on_exit,
+    }
+
+
+if BaseApplication is not None:
+
+    class GunicornServer(BaseApplication):
+        def __init__(self, options):
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            import app as app_module
+
+            return app_module.app
+
+
+def _serve_waitress(host, port, threads):
+    import app as app_module
+
+    server = waitress.create_server(app_module.app, host=host, port=port, threads=threads)
+
+    def stop(_signum, _frame):
+        server.close()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    print(f"Serving on http://{host}:{port} with {threads} threads (waitress)")
+    try:
+        server.run()
+    except OSError:
+        pass  # select() on the listening socket closed by stop().
+    finally:
+        app_module.shutdown()
+
+
+def serve(
+    host="127.0.0.1",
+    port=5000,
+    workers=None,
+    threads=None,
+    timeout=DEFAULT_TIMEOUT,
+    graceful_timeout=DEFAULT_GRACEFUL_TIMEOUT,
+):
+    workers = workers or default_workers()
+    if BaseApplication is None:
+        if workers > 1:
+            print("gunicorn is not available; serving from a single process with waitress.")
+        workers = 1
+    # Workers size their OpenCV/TensorFlow pools from this when the app loads.
+    os.environ["WEB_CONCURRENCY"] = str(workers)
+    threads = threads or thread_budget(workers).request_threads
+    if BaseApplication is not None:
+        # Keep the import in the master from loading TensorFlow before the fork.
+        warm_vision = _env_flag("VISION_WARMUP")
+        os.environ.pop("VISION_WARMUP", None)
+        metrics_dir = tempfile.mkdtemp(prefix="mood-music-metrics-")
+        os.environ["METRICS_MULTIPROC_DIR"] = metrics_dir
+        options = gunicorn_options(
+            host, port, workers, threads, timeout, graceful_timeout, warm_vision, metrics_dir
+        )
+        GunicornServer(options).run()
+    elif waitress is not None:
+        _serve_waitress(host, port, threads)
+    else:
+        raise SystemExit("Install gunicorn (Linux/macOS) or waitress to run the production server.")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the backend with a production WSGI server.")
+    parser.add_argument("--host", default=os.getenv("HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "5000")))
+    parser.add_argument(
+        "--workers", type=int, help="Worker processes (default: WEB_CONCURRENCY or CPU count)."
+    )
+    parser.add_argument(
+        "--threads", type=int, help="Threads per worker (default: from the CPU thread budget)."
+    )
+    parser.add_argument("--timeout", type=int, default=DEFAULT_TIMEOUT)
+    parser.add_argument("--graceful-timeout", type=int, default=DEFAULT_GRACEFUL_TIMEOUT)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    serve(args.host, args.port, args.workers, args.threads, args.timeout, args.graceful_timeout)
+
+
+if __name__ == "__main__":
+    main()
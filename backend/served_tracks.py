@@ -0,0 +1,104 @@
+"""Per-session record of which catalog rows a client has already been sent.
+
+Each ``(session_id, partition)`` entry is a Python int used as a bitset over
+the rows of one mood partition: bit ``i`` is set once the partition's ``i``-th
+row has been served, so an entry costs at most one bit per row of the mood
+(under 30 bytes for the bundled catalog) plus fixed overhead. Entries expire
+``ttl`` seconds after their last use and the least recently used ones are
+evicted once the store exceeds ``max_entries`` or ``max_bytes``, so memory
+stays bounded however many sessions are active. Bit positions only mean
+something for the catalog they were recorded against, so the app clears the
+store when it swaps catalogs.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+ENTRY_OVERHEAD_BYTES = 200  # key tuple, list and int headers, dict slot
+
+
+def _bitset_bytes(bits):
+    return (bits.bit_length() + 7) // 8
+
+
+def _to_mask(bits, size):
+    """Unpack ``bits`` into a boolean array of ``size`` rows."""
+    if not bits:
+        return np.zeros(size, dtype=bool)
+    packed = np.frombuffer(bits.to_bytes((size + 7) // 8, "little"), dtype=np.uint8)
+    return np.unpackbits(packed, count=size, bitorder="little").astype(bool)
+
+
+def _from_indices(indices, size):
+    mask = np.zeros(size, dtype=bool)
+    mask[indices] = True
+    return int.from_bytes(np.packbits(mask, bitorder="little").tobytes(), "little")
+
+
+class ServedTracks:
+    """Bounded LRU map of ``(session_id, partition)`` -> served-row bitset."""
+
+    def __init__(
+        self, ttl=1800, max_entries=100000, max_bytes=32 * 1024 * 1024, clock=time.monotonic
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> [bits, last_used]
+        self._bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def nbytes(self):
+        return self._bytes
+
+    def clear(self):
+        """Forget every session, e.g. because row positions changed with the catalog."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _expire(self, now):
+        while self._entries:
+            key, (bits, last_used) = next(iter(self._entries.items()))
+            over_budget = len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+            if not over_budget and now - last_used < self.ttl:
+                return
+            self._entries.popitem(last=False)
+            self._bytes -= _bitset_bytes(bits) + ENTRY_OVERHEAD_BYTES
+
+    def seen(self, session_id, partition, size):
+        """Boolean array: which of the partition's ``size`` rows the session was sent."""
+        key = (session_id, partition)
+        with self._lock:
+            self._expire(self._clock())
+            entry = self._entries.get(key)
+            bits = entry[0] if entry is not None else 0
+        # The partition may have shrunk since these rows were served.
+        return _to_mask(bits & ((1 << size) - 1), size)
+
+    def mark(self, session_id, partition, indices, size):
+        """Record rows ``indices`` of the partition as served.
+
+        Once every row of the partition has been served the entry is cleared,
+        so the next request starts a new pass over the partition.
+        """
+        key = (session_id, partition)
+        served = _from_indices(indices, size)
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._bytes -= _bitset_bytes(entry[0]) + ENTRY_OVERHEAD_BYTES
+                served |= entry[0] & ((1 << size) - 1)
+            if served.bit_count() < size:
+                self._entries[key] = [served, now]
+                self._bytes += _bitset_bytes(served) + ENTRY_OVERHEAD_BYTES
+            self._expire(now)
@@ -0,0 +1,93 @@
+import json
+from pathlib import Path
+import sys
+
+import numpy as np
+import pytest
+
+SCRIPTS_DIR = Path(__file__).resolve().parents[1] / "scripts"
+if str(SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS_DIR))
+
+cv2 = pytest.importorskip("cv2")
+
+import analyze_images  # noqa: E402
+import image_processing  # noqa: E402
+
+
+class FakeModel:
+    def __init__(self):
+        self.batch_sizes = []
+
+    def predict(self, batch, verbose=0):
+        self.batch_sizes.append(len(batch))
+        predictions = np.zeros((len(batch), len(image_processing.EMOTIONS)), dtype="float32")
+        predictions[:, 3] = 0.8
+        predictions[:, 6] = 0.2
+        return predictions
+
+
+def test_run_streams_jsonl_and_resumes(tmp_path, monkeypatch):
+    model = FakeModel()
+    monkeypatch.setattr(image_processing, "load_emotion_model", lambda _path: model)
+
+    faces = tmp_path / "faces"
+    faces.mkdir()
+    for name in ("a.png", "b.png"):
+        cv2.imwrite(str(faces / name), np.full((80, 80, 3), 127, dtype=np.uint8))
+    (faces / "broken.jpg").write_bytes(b"not an image")
+    (faces / "notes.txt").write_text("skipped")
+    output = tmp_path / "results.jsonl"
+
+    paths = list(analyze_images.iter_input_paths([str(faces)]))
+    assert [Path(path).name for path in paths] == ["a.png", "b.png", "broken.jpg"]
+
+    summary = analyze_images.run(
+        paths[:2], output, "model.hdf5", workers=0, chunk_size=8, detect=False
+    )
+    assert summary["faces"] == 2
+    assert model.batch_sizes == [2]
+
+    records = [json.loads(line) for line in output.read_text().splitlines()]
+    assert records[0]["label"] == "happy"
+    assert records[0]["confidence"] == pytest.approx(0.8)
+    assert records[0]["box"] == [0, 0, 80, 80]
+    assert set(records[0]["probabilities"]) == set(image_processing.EMOTIONS)
+
+    summary = analyze_images.run(
+        paths, output, "model.hdf5", workers=0, chunk_size=8, detect=False
+    )
+    assert summary["skipped_existing"] == 2
+    assert summary["analyzed"] == 1
+    assert summary["errors"] == 1
+
+    records = [json.loads(line) for line in output.read_text().splitlines()]
+    assert len(records) == 3
+    assert records[-1]["error"].startswith("Unable to load image")
+
+
+def test_completed_paths_ignores_torn_lines(tmp_path):
+    output = tmp_path / "results.jsonl"
+    output.write_text('{"path": "/a.png", "label": "happy"}\n{"path": "/b.pn')
+
+    assert analyze_images.completed_paths(output) == {"/a.png"}
+
+    with analyze_images._open_for_append(output) as handle:
+        handle.write('{"path": "/c.png", "error": "no_face"}\n')
+    assert analyze_images.completed_paths(output) == {"/a.png", "/c.png"}
+
+
+def test_init_worker_splits_the_cores_between_workers(monkeypatch):
+    thread_counts = []
+    monkeypatch.setattr(image_processing, "THREAD_BUDGET", None)
+    monkeypatch.setattr(image_processing, "load_emotion_model", lambda _path: FakeModel())
+    monkeypatch.setattr(cv2, "setNumThreads", thread_counts.append)
+    for name in ("WEB_CONCURRENCY", "OPENCV_NUM_THREADS", "TF_INTRA_OP_THREADS"):
+        monkeypatch.delenv(name, raising=False)
+
+    analyze_images.init_worker("model.hdf5", detect=False, workers=4)
+
+    budget = image_processing.THREAD_BUDGET
+    assert budget.workers == 4
+    assert budget.opencv == max(1, budget.cores // 4)
+    assert thread_counts[0] == budget.opencv
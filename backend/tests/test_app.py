@@ -1,5 +1,7 @@
 from io import BytesIO
+import os
 from pathlib import Path
+import subprocess
 import sys
 
 BACKEND_DIR = Path(__file__).resolve().parents[1]
@@ -83,6 +85,222 @@ def test_songs_prioritizes_playlist_rows(monkeypatch):
         app_module.DATAFRAME = original_df
 
 
+def test_songs_uses_async_resolver_when_enabled(monkeypatch):
+    client = app_module.app.test_client()
+    app_module.PREVIEW_CACHE.clear()
+    requested = []
+
+    class FakeResolver:
+        def resolve_many(self, lookups):
+            requested.extend(lookups)
+            return [(f"https://previews.test/{key}.m4a", True) for key, _, _ in lookups]
+
+    original_df = app_module.DATAFRAME
+    try:
+        app_module.DATAFRAME = app_module.pd.DataFrame(
+            [
+                {
+                    "name": "Song A",
+                    "album": "A",
+                    "artist": "X",
+                    "id": "a",
+                    "mood": "happy",
+                    "popularity": 90,
+                    "preview_url": None,
+                },
+                {
+                    "name": "Song B",
+                    "album": "B",
+                    "artist": "Y",
+                    "id": "b",
+                    "mood": "happy",
+                    "popularity": 80,
+                    "preview_url": "https://stored.test/b.m4a",
+                },
+            ]
+        )
+        monkeypatch.setattr(app_module, "PREVIEW_RESOLVER", FakeResolver())
+        response = client.get("/api/songs?arg1=happy&shuffle=false")
+    finally:
+        app_module.DATAFRAME = original_df
+
+    payload = response.get_json()
+    assert response.status_code == 200
+    assert [row["preview_url"] for row in payload] == [
+        "https://previews.test/a.m4a",
+        "https://stored.test/b.m4a",
+    ]
+    assert requested == [("a", "Song A", "X")]
+    assert app_module.PREVIEW_CACHE["a"] == "https://previews.test/a.m4a"
+
+
+def test_preview_lookup_skips_failing_provider_without_caching_miss(monkeypatch):
+    app_module.PREVIEW_CACHE.clear()
+    calls = []
+
+    def failing_itunes(_track_name, _artist_name):
+        calls.append("itunes")
+        raise app_module.requests.Timeout("itunes timed out")
+
+    def empty_deezer(_track_name, _artist_name):
+        calls.append("deezer")
+        return None
+
+    # Fresh guards, so the failure recorded here never leaks into the shared breakers.
+    for name in app_module.PREVIEW_GUARDS:
+        monkeypatch.setitem(
+            app_module.PREVIEW_GUARDS,
+            name,
+            app_module.UpstreamGuard(
+                name, app_module.TokenBucket(100, 100), app_module.CircuitBreaker(100, 30)
+            ),
+        )
+    monkeypatch.setattr(app_module, "_lookup_itunes_preview", failing_itunes)
+    monkeypatch.setattr(app_module, "_lookup_deezer_preview", empty_deezer)
+
+    assert app_module.lookup_preview_url("track-x", "Song", "Artist") is None
+    assert calls == ["itunes", "deezer"]
+    assert "track-x" not in app_module.PREVIEW_CACHE
+
+
+def test_half_open_trial_that_raises_unexpectedly_reopens_the_breaker(monkeypatch):
+    def broken_itunes(_track_name, _artist_name):
+        raise AttributeError("'list' object has no attribute 'get'")
+
+    breaker = app_module.CircuitBreaker(1, 0)
+    guard = app_module.UpstreamGuard("itunes", app_module.TokenBucket(100, 100), breaker)
+    monkeypatch.setitem(app_module.PREVIEW_GUARDS, "itunes", guard)
+    monkeypatch.setitem(
+        app_module.PREVIEW_GUARDS,
+        "deezer",
+        app_module.UpstreamGuard(
+            "deezer", app_module.TokenBucket(100, 100), app_module.CircuitBreaker(100, 30)
+        ),
+    )
+    monkeypatch.setattr(app_module, "_lookup_itunes_preview", broken_itunes)
+    monkeypatch.setattr(app_module, "_lookup_deezer_preview", lambda *_args: None)
+    guard.record_failure()  # Open; with no cooldown the next call is the half-open trial.
+
+    assert app_module._fetch_preview_url("Song", "Artist") == (None, False)
+    assert breaker.state == "open"
+    # The trial slot was given back, so the provider is probed again.
+    assert breaker.allow()
+
+
+def test_metrics_endpoint_exposes_preview_counters(monkeypatch):
+    client = app_module.app.test_client()
+    monkeypatch.setattr(app_module, "lookup_preview_url", lambda *_args, **_kwargs: None)
+    client.get("/api/songs?arg1=happy&limit=2")
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.content_type.startswith("text/plain")
+    body = response.get_data(as_text=True)
+    assert "# TYPE mood_music_preview_lookups_coalesced_total counter" in body
+    assert (
+        'mood_music_request_duration_seconds_count{endpoint="/api/songs",method="GET",status="200"}'
+        in body
+    )
+    assert 'mood_music_stage_duration_seconds_bucket{stage="songs_select",le="+Inf"}' in body
+
+
+def test_songs_do_not_repeat_rows_within_a_session(monkeypatch):
+    client = app_module.app.test_client()
+    frame = app_module.prepare_catalog(
+        app_module.pd.DataFrame(
+            [
+                {
+                    "name": f"Calm {index}",
+                    "album": "A",
+                    "artist": "Artist",
+                    "id": f"calm-{index}",
+                    "mood": "calm",
+                    "popularity": index,
+                    "preview_url": "https://cdn.example/preview.m4a",
+                    "source": "playlist:abc" if index == 0 else None,
+                }
+                for index in range(5)
+            ]
+        )
+    )
+    monkeypatch.setattr(app_module, "DATAFRAME", frame)
+    monkeypatch.setattr(app_module, "SERVED_TRACKS", app_module.ServedTracks())
+
+    def fetch(session_id):
+        response = client.get(f"/api/songs?arg1=neutral&limit=2&session_id={session_id}")
+        assert response.status_code == 200
+        return [row["id"] for row in response.get_json()]
+
+    first, second = fetch("abc"), fetch("abc")
+    assert first[0] == "calm-0"
+    assert len(set(first + second)) == 4
+    # One unseen row is left; the rest of the page is filled and a new pass begins.
+    third = fetch("abc")
+    assert third[0] not in first + second
+    assert len(set(fetch("abc") + fetch("abc"))) == 4
+    assert fetch("other")[0] == "calm-0"
+
+    response = client.get(f"/api/songs?arg1=neutral&session_id={'x' * 200}")
+    assert response.status_code == 400
+
+
+def test_catalog_swap_forgets_served_rows(monkeypatch):
+    class FakeReader:
+        def refresh(self, frame):
+            return frame.iloc[::-1]
+
+    served = app_module.ServedTracks()
+    served.mark("abc", "calm", app_module.np.array([0]), 5)
+    monkeypatch.setattr(app_module, "CATALOG_READER", FakeReader())
+    monkeypatch.setattr(app_module, "DATAFRAME", app_module.DATAFRAME)
+    monkeypatch.setattr(app_module, "SERVED_TRACKS", served)
+
+    with app_module.app.app_context():
+        app_module._refresh_catalog()
+
+    assert len(served) == 0
+
+
+def test_songs_serve_revalidated_preview_urls(monkeypatch):
+    client = app_module.app.test_client()
+    frame = app_module.prepare_catalog(
+        app_module.pd.DataFrame(
+            [
+                {
+                    "name": f"Calm {index}",
+                    "album": "A",
+                    "artist": "Artist",
+                    "id": f"calm-{index}",
+                    "mood": "calm",
+                    "popularity": 90 - index,
+                    "preview_url": f"https://cdn.example/{index}.m4a",
+                    "source": None,
+                }
+                for index in range(2)
+            ]
+        )
+    )
+    revalidator = app_module._build_preview_revalidator()
+    monkeypatch.setattr(app_module, "DATAFRAME", frame)
+    monkeypatch.setattr(app_module, "PREVIEW_OVERRIDES", {})
+    monkeypatch.setattr(app_module, "PREVIEW_REVALIDATOR", revalidator)
+    monkeypatch.setattr(app_module, "PREVIEW_REVALIDATE_INTERVAL", 3600)
+    app_module._replace_preview(
+        "calm-0", "https://cdn.example/0.m4a", "https://cdn.example/new.m4a"
+    )
+
+    try:
+        response = client.get("/api/songs?arg1=neutral&limit=2&shuffle=false")
+    finally:
+        revalidator.close()
+
+    previews = [row["preview_url"] for row in response.get_json()]
+    assert previews == ["https://cdn.example/new.m4a", "https://cdn.example/1.m4a"]
+    assert revalidator.served_count("calm-0") == 1
+    assert [item[0] for item in app_module._catalog_preview_sweep(5)] == ["calm-0", "calm-1"]
+    assert list(app_module._catalog_preview_sweep(5))[0][3] == "https://cdn.example/new.m4a"
+
+
 def test_camera_requires_snapshot_file():
     client = app_module.app.test_client()
     response = client.post("/api/camera", data={}, content_type="multipart/form-data")
@@ -168,3 +386,85 @@ def test_camera_analyze_returns_detailed_payload(monkeypatch):
     assert payload["genre"] == "calm"
     assert payload["confidence"] == 0.55
     assert "timestamp" in payload
+
+
+def test_catalog_worker_rejects_camera_requests(monkeypatch):
+    client = app_module.create_app({"WORKER_ROLE": "catalog"}).test_client()
+
+    def fail_analyze_image(_path):
+        raise AssertionError("catalog workers must not run image analysis")
+
+    monkeypatch.setattr(app_module, "analyze_image", fail_analyze_image)
+
+    for path in ("/api/camera", "/api/camera/analyze"):
+        response = client.post(
+            path,
+            data={"snapshot": (BytesIO(b"fakeimg"), "snapshot.jpg")},
+            content_type="multipart/form-data",
+        )
+        assert response.status_code == 503
+
+
+def test_catalog_worker_never_imports_vision_stack():
+    script = (
+        "import sys, app\n"
+        "assert app.app.test_client().get('/api/songs?arg1=happy').status_code == 200\n"
+        "loaded = sorted({'cv2', 'tensorflow'} & set(sys.modules))\n"
+        "assert not loaded, loaded\n"
+    )
+    # A zero-size rate limiter keeps the preview lookups off the network.
+    env = dict(
+        os.environ,
+        WORKER_ROLE="catalog",
+        PREVIEW_RATE_LIMIT_PER_SECOND="0",
+        PREVIEW_RATE_LIMIT_BURST="0",
+    )
+    env.pop("VISION_WARMUP", None)
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+
+    assert result.returncode == 0, result.stderr
+
+
+def test_create_app_applies_config_overrides():
+    flask_app = app_module.create_app({"MAX_CONTENT_LENGTH": 1024, "WORKER_ROLE": "catalog"})
+
+    assert flask_app is not app_module.app
+    assert flask_app.config["MAX_CONTENT_LENGTH"] == 1024
+    assert flask_app.config["CAMERA_ENABLED"] is False
+    assert app_module.app.config["CAMERA_ENABLED"] is True
+    assert flask_app.test_client().get("/").get_json()["role"] == "catalog"
+
+
+def test_forked_worker_gets_fresh_http_session_and_resolver(monkeypatch):
+    parent_session = app_module.HTTP
+    parent_resolver = object()
+    monkeypatch.setattr(app_module, "HTTP", parent_session)
+    monkeypatch.setattr(app_module, "PREVIEW_RESOLVER", parent_resolver)
+
+    app_module._reset_after_fork()
+
+    assert app_module.HTTP is not parent_session
+    assert app_module.PREVIEW_RESOLVER is not parent_resolver
+    assert isinstance(app_module.PREVIEW_RESOLVER, app_module.AsyncPreviewResolver)
+
+
+def test_forked_worker_republishes_breaker_state_after_clearing_metrics(monkeypatch, tmp_path):
+    breaker = app_module.CircuitBreaker(1, 30)
+    guard = app_module.UpstreamGuard("itunes", app_module.TokenBucket(100, 100), breaker)
+    guard.record_failure()
+    monkeypatch.setitem(app_module.PREVIEW_GUARDS, "itunes", guard)
+    monkeypatch.setattr(app_module, "METRICS_MULTIPROC_DIR", str(tmp_path))
+    monkeypatch.setattr(app_module, "SHARED_METRICS", app_module.SharedMetrics(tmp_path))
+
+    app_module._reset_after_fork()
+
+    assert app_module.SHARED_METRICS.pid == app_module.os.getpid()
+    body = app_module.SHARED_METRICS.render()
+    assert f'mood_music_upstream_circuit_state{{provider="itunes",pid="{os.getpid()}"}} 1' in body
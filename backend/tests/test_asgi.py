@@ -0,0 +1,125 @@
+import asyncio
+import json
+from pathlib import Path
+import sys
+import time
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+pytest.importorskip("asgiref")
+
+from flask import Flask
+
+import app as app_module
+import asgi
+
+
+def _call(asgi_app, path, query=b""):
+    """Run one GET through ``asgi_app`` and return ``(status, headers, body)``."""
+    scope = {
+        "type": "http",
+        "http_version": "1.1",
+        "method": "GET",
+        "path": path,
+        "root_path": "",
+        "query_string": query,
+        "headers": [(b"origin", b"http://localhost:5173")],
+        "server": ("testserver", 80),
+        "client": ("127.0.0.1", 5000),
+    }
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        messages.append(message)
+
+    async def run():
+        await asgi_app(scope, receive, send)
+        start = messages[0]
+        body = b"".join(message.get("body", b"") for message in messages[1:])
+        return start["status"], dict(start["headers"]), body
+
+    return run()
+
+
+def test_songs_lookups_are_awaited_without_holding_threads(monkeypatch):
+    class SlowResolver:
+        async def resolve_many_async(self, lookups):
+            await asyncio.sleep(0.3)
+            return [(f"https://previews.test/{key}.m4a", True) for key, _, _ in lookups]
+
+    frame = app_module.prepare_catalog(
+        app_module.pd.DataFrame(
+            [
+                {
+                    "name": f"Song {index}",
+                    "album": "A",
+                    "artist": "X",
+                    "id": f"t{index}",
+                    "mood": "happy",
+                    "popularity": index,
+                    "preview_url": None,
+                }
+                for index in range(3)
+            ]
+        )
+    )
+    monkeypatch.setattr(app_module, "DATAFRAME", frame)
+    monkeypatch.setattr(app_module, "PREVIEW_RESOLVER", SlowResolver())
+    monkeypatch.setattr(app_module, "PREVIEW_CACHE", {})
+    asgi_app = asgi.create_asgi_app(app_module.app)
+
+    async def many():
+        calls = [
+            _call(asgi_app, "/api/songs", b"arg1=happy&shuffle=false&limit=1")
+            for _ in range(40)
+        ]
+        return await asyncio.gather(*calls)
+
+    started = time.perf_counter()
+    results = asyncio.run(many())
+    elapsed = time.perf_counter() - started
+
+    assert elapsed < 2.0  # 40 x 0.3 s one after another would take 12 s.
+    status, headers, body = results[0]
+    assert status == 200
+    assert headers[b"content-type"] == b"application/json"
+    assert headers[b"access-control-allow-origin"] == b"http://localhost:5173"
+    with app_module.app.test_client() as client:
+        expected = client.get("/api/songs?arg1=happy&shuffle=false&limit=1").get_json()
+    assert json.loads(body) == expected
+
+
+def test_songs_validation_errors_match_the_wsgi_route():
+    asgi_app = asgi.create_asgi_app(app_module.app)
+
+    status, _, body = asyncio.run(_call(asgi_app, "/api/songs"))
+
+    assert status == 400
+    assert json.loads(body) == {"error": "Missing required query parameter: arg1"}
+
+
+def test_other_routes_run_concurrently_on_the_thread_pool():
+    flask_app = Flask(__name__)
+
+    @flask_app.get("/slow")
+    def slow():
+        time.sleep(0.3)
+        return "done"
+
+    asgi_app = asgi.create_asgi_app(flask_app)
+
+    async def many():
+        return await asyncio.gather(*(_call(asgi_app, "/slow") for _ in range(4)))
+
+    started = time.perf_counter()
+    results = asyncio.run(many())
+
+    assert time.perf_counter() - started < 1.0  # One shared thread would take 1.2 s.
+    assert [status for status, _, _ in results] == [200] * 4
@@ -0,0 +1,104 @@
+import asyncio
+from pathlib import Path
+import sys
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from async_previews import AsyncPreviewResolver, PreviewProvider
+from metrics import PREVIEW_LOOKUPS_COALESCED
+
+
+class FakeResponse:
+    def __init__(self, payload):
+        self._payload = payload
+
+    def raise_for_status(self):
+        return None
+
+    def json(self):
+        return self._payload
+
+
+class FakeAsyncClient:
+    def __init__(self, payloads):
+        self.payloads = payloads
+        self.calls = []
+
+    async def get(self, url, params=None):
+        self.calls.append((url, params))
+        await asyncio.sleep(0.01)
+        return FakeResponse(self.payloads[url])
+
+    async def aclose(self):
+        return None
+
+
+def _provider(name):
+    return PreviewProvider(
+        name,
+        f"https://{name}.test/search",
+        lambda track_name, artist_name: {"term": f"{track_name} {artist_name}"},
+        lambda payload, _track_name, _artist_name: payload.get("preview"),
+    )
+
+
+def test_resolver_coalesces_duplicate_keys_into_one_upstream_call():
+    client = FakeAsyncClient({"https://itunes.test/search": {"preview": "https://p/1.m4a"}})
+    resolver = AsyncPreviewResolver(
+        [_provider("itunes")], timeout=1, client_factory=lambda: client
+    )
+    coalesced_before = PREVIEW_LOOKUPS_COALESCED.value(path="async")
+    try:
+        results = resolver.resolve_many(
+            [("track-1", "Song", "Artist"), ("track-1", "Song", "Artist")]
+        )
+    finally:
+        resolver.close()
+
+    assert results == [("https://p/1.m4a", True), ("https://p/1.m4a", True)]
+    assert len(client.calls) == 1
+    assert PREVIEW_LOOKUPS_COALESCED.value(path="async") == coalesced_before + 1
+
+
+def test_resolver_falls_back_to_next_provider():
+    client = FakeAsyncClient(
+        {
+            "https://itunes.test/search": {"preview": None},
+            "https://deezer.test/search": {"preview": "https://p/2.mp3"},
+        }
+    )
+    resolver = AsyncPreviewResolver(
+        [_provider("itunes"), _provider("deezer")], timeout=1, client_factory=lambda: client
+    )
+    try:
+        results = resolver.resolve_many([("track-2", "Song", "Artist")])
+    finally:
+        resolver.close()
+
+    assert results == [("https://p/2.mp3", True)]
+    assert [url for url, _ in client.calls] == [
+        "https://itunes.test/search",
+        "https://deezer.test/search",
+    ]
+
+
+def test_unexpected_payload_settles_a_half_open_trial():
+    from resilience import CircuitBreaker, TokenBucket, UpstreamGuard
+
+    breaker = CircuitBreaker(1, 0)
+    guard = UpstreamGuard("itunes", TokenBucket(100, 100), breaker)
+    guard.record_failure()
+    client = FakeAsyncClient({"https://itunes.test/search": ["not", "a", "dict"]})
+    resolver = AsyncPreviewResolver(
+        [_provider("itunes")], timeout=1, client_factory=lambda: client, guards={"itunes": guard}
+    )
+    try:
+        results = resolver.resolve_many([("track-3", "Song", "Artist")])
+    finally:
+        resolver.close()
+
+    assert results == [(None, False)]
+    assert breaker.state == "open"
+    assert breaker.allow()
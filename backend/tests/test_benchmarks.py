@@ -0,0 +1,96 @@
+from pathlib import Path
+import sys
+
+import requests
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+BENCH_DIR = BACKEND_DIR / "benchmarks"
+for path in (BACKEND_DIR, BENCH_DIR):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+import loadgen
+import run_benchmarks
+import sweep_threads
+from stub_upstreams import UpstreamStub
+
+
+def test_synthetic_catalog_keeps_schema_with_unique_ids():
+    frame = run_benchmarks.synthetic_catalog(2500, seed=1)
+    source_columns = run_benchmarks.pd.read_csv(BACKEND_DIR / "data_moods.csv").columns
+
+    assert list(frame.columns) == list(source_columns)
+    assert len(frame) == 2500
+    assert frame["id"].is_unique
+    assert frame["preview_url"].notna().all()
+    assert run_benchmarks.synthetic_catalog(10, with_previews=False)["preview_url"].isna().all()
+
+
+def test_compare_results_flags_regressions_beyond_tolerance():
+    baseline = {"a": {"p50_ms": 10.0}, "b": {"p50_ms": 10.0}, "c": {"p50_ms": 10.0}}
+    results = {
+        "a": {"p50_ms": 14.0},
+        "b": {"p50_ms": 11.0},
+        "c": {"p50_ms": 5.0},
+        "d": {"p50_ms": 1.0},
+        "e": {"skipped": "no OpenCV"},
+    }
+
+    comparison = run_benchmarks.compare_results(results, baseline, tolerance=0.25)
+
+    assert comparison["a"]["status"] == "regressed"
+    assert comparison["b"]["status"] == "ok"
+    assert comparison["c"]["status"] == "improved"
+    assert comparison["d"] == {"status": "new"}
+    assert "e" not in comparison
+
+    tiny = run_benchmarks.compare_results(
+        {"a": {"p50_ms": 0.004}}, {"a": {"p50_ms": 0.002}}, tolerance=0.25, min_delta_ms=0.1
+    )
+    assert tiny["a"]["status"] == "ok"
+
+
+def test_compare_requires_the_baseline_to_exist(tmp_path, capsys):
+    assert run_benchmarks.main(["--compare", str(tmp_path / "missing.json")]) == 2
+    assert "Baseline not found" in capsys.readouterr().err
+
+
+def test_upstream_stub_serves_itunes_and_deezer_shapes():
+    with UpstreamStub() as stub:
+        itunes = requests.get(stub.itunes_url, params={"term": "Song Artist"}, timeout=5).json()
+        deezer = requests.get(stub.deezer_url, params={"q": "Song"}, timeout=5).json()
+
+    assert itunes["results"][0]["previewUrl"]
+    assert deezer["data"][0]["preview"]
+    assert stub.requests == {"/itunes/search": 1, "/deezer/search": 1}
+
+
+def test_upstream_stub_injects_errors():
+    with UpstreamStub(error_rate=1.0) as stub:
+        response = requests.get(stub.itunes_url, params={"term": "x"}, timeout=5)
+
+    assert response.status_code == 503
+
+
+def test_loadgen_reports_percentiles_and_error_rates_per_endpoint():
+    samples = [("songs", "200", latency / 1000) for latency in range(1, 101)]
+    samples += [("camera", "200", 0.01), ("camera", "500", 0.02), ("camera", "ConnectTimeout", 1)]
+
+    summary = loadgen.summarize(samples, elapsed=2.0)
+
+    assert summary["songs"]["requests"] == 100
+    assert summary["songs"]["achieved_rps"] == 50.0
+    assert summary["songs"]["p50_ms"] == 51.0
+    assert summary["songs"]["p99_ms"] == 99.0
+    assert summary["songs"]["error_rate"] == 0
+    assert summary["camera"]["errors"] == 2
+    assert summary["camera"]["outcomes"] == {"200": 1, "500": 1, "ConnectTimeout": 1}
+    assert loadgen.parse_mix("songs=3,camera=1") == {"songs": 0.75, "camera": 0.25}
+
+
+def test_sweep_threads_expands_auto_per_worker_count():
+    configs = sweep_threads.configurations("1,auto", "1,auto", "auto", "4", cores=4)
+
+    assert configs == [(1, 1, 4, 4), (1, 4, 4, 4), (4, 1, 1, 4)]
+    assert sweep_threads.default_config(4, cores=4) == (4, 1, 1, 4)
+    assert sweep_threads.default_config(1, cores=4, stage="detect") == (1, 4, 1, 8)
@@ -0,0 +1,53 @@
+from pathlib import Path
+import sys
+
+import pandas as pd
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from catalog import is_prepared, mood_mask, prepare_catalog
+
+
+def _frame():
+    return pd.DataFrame(
+        [
+            {"id": "1", "artist": "A", "mood": "Happy", "source": "playlist:abc"},
+            {"id": "2", "artist": "A", "mood": " happy ", "source": None},
+            {"id": "3", "artist": "B", "mood": "SAD", "source": "Playlist:def"},
+            {"id": "4", "artist": "B", "mood": None, "source": "kaggle"},
+        ]
+    )
+
+
+def test_prepare_catalog_normalizes_moods_and_playlist_flags_once():
+    prepared = prepare_catalog(_frame())
+
+    assert is_prepared(prepared)
+    assert list(mood_mask(prepared, "happy")) == [True, True, False, False]
+    assert list(mood_mask(prepared, "sad")) == [False, False, True, False]
+    assert list(prepared["is_playlist"]) == [True, False, True, False]
+    # Display values keep their original spelling.
+    assert list(prepared["mood"].astype(object)[:3]) == ["Happy", " happy ", "SAD"]
+
+
+def test_prepare_catalog_stores_repeated_text_as_categoricals():
+    prepared = prepare_catalog(_frame())
+
+    for column in ("mood", "source", "artist", "mood_key"):
+        assert isinstance(prepared[column].dtype, pd.CategoricalDtype)
+    assert prepared["mood_key"].cat.codes.dtype.itemsize == 1
+
+
+def test_mood_mask_for_unknown_mood_selects_nothing():
+    assert not mood_mask(prepare_catalog(_frame()), "calm").any()
+
+
+def test_prepare_catalog_is_idempotent_and_handles_missing_columns():
+    prepared = prepare_catalog(_frame())
+    again = prepare_catalog(prepared)
+
+    pd.testing.assert_frame_equal(prepared, again)
+    bare = prepare_catalog(pd.DataFrame({"id": ["1"], "mood": ["Calm"]}))
+    assert list(bare["is_playlist"]) == [False]
@@ -0,0 +1,142 @@
+import json
+from pathlib import Path
+import sys
+
+import pandas as pd
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+import catalog_store
+
+
+def _write_base(path):
+    pd.DataFrame(
+        [
+            {"id": "a", "name": "Song A", "popularity": 10, "mood": "Happy", "preview_url": None},
+            {"id": "b", "name": "Song B", "popularity": 20, "mood": "Sad", "preview_url": None},
+        ]
+    ).to_csv(path, index=False)
+
+
+def test_upsert_appends_only_changed_rows(tmp_path):
+    csv_path = tmp_path / "data_moods.csv"
+    _write_base(csv_path)
+
+    stats = catalog_store.upsert_rows(
+        csv_path,
+        [
+            {"id": "a", "name": "Song A", "popularity": 10, "mood": "Happy"},
+            {"id": "b", "name": "Song B", "popularity": 25, "mood": "Sad"},
+            {"id": "c", "name": "Song C", "popularity": 30, "mood": "calm"},
+        ],
+    )
+
+    assert stats["new"] == 1
+    assert stats["updated"] == 1
+    assert stats["unchanged"] == 1
+    assert stats["total"] == 3
+    assert catalog_store.delta_row_count(csv_path) == 2
+    # The base CSV is untouched until compaction.
+    assert len(pd.read_csv(csv_path)) == 2
+
+    frame, _ = catalog_store.load_catalog(csv_path)
+    assert list(frame["id"]) == ["a", "b", "c"]
+    assert frame.set_index("id").loc["b", "popularity"] == 25
+
+
+def test_upsert_uses_the_row_index_instead_of_reading_the_catalog(tmp_path, monkeypatch):
+    csv_path = tmp_path / "data_moods.csv"
+    _write_base(csv_path)
+    catalog_store.upsert_rows(
+        csv_path,
+        [
+            {"id": "b", "name": "Song B", "popularity": 25, "mood": "Sad"},
+            {"id": "c", "name": "Song C", "popularity": 30, "mood": "calm"},
+        ],
+    )
+    frame, _ = catalog_store.load_catalog(csv_path)
+    index = json.loads(catalog_store.index_path_for(csv_path).read_text())
+    assert index["digests"] == catalog_store._frame_digests(frame)
+
+    def fail(_csv_path):
+        raise AssertionError("the catalog was read")
+
+    monkeypatch.setattr(catalog_store, "load_catalog", fail)
+    stats = catalog_store.upsert_rows(
+        csv_path,
+        [
+            {"id": "a", "name": "Song A", "popularity": 10, "mood": "Happy", "preview_url": None},
+            {"id": "c", "name": "Song C", "popularity": 30, "mood": "calm"},
+            {"id": "d", "name": "Song D", "popularity": 40, "mood": "calm"},
+        ],
+    )
+    assert (stats["new"], stats["updated"], stats["unchanged"]) == (1, 0, 2)
+    assert catalog_store.delta_row_count(csv_path) == 3
+
+
+def test_stale_row_index_is_rebuilt(tmp_path):
+    csv_path = tmp_path / "data_moods.csv"
+    _write_base(csv_path)
+    catalog_store.upsert_rows(csv_path, [{"id": "c", "name": "Song C", "mood": "calm"}])
+    # Edited by hand: the index no longer describes the catalog.
+    frame = pd.read_csv(csv_path)
+    frame.loc[frame["id"] == "a", "popularity"] = 99
+    frame.to_csv(csv_path, index=False)
+
+    stats = catalog_store.upsert_rows(
+        csv_path, [{"id": "a", "name": "Song A", "popularity": 99, "mood": "Happy"}]
+    )
+
+    assert stats["unchanged"] == 1
+    assert catalog_store.delta_row_count(csv_path) == 1
+
+
+def test_torn_delta_line_is_terminated_and_skipped(tmp_path):
+    csv_path = tmp_path / "data_moods.csv"
+    _write_base(csv_path)
+    catalog_store.upsert_rows(csv_path, [{"id": "c", "name": "Song C", "mood": "calm"}])
+    reader = catalog_store.CatalogReader(csv_path, refresh_interval=0)
+    frame = reader.load()
+    # A crash mid-write leaves a line without its newline.
+    with open(catalog_store.delta_path_for(csv_path), "a", encoding="utf-8") as handle:
+        handle.write('{"id": "d", "na')
+
+    catalog_store.upsert_rows(csv_path, [{"id": "e", "name": "Song E", "mood": "calm"}])
+
+    loaded, _ = catalog_store.load_catalog(csv_path)
+    assert list(loaded["id"]) == ["a", "b", "c", "e"]
+    assert list(reader.refresh(frame)["id"]) == ["a", "b", "c", "e"]
+
+
+def test_compact_folds_delta_into_base(tmp_path):
+    csv_path = tmp_path / "data_moods.csv"
+    _write_base(csv_path)
+    catalog_store.upsert_rows(
+        csv_path, [{"id": "a", "preview_url": "https://previews.test/a.m4a"}]
+    )
+
+    assert catalog_store.compact(csv_path) == 2
+    assert not catalog_store.delta_path_for(csv_path).exists()
+    base = pd.read_csv(csv_path)
+    assert base.set_index("id").loc["a", "preview_url"] == "https://previews.test/a.m4a"
+    assert not list(tmp_path.glob(".*.tmp"))
+
+
+def test_reader_applies_only_new_delta_lines(tmp_path):
+    csv_path = tmp_path / "data_moods.csv"
+    _write_base(csv_path)
+    reader = catalog_store.CatalogReader(csv_path, refresh_interval=0)
+    frame = reader.load()
+
+    assert reader.refresh(frame) is None
+
+    catalog_store.upsert_rows(csv_path, [{"id": "c", "name": "Song C", "mood": "calm"}])
+    frame = reader.refresh(frame)
+    assert list(frame["id"]) == ["a", "b", "c"]
+
+    catalog_store.upsert_rows(csv_path, [{"id": "a", "popularity": 99}])
+    frame = reader.refresh(frame)
+    assert frame.set_index("id").loc["a", "popularity"] == 99
+    assert len(frame) == 3
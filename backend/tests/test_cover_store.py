@@ -0,0 +1,55 @@
+import io
+from pathlib import Path
+import sys
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+SCRIPTS_DIR = BACKEND_DIR / "scripts"
+if str(SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS_DIR))
+
+import cover_store
+
+
+def _jpeg_bytes(color=(200, 30, 30), size=640):
+    if cover_store.Image is None:
+        return b"\xff\xd8fake-jpeg-" + bytes(color)
+    output = io.BytesIO()
+    cover_store.Image.new("RGB", (size, size), color).save(output, format="JPEG")
+    return output.getvalue()
+
+
+def test_tracks_sharing_album_art_download_it_once(tmp_path):
+    fetched = []
+
+    def fetch(url):
+        fetched.append(url)
+        return _jpeg_bytes()
+
+    store = cover_store.CoverStore(tmp_path)
+    assert store.ensure("track-a", "https://img.test/album.jpg", fetch) == "downloaded"
+    assert store.ensure("track-b", "https://img.test/album.jpg", fetch) == "deduplicated"
+    assert store.ensure("track-a", "https://img.test/album.jpg", fetch) == "skipped_existing"
+
+    assert fetched == ["https://img.test/album.jpg"]
+    assert (tmp_path / "track-a.jpg").read_bytes() == (tmp_path / "track-b.jpg").read_bytes()
+    blobs = [path for path in (tmp_path / "_store").glob("*.jpg") if "_" not in path.stem]
+    assert len(blobs) == 1
+
+    store.save_index()
+    reopened = cover_store.CoverStore(tmp_path)
+    assert reopened.ensure("track-c", "https://img.test/album.jpg", fetch) == "deduplicated"
+    assert len(fetched) == 1
+
+
+@pytest.mark.skipif(cover_store.Image is None, reason="Pillow is not installed")
+def test_variants_are_resized_and_backfilled_for_existing_covers(tmp_path):
+    (tmp_path / "legacy.jpg").write_bytes(_jpeg_bytes(color=(10, 120, 220)))
+    store = cover_store.CoverStore(tmp_path)
+
+    assert store.ensure("legacy", None, lambda _url: None) == "backfilled"
+
+    for size in cover_store.VARIANT_SIZES:
+        with cover_store.Image.open(tmp_path / str(size) / "legacy.jpg") as image:
+            assert image.size == (size, size)
@@ -0,0 +1,37 @@
+from pathlib import Path
+import sys
+
+import numpy as np
+
+SCRIPTS_DIR = Path(__file__).resolve().parents[1] / "scripts"
+if str(SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS_DIR))
+
+import evaluate_emotion_model as evaluation
+
+
+def test_compare_predictions_reports_agreement_and_drift():
+    reference = np.array(
+        [
+            [0.7, 0.0, 0.0, 0.3, 0.0, 0.0, 0.0],
+            [0.0, 0.0, 0.0, 0.9, 0.1, 0.0, 0.0],
+            [0.0, 0.0, 0.0, 0.6, 0.4, 0.0, 0.0],
+        ]
+    )
+    candidate = np.array(
+        [
+            [0.6, 0.0, 0.0, 0.4, 0.0, 0.0, 0.0],
+            [0.0, 0.0, 0.0, 0.9, 0.1, 0.0, 0.0],
+            [0.0, 0.0, 0.0, 0.4, 0.6, 0.0, 0.0],
+        ]
+    )
+
+    report = evaluation.compare_predictions(reference, candidate)
+
+    assert report["frames"] == 3
+    assert report["label_agreement"] == round(2 / 3, 4)
+    assert report["label_agreement_by_reference_label"] == {"angry": 1.0, "happy": 0.5}
+    assert report["confusion"]["happy"] == {"happy": 1, "sad": 1}
+    assert report["probability_drift_max_abs"] == 0.2
+    assert report["top_probability_drift_mean_abs"] == round((0.1 + 0.0 + 0.2) / 3, 5)
+    assert report["kl_divergence_mean"] > 0
@@ -1,6 +1,8 @@
 from pathlib import Path
 import sys
 
+import pytest
+
 BACKEND_DIR = Path(__file__).resolve().parents[1]
 if str(BACKEND_DIR) not in sys.path:
     sys.path.insert(0, str(BACKEND_DIR))
@@ -18,10 +20,98 @@ def test_get_emotion_model_loads_with_compile_disabled(monkeypatch):
         return sentinel_model
 
     monkeypatch.setattr(image_processing, "load_model", fake_load_model)
-    monkeypatch.setattr(image_processing, "img_to_array", object())
     monkeypatch.setattr(image_processing, "emotion_model", None)
 
     model = image_processing._get_emotion_model()
 
     assert model is sentinel_model
     assert loaded["compile"] is False
+
+
+def test_preprocess_face_reuses_thread_buffers_and_matches_plain_normalization():
+    cv2 = pytest.importorskip("cv2")
+    np = image_processing.np
+    image_processing._import_vision_stack()
+    frame = np.random.default_rng(0).integers(0, 256, (120, 160, 3), dtype=np.uint8)
+
+    gray = image_processing.to_grayscale(frame)
+    roi = gray[10:90, 20:100]
+    batch = image_processing.preprocess_face(roi)
+
+    expected = cv2.resize(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)[10:90, 20:100], (64, 64))
+    expected = (expected.astype("float32") / 255.0)[np.newaxis, :, :, np.newaxis]
+    np.testing.assert_array_equal(batch, expected)
+    assert batch.dtype == np.float32
+    assert image_processing.preprocess_face(roi) is batch
+    assert image_processing.to_grayscale(frame) is gray
+
+
+class FakeInterpreter:
+    """Stands in for tflite Interpreter: int8 in/out, output = mean pixel per class."""
+
+    instances = []
+
+    def __init__(self, model_path, num_threads=None):
+        self.model_path = model_path
+        self.num_threads = num_threads
+        self.input_shape = [1, 64, 64, 1]
+        self.resizes = 0
+        self.tensors = {}
+        FakeInterpreter.instances.append(self)
+
+    def allocate_tensors(self):
+        pass
+
+    def get_input_details(self):
+        return [{"index": 0, "dtype": image_processing.np.int8, "quantization": (1 / 255, -128)}]
+
+    def get_output_details(self):
+        return [{"index": 1, "dtype": image_processing.np.int8, "quantization": (1 / 256, -128)}]
+
+    def resize_tensor_input(self, index, shape):
+        self.input_shape = shape
+        self.resizes += 1
+
+    def set_tensor(self, index, value):
+        assert value.dtype == image_processing.np.int8
+        self.tensors[index] = value
+
+    def invoke(self):
+        np = image_processing.np
+        pixels = self.tensors[0].reshape(len(self.tensors[0]), -1).astype(np.float32)
+        mean = ((pixels + 128) / 255).mean(axis=1, keepdims=True)
+        quantized = np.round(np.repeat(mean, 7, axis=1) * 256 - 128)
+        self.tensors[1] = np.clip(quantized, -128, 127).astype(np.int8)
+
+    def get_tensor(self, index):
+        return self.tensors[index]
+
+
+def test_tflite_model_quantizes_inputs_and_dequantizes_outputs():
+    np = image_processing.np
+    FakeInterpreter.instances.clear()
+    model = image_processing.TFLiteEmotionModel("model.tflite", interpreter_class=FakeInterpreter)
+    batch = np.full((2, 64, 64, 1), 0.5, dtype=np.float32)
+
+    preds = model.predict(batch, verbose=0)
+
+    assert preds.dtype == np.float32
+    assert preds.shape == (2, 7)
+    np.testing.assert_allclose(preds, 0.5, atol=1 / 128)
+    model.predict(batch)
+    assert FakeInterpreter.instances[0].resizes == 1
+
+
+def test_emotion_model_path_can_name_a_file_in_models_dir(tmp_path):
+    assert image_processing.resolve_model_path(None) == image_processing.DEFAULT_MODEL_PATH
+    assert image_processing.resolve_model_path("variant.tflite") == (
+        image_processing.MODELS_DIR / "variant.tflite"
+    )
+    assert image_processing.resolve_model_path(str(tmp_path)) == tmp_path
+
+
+def test_tflite_model_without_runtime_raises_detection_error(monkeypatch):
+    monkeypatch.setattr(image_processing, "_tflite_interpreter_class", lambda: None)
+
+    with pytest.raises(image_processing.EmotionDetectionError, match="TensorFlow Lite"):
+        image_processing.load_emotion_model("model.tflite")
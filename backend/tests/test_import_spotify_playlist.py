@@ -0,0 +1,199 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import random
+from pathlib import Path
+import sys
+import threading
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+SCRIPTS_DIR = BACKEND_DIR / "scripts"
+if str(SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS_DIR))
+
+import import_spotify_playlist as importer
+
+
+class SpotifyStub(BaseHTTPRequestHandler):
+    tracks = []
+    page_size = 2
+    throttled_once = set()
+    request_log = []
+
+    def log_message(self, *_args):
+        pass
+
+    def _send_json(self, payload, status=200, headers=None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        query = parse_qs(parsed.query)
+        self.request_log.append(parsed.path)
+
+        if parsed.path.startswith("/v1/playlists/"):
+            offset = int(query.get("offset", ["0"])[0])
+            page = self.tracks[offset : offset + self.page_size]
+            has_next = offset + self.page_size < len(self.tracks)
+            self._send_json({"items": page, "next": "more" if has_next else None})
+        elif parsed.path == "/v1/audio-features":
+            ids = query["ids"][0].split(",")
+            key = ids[0]
+            if key not in self.throttled_once:
+                self.throttled_once.add(key)
+                self._send_json({}, status=429, headers={"Retry-After": "0"})
+                return
+            self._send_json(
+                {"audio_features": [{"id": i, "valence": 0.9, "energy": 0.9} for i in ids]}
+            )
+        elif parsed.path.startswith("/covers/"):
+            body = b"\xff\xd8fake-jpeg"
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            self._send_json({}, status=404)
+
+
+@pytest.fixture
+def spotify_stub():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SpotifyStub)
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    SpotifyStub.tracks = [
+        {
+            "track": {
+                "id": f"track{index}",
+                "name": f"Song {index}",
+                "artists": [{"name": "Stub Artist"}],
+                "album": {"name": "Stub", "images": [{"url": f"{base_url}/covers/{index}"}]},
+                "popularity": 50,
+            }
+        }
+        for index in range(5)
+    ]
+    SpotifyStub.throttled_once = set()
+    SpotifyStub.request_log = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield base_url
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_collect_playlist_pipelines_pages_features_and_covers(spotify_stub, tmp_path):
+    session = importer.build_session()
+
+    items, features_by_id, cover_stats = importer.collect_playlist(
+        "stub",
+        "token",
+        session,
+        tmp_path,
+        cover_workers=3,
+        api_url=f"{spotify_stub}/v1",
+    )
+
+    assert [item["track"]["id"] for item in items] == [f"track{i}" for i in range(5)]
+    # One feature request per page (3 pages), each retried once after a 429.
+    assert SpotifyStub.request_log.count("/v1/audio-features") == 6
+    assert set(features_by_id) == {f"track{i}" for i in range(5)}
+    assert cover_stats["downloaded"] == 5
+    assert cover_stats["missing_art"] == 0
+    assert sorted(path.name for path in tmp_path.glob("*.jpg")) == [
+        f"track{i}.jpg" for i in range(5)
+    ]
+
+
+def test_retry_delay_honors_retry_after_header():
+    response = importer.requests.Response()
+    response.headers["Retry-After"] = "3"
+    assert importer._retry_delay(response, attempt=0) == 3.0
+
+    response.headers["Retry-After"] = "Wed, 21 Oct 2015 07:28:00 GMT"
+    assert importer._retry_delay(response, attempt=2) == 2.0
+
+
+def test_classify_moods_matches_row_classifier():
+    rng = random.Random(7)
+    words = list(importer.SAD_TERMS + importer.ENERGETIC_TERMS + importer.HAPPY_TERMS)
+    words += ["Goodbye", "GOOD", "sunup", "Rock", "quiet", "blue", "", "ocean"]
+    rows = []
+    features = []
+    for index in range(500):
+        name = " ".join(rng.choice(words) for _ in range(rng.randint(0, 3)))
+        feature = {}
+        if rng.random() < 0.6:
+            feature = {
+                "valence": rng.choice([None, 0.0, 0.4, 0.62, rng.random()]),
+                "energy": rng.choice([None, 0.52, 0.56, 0.7, rng.random()]),
+                "tempo": rng.choice([None, 135, rng.uniform(60, 180)]),
+            }
+        rows.append(
+            {
+                "name": rng.choice([name, name.upper(), None]),
+                "popularity": rng.choice([None, 10, 74, 75, 90]),
+                **{key: feature.get(key) for key in ("valence", "energy", "tempo")},
+            }
+        )
+        features.append(feature)
+
+    frame = importer.pd.DataFrame(rows)
+    vectorized = importer.classify_moods(frame, has_features=[bool(f) for f in features])
+    expected = [
+        importer.classify_mood(feature, row["name"], row["popularity"])
+        for feature, row in zip(features, rows)
+    ]
+
+    assert list(vectorized) == expected
+
+
+def test_reclassify_catalog_upserts_only_changed_moods(tmp_path):
+    csv_path = tmp_path / "data_moods.csv"
+    importer.pd.DataFrame(
+        [
+            {"id": "a", "name": "Calm Song", "valence": 0.9, "energy": 0.9, "mood": "Happy"},
+            {"id": "b", "name": "Other", "valence": 0.1, "energy": 0.1, "mood": "Calm"},
+        ]
+    ).assign(source="playlist:p1").to_csv(csv_path, index=False)
+
+    stats = importer.reclassify_catalog(csv_path)
+
+    assert stats == {"total": 2, "changed": 1, "curated": 0}
+    frame, _ = importer.load_catalog(csv_path)
+    assert list(frame["mood"]) == ["Happy", "sad"]
+
+
+def test_reclassify_catalog_leaves_curated_rows_unless_asked(tmp_path):
+    csv_path = tmp_path / "data_moods.csv"
+    importer.pd.DataFrame(
+        [
+            {"id": "a", "name": "Other", "valence": 0.1, "energy": 0.1, "mood": "Calm",
+             "source": ""},
+            {"id": "b", "name": "Other", "valence": 0.1, "energy": 0.1, "mood": "Calm",
+             "source": "playlist:p1"},
+        ]
+    ).to_csv(csv_path, index=False)
+
+    stats = importer.reclassify_catalog(csv_path)
+
+    assert stats == {"total": 2, "changed": 1, "curated": 1}
+    frame, _ = importer.load_catalog(csv_path)
+    assert list(frame["mood"]) == ["Calm", "sad"]
+
+    preview = importer.reclassify_catalog(csv_path, include_curated=True, dry_run=True)
+    assert preview == {"total": 2, "changed": 1, "curated": 1}
+    assert list(importer.load_catalog(csv_path)[0]["mood"]) == ["Calm", "sad"]
+
+    importer.reclassify_catalog(csv_path, include_curated=True)
+    assert list(importer.load_catalog(csv_path)[0]["mood"]) == ["sad", "sad"]
@@ -0,0 +1,68 @@
+import os
+from pathlib import Path
+import sys
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+import metrics
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = metrics.Registry()
+    histogram = registry.histogram("test_latency_seconds", "Test.", ["stage"], buckets=(0.1, 1))
+
+    histogram.observe(0.05, stage="a")
+    histogram.observe(0.5, stage="a")
+    histogram.observe(3, stage="a")
+
+    body = registry.render()
+    assert 'test_latency_seconds_bucket{stage="a",le="0.1"} 1' in body
+    assert 'test_latency_seconds_bucket{stage="a",le="1"} 2' in body
+    assert 'test_latency_seconds_bucket{stage="a",le="+Inf"} 3' in body
+    assert 'test_latency_seconds_sum{stage="a"} 3.55' in body
+    assert 'test_latency_seconds_count{stage="a"} 3' in body
+
+
+def test_counter_rejects_unknown_labels():
+    counter = metrics.Counter("test_total", "Test.", ["path"])
+    counter.inc(path="sync")
+
+    with pytest.raises(ValueError):
+        counter.inc(route="sync")
+    assert counter.value(path="sync") == 1
+
+
+def test_shared_metrics_merge_worker_snapshots(tmp_path):
+    # Two registries stand in for two worker processes.
+    worker_registries = [metrics.Registry(), metrics.Registry()]
+    for registry in worker_registries:
+        registry.counter("test_total", "Test.", ["path"])
+        registry.gauge("test_state", "Test.")
+        registry.histogram("test_seconds", "Test.", buckets=(1,))
+    this, other = (
+        metrics.SharedMetrics(tmp_path, registry=worker_registries[0], pid=os.getpid()),
+        metrics.SharedMetrics(tmp_path, registry=worker_registries[1], pid=os.getppid()),
+    )
+    for shared, amount in ((this, 1), (other, 2)):
+        by_name = {metric.name: metric for metric in shared.registry.metrics()}
+        by_name["test_total"].inc(amount, path="sync")
+        by_name["test_state"].set(amount)
+        by_name["test_seconds"].observe(amount)
+    other.write()
+
+    body = this.render()
+    assert 'test_total{path="sync"} 3' in body
+    assert 'test_seconds_bucket{le="1"} 1' in body
+    assert 'test_seconds_count 2' in body
+    assert f'test_state{{pid="{os.getpid()}"}} 1' in body
+    assert f'test_state{{pid="{os.getppid()}"}} 2' in body
+
+    other.close()
+
+    body = this.render()
+    assert 'test_total{path="sync"} 3' in body
+    assert f'test_state{{pid="{os.getppid()}"}}' not in body
@@ -0,0 +1,129 @@
+from pathlib import Path
+import sys
+
+import requests
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from preview_revalidation import (
+    ALIVE,
+    DEAD,
+    UNKNOWN,
+    PreviewRevalidator,
+    check_preview_url,
+)
+from resilience import TokenBucket
+
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+    def close(self):
+        pass
+
+
+class FakeSession:
+    def __init__(self, head_status, get_status=200):
+        self.head_status = head_status
+        self.get_status = get_status
+        self.calls = []
+
+    def head(self, url, **_kwargs):
+        self.calls.append(("HEAD", url))
+        if isinstance(self.head_status, Exception):
+            raise self.head_status
+        return FakeResponse(self.head_status)
+
+    def get(self, url, headers=None, **_kwargs):
+        self.calls.append(("GET", headers))
+        return FakeResponse(self.get_status)
+
+
+def test_check_preview_url_classifies_responses():
+    assert check_preview_url(FakeSession(200), "https://cdn/a.m4a") == ALIVE
+    assert check_preview_url(FakeSession(403), "https://cdn/a.m4a") == DEAD
+    assert check_preview_url(FakeSession(503), "https://cdn/a.m4a") == UNKNOWN
+    assert check_preview_url(FakeSession(requests.Timeout()), "https://cdn/a.m4a") == UNKNOWN
+
+    session = FakeSession(405, get_status=206)
+    assert check_preview_url(session, "https://cdn/a.m4a") == ALIVE
+    assert session.calls[-1] == ("GET", {"Range": "bytes=0-0"})
+
+
+def make_revalidator(statuses, resolved, clock, **kwargs):
+    checked, replaced = [], []
+
+    def check(url):
+        checked.append(url)
+        return statuses.get(url, ALIVE)
+
+    revalidator = PreviewRevalidator(
+        check=check,
+        resolve=lambda name, artist: resolved.get(name, (None, True)),
+        replace=lambda *args: replaced.append(args),
+        limiter=TokenBucket(rate=1000, burst=1000, clock=clock),
+        clock=clock,
+        **kwargs,
+    )
+    return revalidator, checked, replaced
+
+
+def test_revalidator_checks_most_served_first_and_replaces_dead_urls(clock):
+    revalidator, checked, replaced = make_revalidator(
+        {"https://cdn/b-old": DEAD}, {"B": ("https://cdn/b-new", True)}, clock, batch_size=2
+    )
+    revalidator.record_served("a", "A", "x", "https://cdn/a")
+    for _ in range(3):
+        revalidator.record_served("b", "B", "y", "https://cdn/b-old")
+    revalidator.record_served("c", "C", "z", "https://cdn/c")
+    revalidator.record_served("c", "C", "z", "https://cdn/c")
+
+    summary = revalidator.run_once()
+
+    assert checked == ["https://cdn/b-old", "https://cdn/c"]
+    assert replaced == [("b", "https://cdn/b-old", "https://cdn/b-new")]
+    assert summary == {ALIVE: 1, DEAD: 1, UNKNOWN: 0, "replaced": 1}
+
+    # Fresh results are not re-checked until they age out; "a" is next in line.
+    checked.clear()
+    revalidator.run_once()
+    assert checked == ["https://cdn/a"]
+    clock.now = revalidator.max_age
+    checked.clear()
+    revalidator.run_once()
+    assert checked == ["https://cdn/b-new", "https://cdn/c"]
+
+
+def test_revalidator_retries_incomplete_resolution_and_sweeps_unserved_tracks(clock):
+    resolved = {"A": (None, False)}
+    revalidator, checked, replaced = make_revalidator(
+        {"https://cdn/a": DEAD, "https://cdn/s": DEAD}, resolved, clock
+    )
+    revalidator.record_served("a", "A", "x", "https://cdn/a")
+    sweep = lambda limit: [("s", "S", "w", "https://cdn/s"), ("a", "A", "x", "https://cdn/a")]
+
+    revalidator.run_once(sweep)
+
+    assert checked == ["https://cdn/a", "https://cdn/s"]
+    assert replaced == [("a", "https://cdn/a", None), ("s", "https://cdn/s", None)]
+
+    resolved["A"] = ("https://cdn/a-new", True)
+    checked.clear()
+    summary = revalidator.run_once()
+    assert checked == []
+    assert replaced[-1] == ("a", "https://cdn/a", "https://cdn/a-new")
+    assert summary["replaced"] == 1
+
+
+def test_revalidator_bounds_tracked_tracks(clock):
+    revalidator, _, _ = make_revalidator({}, {}, clock, max_tracked=8)
+    for index in range(100):
+        revalidator.record_served("hot", "H", "x", "https://cdn/hot")
+        revalidator.record_served(f"t{index}", "T", "x", f"https://cdn/{index}")
+
+    assert len(revalidator._tracks) <= 8
+    assert revalidator.served_count("hot") > 1
+    assert revalidator.served_count("t0") == 0
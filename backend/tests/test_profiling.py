@@ -0,0 +1,60 @@
+from pathlib import Path
+import sys
+import time
+
+from flask import Flask
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+import profiling
+
+
+def _busy_wait(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def _make_app(tmp_path):
+    app = Flask(__name__)
+
+    @app.get("/slow")
+    def slow():
+        _busy_wait(0.05)
+        return "ok"
+
+    assert profiling.init_app(
+        app, token="secret", output_dir=tmp_path, endpoints={"slow"}, interval=0.001
+    )
+    return app
+
+
+def test_profiled_request_writes_collapsed_stacks(tmp_path):
+    client = _make_app(tmp_path).test_client()
+
+    response = client.get("/slow", headers={profiling.PROFILE_HEADER: "secret"})
+
+    assert response.status_code == 200
+    assert int(response.headers["X-Profile-Samples"]) > 0
+    assert "_busy_wait" in response.headers["X-Profile-Top"]
+    output = tmp_path / response.headers["X-Profile-File"]
+    first_line = output.read_text().splitlines()[0]
+    stack, count = first_line.rsplit(" ", 1)
+    assert "slow (test_profiling.py" in stack
+    assert int(count) > 0
+
+
+def test_requests_without_valid_token_are_not_profiled(tmp_path):
+    client = _make_app(tmp_path).test_client()
+
+    assert "X-Profile-File" not in client.get("/slow").headers
+    response = client.get("/slow", headers={profiling.PROFILE_HEADER: "wrong"})
+    assert "X-Profile-File" not in response.headers
+    assert not list(tmp_path.iterdir())
+
+
+def test_init_app_is_disabled_without_token(monkeypatch):
+    monkeypatch.delenv("PROFILE_TOKEN", raising=False)
+    assert profiling.init_app(Flask(__name__)) is False
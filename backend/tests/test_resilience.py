@@ -0,0 +1,62 @@
+from pathlib import Path
+import sys
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from metrics import UPSTREAM_CIRCUIT_STATE, UPSTREAM_REJECTED
+from resilience import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, TokenBucket, UpstreamGuard
+
+
+def test_token_bucket_refills_at_configured_rate(clock):
+    bucket = TokenBucket(rate=2, burst=2, clock=clock)
+
+    assert bucket.try_acquire()
+    assert bucket.try_acquire()
+    assert not bucket.try_acquire()
+
+    clock.now = 0.5
+    assert bucket.try_acquire()
+    assert not bucket.try_acquire()
+
+
+def test_circuit_breaker_opens_then_probes_after_cooldown(clock):
+    breaker = CircuitBreaker(failure_threshold=2, cooldown=10, clock=clock)
+
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+    clock.now = 10
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    # Only one trial call is let through while half-open.
+    assert not breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    clock.now = 20
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.allow()
+
+
+def test_guard_reports_rejections_and_state(clock):
+    guard = UpstreamGuard(
+        "test-provider",
+        TokenBucket(rate=1, burst=1, clock=clock),
+        CircuitBreaker(failure_threshold=1, cooldown=30, clock=clock),
+    )
+
+    assert guard.acquire()
+    assert not guard.acquire()
+    assert UPSTREAM_REJECTED.value(provider="test-provider", reason="rate_limited") == 1
+
+    guard.record_failure()
+    assert UPSTREAM_CIRCUIT_STATE.value(provider="test-provider") == 1
+    assert not guard.acquire()
+    assert UPSTREAM_REJECTED.value(provider="test-provider", reason="circuit_open") == 1
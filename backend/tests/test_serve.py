@@ -0,0 +1,55 @@
+from pathlib import Path
+import sys
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+import app as app_module
+import serve
+
+
+def test_gunicorn_options_preload_shared_state_and_drain_on_shutdown():
+    options = serve.gunicorn_options("0.0.0.0", 8000, 3, 8, 30, 20, warm_vision=False)
+
+    assert options["bind"] == "0.0.0.0:8000"
+    assert options["workers"] == 3
+    assert options["threads"] == 8
+    assert options["preload_app"] is True
+    assert options["graceful_timeout"] == 20
+
+
+def test_gunicorn_hooks_warm_up_after_fork_and_release_resources(monkeypatch):
+    calls = []
+    monkeypatch.setattr(app_module, "warm_up_vision", lambda flask_app: calls.append("warm"))
+    monkeypatch.setattr(app_module, "shutdown", lambda: calls.append("shutdown"))
+
+    options = serve.gunicorn_options("127.0.0.1", 8000, 1, 1, 30, 30, warm_vision=True)
+    options["post_fork"](None, None)
+    options["worker_exit"](None, None)
+
+    assert calls == ["warm", "shutdown"]
+
+
+def test_gunicorn_workers_write_metrics_and_master_removes_them(monkeypatch, tmp_path):
+    metrics_dir = tmp_path / "metrics"
+    metrics_dir.mkdir()
+    started = []
+    shared = app_module.SharedMetrics(metrics_dir)
+    monkeypatch.setattr(shared, "start", lambda: started.append(True))
+    monkeypatch.setattr(app_module, "SHARED_METRICS", shared)
+
+    options = serve.gunicorn_options(
+        "127.0.0.1", 8000, 2, 1, 30, 30, warm_vision=False, metrics_dir=str(metrics_dir)
+    )
+    options["post_fork"](None, None)
+    options["on_exit"](None)
+
+    assert started == [True]
+    assert not metrics_dir.exists()
+
+
+def test_default_workers_honors_web_concurrency(monkeypatch):
+    monkeypatch.setenv("WEB_CONCURRENCY", "6")
+
+    assert serve.default_workers() == 6
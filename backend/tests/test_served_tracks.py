@@ -0,0 +1,62 @@
+from pathlib import Path
+import sys
+
+import numpy as np
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from served_tracks import ServedTracks
+
+
+def test_marks_rows_per_session_and_partition(clock):
+    store = ServedTracks(clock=clock)
+    store.mark("s1", "happy", np.array([0, 3, 9]), 10)
+
+    assert np.flatnonzero(store.seen("s1", "happy", 10)).tolist() == [0, 3, 9]
+    assert not store.seen("s1", "sad", 10).any()
+    assert not store.seen("s2", "happy", 10).any()
+    # Rows beyond a partition that shrank are ignored.
+    assert np.flatnonzero(store.seen("s1", "happy", 5)).tolist() == [0, 3]
+
+
+def test_entry_resets_once_the_partition_is_exhausted(clock):
+    store = ServedTracks(clock=clock)
+    store.mark("s1", "happy", np.array([0, 1]), 3)
+    store.mark("s1", "happy", np.array([2]), 3)
+
+    assert not store.seen("s1", "happy", 3).any()
+    assert len(store) == 0
+
+
+def test_entries_expire_and_stay_within_budget(clock):
+    store = ServedTracks(ttl=60, max_entries=3, clock=clock)
+    for index in range(5):
+        store.mark(f"s{index}", "happy", np.array([1]), 100)
+
+    assert len(store) == 3
+    assert not store.seen("s0", "happy", 100).any()
+    assert store.seen("s4", "happy", 100)[1]
+
+    clock.now = 61
+    store.seen("s4", "happy", 100)
+    assert len(store) == 0
+    assert store.nbytes == 0
+
+    small = ServedTracks(max_bytes=1000, clock=clock)
+    for index in range(50):
+        small.mark(f"s{index}", "happy", np.array([999]), 1000)
+    assert small.nbytes <= 1000
+
+
+def test_clear_forgets_every_session(clock):
+    store = ServedTracks(clock=clock)
+    store.mark("s1", "happy", np.array([0, 1]), 10)
+    store.mark("s2", "sad", np.array([2]), 10)
+
+    store.clear()
+
+    assert len(store) == 0
+    assert store.nbytes == 0
+    assert not store.seen("s1", "happy", 10).any()
@@ -0,0 +1,76 @@
+from pathlib import Path
+import sys
+import threading
+import time
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_execution():
+    flights = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+    results = []
+
+    def slow_lookup():
+        calls.append(1)
+        started.set()
+        release.wait(timeout=5)
+        return "https://previews.test/shared.m4a"
+
+    def caller():
+        results.append(flights.do("track-1", slow_lookup))
+
+    leader = threading.Thread(target=caller)
+    leader.start()
+    started.wait(timeout=5)
+    followers = [threading.Thread(target=caller) for _ in range(3)]
+    for thread in followers:
+        thread.start()
+    # Give followers time to block on the in-flight call before releasing it.
+    time.sleep(0.1)
+    release.set()
+    for thread in [leader, *followers]:
+        thread.join(timeout=5)
+
+    assert len(calls) == 1
+    assert sorted(shared for _, shared in results) == [False, True, True, True]
+    assert {result for result, _ in results} == {"https://previews.test/shared.m4a"}
+
+
+def test_errors_propagate_to_waiting_callers_and_key_is_released():
+    flights = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    errors = {}
+
+    def failing_lookup():
+        started.set()
+        release.wait(timeout=5)
+        raise RuntimeError("upstream down")
+
+    def caller(name):
+        try:
+            flights.do("track-2", failing_lookup)
+        except RuntimeError as exc:
+            errors[name] = exc
+
+    leader = threading.Thread(target=caller, args=("leader",))
+    leader.start()
+    started.wait(timeout=5)
+    follower = threading.Thread(target=caller, args=("follower",))
+    follower.start()
+    # Give the follower time to block on the in-flight call before it fails.
+    time.sleep(0.1)
+    release.set()
+    for thread in (leader, follower):
+        thread.join(timeout=5)
+
+    assert str(errors["leader"]) == "upstream down"
+    assert errors["follower"] is errors["leader"]
+    assert flights.do("track-2", lambda: "recovered") == ("recovered", False)
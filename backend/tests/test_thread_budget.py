@@ -0,0 +1,51 @@
+from pathlib import Path
+import sys
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+import image_processing
+from thread_budget import ThreadBudget, thread_budget
+
+
+def test_budget_splits_cores_across_workers():
+    budget = thread_budget(workers=4, cpu_count=16, env={})
+
+    assert budget.opencv == 4
+    assert budget.tf_intra_op == 4
+    assert budget.tf_inter_op == 1
+    assert budget.request_threads == 8
+
+    crowded = thread_budget(workers=8, cpu_count=4, env={})
+    assert (crowded.opencv, crowded.tf_intra_op, crowded.request_threads) == (1, 1, 4)
+
+
+def test_budget_reads_workers_and_overrides_from_env():
+    env = {
+        "WEB_CONCURRENCY": "2",
+        "OPENCV_NUM_THREADS": "0",
+        "TF_INTRA_OP_THREADS": "3",
+        "WEB_THREADS": "12",
+    }
+    budget = thread_budget(cpu_count=8, env=env)
+
+    assert budget.workers == 2
+    assert budget.opencv == 0
+    assert budget.tf_intra_op == 3
+    assert budget.request_threads == 12
+
+
+def test_configure_threads_applies_budget_to_opencv(monkeypatch):
+    cv2 = pytest.importorskip("cv2")
+    monkeypatch.setattr(image_processing, "cv2", cv2)
+    monkeypatch.setattr(image_processing, "THREAD_BUDGET", None)
+    original = cv2.getNumThreads()
+    try:
+        image_processing.configure_threads(ThreadBudget(4, 2, 1, 2, 1, 4))
+        assert cv2.getNumThreads() == 1
+        assert image_processing._thread_budget().tf_intra_op == 2
+    finally:
+        cv2.setNumThreads(original)
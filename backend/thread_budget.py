@@ -0,0 +1,58 @@
+"""CPU thread budget for one worker process.
+
+OpenCV and TensorFlow each size their thread pools to every core of the
+machine, so several pre-forked workers running both oversubscribe the CPUs and
+``detectMultiScale``/``predict`` latency climbs. ``thread_budget`` splits the
+cores the process may use evenly across the workers and gives each worker's
+libraries that share. Request threads mostly wait on upstream I/O, so there are
+a few more of them than cores.
+
+Every value can be pinned from the environment: ``OPENCV_NUM_THREADS``,
+``TF_INTRA_OP_THREADS``, ``TF_INTER_OP_THREADS`` and ``WEB_THREADS``; the worker
+count comes from ``WEB_CONCURRENCY``. ``benchmarks/sweep_threads.py`` measures
+which settings work best on a given machine.
+"""
+
+import os
+from collections import namedtuple
+
+MIN_REQUEST_THREADS = 4
+
+ThreadBudget = namedtuple(
+    "ThreadBudget", "cores workers opencv tf_intra_op tf_inter_op request_threads"
+)
+
+
+def available_cpus():
+    """Cores this process may run on (respects CPU affinity, e.g. container cpusets)."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0)) or 1
+    return os.cpu_count() or 1
+
+
+def _env_int(env, name):
+    value = (env.get(name) or "").strip()
+    return int(value) if value else None
+
+
+def _first_set(*values):
+    return next(value for value in values if value is not None)
+
+
+def thread_budget(workers=None, cpu_count=None, env=None):
+    """Return the ThreadBudget of one of ``workers`` processes; env settings win."""
+    env = os.environ if env is None else env
+    cores = cpu_count or available_cpus()
+    workers = max(1, workers or _env_int(env, "WEB_CONCURRENCY") or 1)
+    per_worker = max(1, cores // workers)
+    return ThreadBudget(
+        cores=cores,
+        workers=workers,
+        opencv=_first_set(_env_int(env, "OPENCV_NUM_THREADS"), per_worker),
+        tf_intra_op=_first_set(_env_int(env, "TF_INTRA_OP_THREADS"), per_worker),
+        # The emotion model is a single chain of ops; more inter-op threads only idle.
+        tf_inter_op=_first_set(_env_int(env, "TF_INTER_OP_THREADS"), 1),
+        request_threads=_first_set(
+            _env_int(env, "WEB_THREADS"), max(MIN_REQUEST_THREADS, 2 * per_worker)
+        ),
+    )
@@ -1,3 +1,4 @@
+import argparse
 import os
 import signal
 import subprocess
@@ -19,13 +20,45 @@ def terminate_processes(processes):
             proc.send_signal(signal.SIGTERM)
 
 
-def main():
-    backend_cmd = [sys.executable, "app.py"]
-    frontend_cmd = ["npm", "start"]
+def _interrupt(_signum, _frame):
+    raise KeyboardInterrupt
 
-    backend = spawn_process(backend_cmd, BACKEND_DIR)
-    frontend = spawn_process(frontend_cmd, ROOT_DIR)
-    processes = (backend, frontend)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Start the Mood Music backend and frontend.")
+    parser.add_argument(
+        "--prod",
+        action="store_true",
+        help="Run only the backend, on a multi-worker production WSGI server (backend/serve.py).",
+    )
+    parser.add_argument("--host", help="Production bind address (default 127.0.0.1).")
+    parser.add_argument("--port", type=int, help="Production port (default 5000).")
+    parser.add_argument("--workers", type=int, help="Production worker processes.")
+    parser.add_argument("--threads", type=int, help="Threads per production worker.")
+    parser.add_argument("--graceful-timeout", type=int, help="Seconds to drain on shutdown.")
+    return parser.parse_args(argv)
+
+
+def production_command(args):
+    command = [sys.executable, "serve.py"]
+    for option in ("host", "port", "workers", "threads", "graceful_timeout"):
+        value = getattr(args, option)
+        if value is not None:
+            command += [f"--{option.replace('_', '-')}", str(value)]
+    return command
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    # Treat SIGTERM from a supervisor like Ctrl+C so the children are drained too.
+    signal.signal(signal.SIGTERM, _interrupt)
+    if args.prod:
+        backend = spawn_process(production_command(args), BACKEND_DIR)
+        processes = (backend,)
+    else:
+        backend = spawn_process([sys.executable, "app.py"], BACKEND_DIR)
+        frontend = spawn_process(["npm", "start"], ROOT_DIR)
+        processes = (backend, frontend)
 
     try:
         while True:
@@ -36,6 +69,8 @@ def main():
             time.sleep(0.5)
     except KeyboardInterrupt:
         terminate_processes(processes)
+        for proc in processes:
+            proc.wait()
         return 130
 
 
@@ -36,7 +36,8 @@ export default function StyledTable({ rows }) {
 
     const songDetails = rows.map((row) => ({
       ...row,
-      albumImageUrl: `/album_covers/${row.id}.jpg`,
+      albumImageUrl: `/album_covers/300/${row.id}.jpg`,
+      albumFallbackUrl: `/album_covers/${row.id}.jpg`,
       previewUrl: row.preview_url || null,
     }));
     setSongData(songDetails);
@@ -186,7 +187,17 @@ export default function StyledTable({ rows }) {
                 key={row.id}
                 className={`song-item ${isNowPlaying ? "song-item--now-playing" : ""}`}
               >
-                <img src={row.albumImageUrl} alt={`${row.album} cover`} />
+                <img
+                  src={row.albumImageUrl}
+                  alt={`${row.album} cover`}
+                  loading="lazy"
+                  onError={(event) => {
+                    // Covers imported before thumbnails existed only have the full-size file.
+                    if (!event.currentTarget.src.endsWith(row.albumFallbackUrl)) {
+                      event.currentTarget.src = row.albumFallbackUrl;
+                    }
+                  }}
+                />
                 <div className="song-title">{row.name}</div>
                 <div className="song-artist">{row.artist}</div>
                 <div